@@ -3,13 +3,21 @@ AI Learning Platform — Flask application factory.
 
 In development: serves API only (frontend via Vite dev server).
 In production: serves both API and frontend static files from dist/.
+
+The factory does no schema work: run 'flask --app app init-db' once per
+deploy (python app.py does it for local development).
 """
 import os
-from flask import Flask, send_from_directory
+from flask import Flask, request, abort
 from flask_cors import CORS
 from datetime import timedelta
 from config import Config
 from extensions import db, jwt, limiter
+from migrations import init_db
+from database import normalize_uri, engine_options, configure_engine
+from commands import register_commands
+from static_files import StaticManifest
+from services import metrics, history_writer
 
 
 def create_app():
@@ -17,9 +25,15 @@ def create_app():
     frontend_dist = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'frontend', 'dist')
     frontend_dist = os.path.normpath(frontend_dist)
 
-    app = Flask(__name__, static_folder=frontend_dist, static_url_path='')
+    # Frontend files are served from an in-memory manifest (see static_files.py)
+    # rather than Flask's static route, which stats the filesystem per request
+    app = Flask(__name__, static_folder=None)
     app.config.from_object(Config)
+    app.config['FRONTEND_DIST'] = frontend_dist
     app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(days=7)
+    app.json = metrics.TimedJSONProvider(app)
+    app.config['SQLALCHEMY_DATABASE_URI'] = normalize_uri(app.config['SQLALCHEMY_DATABASE_URI'])
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
 
     # CORS — allow dev servers + production origin
     allowed_origins = [
@@ -43,12 +57,40 @@ def create_app():
     from routes.mcq import mcq_bp
     from routes.history import history_bp
     from routes.stats import stats_bp
+    from routes.metrics import metrics_bp
 
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(explainer_bp, url_prefix='/api')
     app.register_blueprint(mcq_bp, url_prefix='/api')
     app.register_blueprint(history_bp, url_prefix='/api')
     app.register_blueprint(stats_bp)
+    if app.config['METRICS_ENABLED']:
+        app.register_blueprint(metrics_bp)
+
+    # Request timing — per-endpoint latency histogram, plus a Server-Timing header
+    # breaking the request down into db / gemini / json phases. For streamed
+    # responses this covers the time until the first chunk is sent.
+    @app.before_request
+    def start_request_timing():
+        metrics.start_request()
+
+    @app.after_request
+    def record_request_timing(response):
+        timing = metrics.request_phases()
+        if timing is None:
+            return response
+        total, phases, queries = timing
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.http_requests.observe(total, method=request.method, endpoint=endpoint,
+                                      status=response.status_code)
+        metrics.db_queries_per_request.observe(queries, endpoint=endpoint)
+        if app.config['SERVER_TIMING'] and request.path.startswith('/api/'):
+            parts = [f'app;dur={total * 1000:.1f}']
+            for name, seconds in phases.items():
+                desc = f';desc="{queries} queries"' if name == 'db' else ''
+                parts.append(f'{name};dur={seconds * 1000:.1f}{desc}')
+            response.headers['Server-Timing'] = ', '.join(parts)
+        return response
 
     # Security Headers
     @app.after_request
@@ -58,22 +100,36 @@ def create_app():
         response.headers['X-XSS-Protection'] = '1; mode=block'
         return response
 
+    frontend = StaticManifest(frontend_dist)
+
     # Serve React app for all non-API routes (SPA client-side routing)
     @app.route('/', defaults={'path': ''})
     @app.route('/<path:path>')
     def serve_frontend(path):
-        # If the path is a real file in dist, serve it
-        if path and os.path.exists(os.path.join(frontend_dist, path)):
-            return send_from_directory(frontend_dist, path)
-        # Otherwise serve index.html (React Router handles routing)
-        return send_from_directory(frontend_dist, 'index.html')
+        # Real files in dist are served as-is; anything else gets index.html
+        # (React Router handles routing)
+        response = frontend.response(path, request)
+        if response is None:
+            abort(404)
+        return response
+
+    register_commands(app)
+    history_writer.init_app(app)
 
     with app.app_context():
-        db.create_all()
+        configure_engine(db.engine)
+        metrics.instrument_engine(db.engine)
+        # Schema setup is a deploy step ('flask init-db'), not something every
+        # worker should pay for on boot
+        if app.config['AUTO_INIT_DB']:
+            init_db()
 
     return app
 
 
 if __name__ == '__main__':
     app = create_app()
+    # Local development: make sure the database exists before serving
+    with app.app_context():
+        init_db()
     app.run(debug=app.config.get('DEBUG', False), port=5000)
\ No newline at end of file
@@ -0,0 +1,117 @@
+"""
+Database concurrency check — parallel History writers across processes.
+
+Starts `--processes` worker processes (like Gunicorn workers), each with
+`--threads` threads that save `--writes` History entries through the
+history store and read back the user's stats rollup. Prints throughput
+and every error seen, and exits non-zero if any write failed. The
+"database is locked" regression check itself runs under pytest
+(tests/test_db_concurrency.py); this script is for throughput and for
+comparing engine profiles.
+
+Compare engine profiles by overriding the pragmas, e.g. the pre-WAL setup:
+    SQLITE_JOURNAL_MODE=DELETE SQLITE_BUSY_TIMEOUT=0 python -m bench.db_concurrency
+
+Usage (from backend/):
+    python -m bench.db_concurrency --processes 4 --threads 4 --writes 50
+    DATABASE_URL=postgresql://... python -m bench.db_concurrency
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+
+def _worker(index, threads, writes, user_ids, results):
+    logging.disable(logging.WARNING)
+    from app import create_app
+    from extensions import db
+    from models.history import History
+    from services.history_store import save_entry, get_user_stats
+
+    app = create_app()
+    errors = Counter()
+    done = Counter()
+    lock = threading.Lock()
+
+    def writer(n):
+        user_id = user_ids[(index * threads + n) % len(user_ids)]
+        with app.app_context():
+            for i in range(writes):
+                try:
+                    save_entry(History(user_id=user_id, type='explain', topic=f'Topic {i % 7}',
+                                       response=f'process {index} thread {n} write {i}'))
+                    get_user_stats(user_id)
+                    with lock:
+                        done['writes'] += 1
+                except Exception as e:
+                    db.session.rollback()
+                    with lock:
+                        errors[f'{type(e).__name__}: {str(e).splitlines()[0][:80]}'] += 1
+
+    pool = [threading.Thread(target=writer, args=(n,)) for n in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    results.put((done['writes'], dict(errors)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--writes', type=int, default=50, help='writes per thread')
+    parser.add_argument('--users', type=int, default=8)
+    args = parser.parse_args()
+
+    if 'DATABASE_URL' not in os.environ:
+        os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'concurrency.db')
+    os.environ.setdefault('GEMINI_FAKE', 'true')
+    logging.disable(logging.WARNING)
+
+    from app import create_app
+    from extensions import db
+    from migrations import init_db
+    from models.user import User
+
+    app = create_app()
+    with app.app_context():
+        init_db()
+        users = [User(username=f'writer{n}-{time.time_ns()}', password='x', age=14) for n in range(args.users)]
+        db.session.add_all(users)
+        db.session.commit()
+        user_ids = [u.id for u in users]
+        print(f"database: {db.engine.url.render_as_string(hide_password=True)}")
+
+    ctx = multiprocessing.get_context('spawn')
+    results = ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(i, args.threads, args.writes, user_ids, results))
+             for i in range(args.processes)]
+    started = time.perf_counter()
+    for p in procs:
+        p.start()
+    outcomes = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    elapsed = time.perf_counter() - started
+
+    writes = sum(done for done, _ in outcomes)
+    errors = Counter()
+    for _, errs in outcomes:
+        errors.update(errs)
+    expected = args.processes * args.threads * args.writes
+    print(f"{args.processes} processes x {args.threads} threads, {writes}/{expected} writes "
+          f"in {elapsed:.1f}s ({writes / elapsed:.0f} writes/s)")
+    for message, count in errors.most_common():
+        print(f"  {count:>5} x {message}")
+    sys.exit(1 if errors or writes != expected else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""
+History storage benchmark — database size and read latency with and
+without History.response compression.
+
+Seeds a fresh SQLite database with `--rows` explanation and quiz entries
+stored uncompressed, measures the file size (after VACUUM) and the time to
+read entries back, then compresses the table with the same batched
+rewrite as migration 6 and measures again.
+
+Reads are timed two ways: `--lookups` random single-entry loads (what
+GET /api/history/<id> does) and a full scan of every response (what
+'flask rebuild-search-index' does).
+
+Usage (from backend/):
+    python -m bench.history_storage --rows 20000
+    python -m bench.history_storage --rows 5000 --min-bytes 256
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import tempfile
+import time
+
+PARAGRAPHS = [
+    'Photosynthesis is the process plants use to turn light energy into chemical energy stored in glucose.',
+    'Chlorophyll in the chloroplasts absorbs mostly red and blue light, which is why leaves look green.',
+    'Gravity is the force that pulls objects with mass towards each other; on Earth it gives things weight.',
+    'A fraction describes part of a whole: the denominator says how many equal parts, the numerator how many we take.',
+    'Volcanoes form where magma from the mantle reaches the surface through cracks in the crust.',
+    'In the water cycle, water evaporates, condenses into clouds and falls back to the ground as precipitation.',
+    'A for loop in Python repeats a block of code once for every item in a sequence such as a list or range.',
+    'An electric circuit needs a closed loop so that current can flow from the power source and back again.',
+]
+
+
+def _explanation(rng):
+    sections = []
+    for n in range(rng.randint(3, 6)):
+        body = ' '.join(rng.choice(PARAGRAPHS) for _ in range(rng.randint(2, 5)))
+        sections.append(f'## Part {n + 1}\n\n{body}\n\n- Key idea: {rng.choice(PARAGRAPHS)}')
+    return '\n\n'.join(sections)
+
+
+def _quiz(rng):
+    return json.dumps([{
+        'question': rng.choice(PARAGRAPHS)[:80] + '?',
+        'options': [rng.choice(PARAGRAPHS)[:40] for _ in range(4)],
+        'correct_answer': 'A',
+        'explanation': rng.choice(PARAGRAPHS),
+    } for _ in range(rng.choice([5, 10]))])
+
+
+def _measure(db, History, path, ids, lookups, rng):
+    db.session.remove()
+    with db.engine.connect() as conn:
+        # In WAL mode VACUUM writes the rebuilt file to the log; checkpoint it back
+        conn.exec_driver_sql('VACUUM')
+        conn.exec_driver_sql('PRAGMA wal_checkpoint(TRUNCATE)')
+    size = os.path.getsize(path)
+
+    sample = [rng.choice(ids) for _ in range(lookups)]
+    started = time.perf_counter()
+    for entry_id in sample:
+        db.session.get(History, entry_id).response
+        db.session.expunge_all()
+    lookup_ms = (time.perf_counter() - started) * 1000 / lookups
+
+    table = History.__table__
+    started = time.perf_counter()
+    with db.engine.connect() as conn:
+        total = sum(len(r.response) for r in conn.execute(table.select().with_only_columns(table.c.response)))
+    scan_ms = (time.perf_counter() - started) * 1000
+    return {'size_mb': size / 1e6, 'lookup_ms': lookup_ms, 'scan_ms': scan_ms, 'chars': total}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--lookups', type=int, default=2000)
+    parser.add_argument('--min-bytes', type=int, default=512, help='HISTORY_COMPRESS_MIN_BYTES')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'history.db')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + path
+    os.environ['HISTORY_COMPRESS_MIN_BYTES'] = str(args.min_bytes)
+    os.environ.setdefault('GEMINI_FAKE', 'true')
+    logging.disable(logging.WARNING)
+
+    from app import create_app
+    from config import Config
+    from extensions import db
+    from migrations import _compress_history, init_db
+    from models.history import History
+    from models.user import User
+
+    rng = random.Random(args.seed)
+    app = create_app()
+    with app.app_context():
+        init_db()
+        # Seed the "before" state: responses stored as plain text
+        Config.HISTORY_COMPRESSION = False
+        user = User(username='storage-bench', password='x', age=14)
+        db.session.add(user)
+        db.session.commit()
+        for start in range(0, args.rows, 1000):
+            db.session.add_all([
+                History(user_id=user.id, type=kind, topic=f'Topic {n % 50}',
+                        response=_explanation(rng) if kind == 'explain' else _quiz(rng))
+                for n in range(start, min(start + 1000, args.rows))
+                for kind in [rng.choice(['explain', 'explain', 'mcq'])]
+            ])
+            db.session.commit()
+        ids = [row.id for row in db.session.query(History.id)]
+
+        before = _measure(db, History, path, ids, args.lookups, rng)
+
+        Config.HISTORY_COMPRESSION = True
+        started = time.perf_counter()
+        with db.engine.begin() as conn:
+            _compress_history(conn)
+        migrate_s = time.perf_counter() - started
+        after = _measure(db, History, path, ids, args.lookups, rng)
+
+    assert before['chars'] == after['chars'], 'responses changed after compression'
+    print(f"{args.rows} rows, compression threshold {args.min_bytes} bytes, migration took {migrate_s:.1f}s")
+    print(f"{'':<12}{'db size':>12}{'lookup':>12}{'full scan':>12}")
+    for name, m in (('plain', before), ('compressed', after)):
+        print(f"{name:<12}{m['size_mb']:>10.1f}MB{m['lookup_ms']:>10.3f}ms{m['scan_ms']:>10.0f}ms")
+    print(f"size ratio {after['size_mb'] / before['size_mb']:.2f}")
+
+
+if __name__ == '__main__':
+    main()
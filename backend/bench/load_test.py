@@ -0,0 +1,271 @@
+"""
+API load test — throughput and latency percentiles per endpoint.
+
+Seeds a SQLite database with `--users` users × `--history` history rows
+each, then runs `--clients` concurrent clients for `--seconds`, each
+logging in as a seeded user and issuing a weighted mix of requests
+(signup, login, explain, mcq, history, stats). Gemini is replaced by the
+fake model (GEMINI_FAKE) with `--ai-latency` seconds per call, and rate
+limits and daily AI quotas are switched off so the numbers reflect the
+app itself.
+
+By default requests go through Flask's test client in this process. With
+`--url` they go over HTTP to a running server instead; start it with the
+same DATABASE_URL, GEMINI_FAKE=true, RATELIMIT_ENABLED=false and
+AI_DAILY_REQUEST_LIMIT=0 so the seeded users exist and nothing is throttled.
+
+Usage (from backend/):
+    python -m bench.load_test --users 200 --history 100 --clients 16 --seconds 20
+    python -m bench.load_test --mix history=5,stats=5 --json before.json
+    DATABASE_URL=sqlite:////tmp/load.db python -m bench.load_test --url http://127.0.0.1:5000
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+DEFAULT_MIX = 'explain=2,mcq=1,history=4,stats=3,login=0.5,signup=0.2'
+PASSWORD = 'bench-password'
+TOPICS = ['Photosynthesis', 'Gravity', 'Fractions', 'Volcanoes', 'The water cycle',
+          'Python loops', 'World War II', 'Electric circuits', 'DNA', 'Climate change']
+
+
+def _configure_env(args):
+    """Point Config at the benchmark setup; must run before the app is imported."""
+    os.environ['GEMINI_FAKE'] = 'true'
+    os.environ['GEMINI_FAKE_LATENCY'] = str(args.ai_latency)
+    os.environ['RATELIMIT_ENABLED'] = 'false'
+    os.environ['AI_DAILY_REQUEST_LIMIT'] = '0'
+    os.environ['AI_DAILY_TOKEN_LIMIT'] = '0'
+    os.environ['BCRYPT_ROUNDS'] = str(args.bcrypt_rounds)
+    os.environ['AI_CACHE_BACKEND'] = args.cache
+    if 'DATABASE_URL' not in os.environ:
+        os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'load_test.db')
+
+
+def seed(app, users, history_per_user):
+    """Create bench users with history rows; returns the usernames."""
+    from extensions import db
+    from models.user import User
+    from models.history import History
+    from services.history_store import save_entries
+    from services.passwords import hash_password
+
+    hashed = hash_password(PASSWORD)
+    usernames = [f'bench{n}' for n in range(users)]
+    with app.app_context():
+        existing = {u.username for u in User.query.filter(User.username.in_(usernames))}
+        for name in usernames:
+            if name in existing:
+                continue
+            user = User(username=name, password=hashed, age=random.randint(8, 18))
+            db.session.add(user)
+            db.session.flush()
+            entries = []
+            for n in range(history_per_user):
+                kind = random.choice(['explain', 'mcq', 'mcq_score'])
+                topic = random.choice(TOPICS)
+                meta = None
+                if kind == 'mcq':
+                    meta = {'count': 5, 'format': 'json'}
+                elif kind == 'mcq_score':
+                    total = 5
+                    meta = {'score': random.randint(0, total), 'total': total, 'time_spent': random.randint(30, 600)}
+                entries.append(History(user_id=user.id, type=kind, topic=topic,
+                                       response=f'Seeded {kind} #{n} for {topic}. ' * 20, meta_data=meta))
+            save_entries(entries)
+    return usernames
+
+
+class InProcessDriver:
+    """Sends requests through Flask's test client (one client per thread)."""
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def request(self, method, path, body=None, token=None):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        response = client.open(path, method=method, json=body, headers=headers)
+        return response.status_code, response.get_json(silent=True)
+
+
+class HttpDriver:
+    """Sends requests to a running server over HTTP."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, method, path, body=None, token=None):
+        headers = {'Content-Type': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, headers=headers, method=method)
+        try:
+            with urllib.request.urlopen(req, timeout=120) as response:
+                status, payload = response.status, response.read()
+        except urllib.error.HTTPError as e:
+            status, payload = e.code, e.read()
+        try:
+            return status, json.loads(payload or b'null')
+        except ValueError:
+            return status, None
+
+
+def _login(driver, username):
+    status, data = driver.request('POST', '/api/auth/login', {'username': username, 'password': PASSWORD})
+    return data['token'] if status == 200 else None
+
+
+def _scenario(name, driver, username, token):
+    """Issue one request of the given kind; returns (endpoint label, status)."""
+    if name == 'explain':
+        body = {'topic': random.choice(TOPICS), 'language': 'English',
+                'size': random.choice(['Short', 'Medium', 'Long']), 'age': random.randint(8, 18)}
+        return 'POST /api/explain', driver.request('POST', '/api/explain', body, token)[0]
+    if name == 'mcq':
+        body = {'topic': random.choice(TOPICS), 'count': random.choice([5, 10])}
+        return 'POST /api/mcq', driver.request('POST', '/api/mcq', body, token)[0]
+    if name == 'history':
+        return 'GET /api/history', driver.request('GET', '/api/history?limit=20', token=token)[0]
+    if name == 'stats':
+        return 'GET /api/stats', driver.request('GET', '/api/stats', token=token)[0]
+    if name == 'login':
+        body = {'username': username, 'password': PASSWORD}
+        return 'POST /api/auth/login', driver.request('POST', '/api/auth/login', body)[0]
+    if name == 'signup':
+        body = {'username': f'load{random.getrandbits(48):x}', 'password': PASSWORD, 'age': 14}
+        return 'POST /api/auth/signup', driver.request('POST', '/api/auth/signup', body)[0]
+    raise ValueError(f'Unknown scenario {name}')
+
+
+def _parse_mix(mix):
+    names, weights = [], []
+    for part in mix.split(','):
+        name, _, weight = part.partition('=')
+        names.append(name.strip())
+        weights.append(float(weight or 1))
+    return names, weights
+
+
+def run(driver, usernames, clients, seconds, mix):
+    """Drive the mix from `clients` threads; returns ({endpoint: [(latency, status)]}, elapsed)."""
+    names, weights = _parse_mix(mix)
+    samples = {}
+    lock = threading.Lock()
+    deadline = [0.0]
+    # Everyone logs in first; the clock starts once the last client is ready
+    start_barrier = threading.Barrier(clients + 1, action=lambda: deadline.__setitem__(0, time.perf_counter() + seconds))
+
+    def client(n):
+        username = usernames[n % len(usernames)]
+        token = _login(driver, username)
+        local = {}
+        start_barrier.wait()
+        while time.perf_counter() < deadline[0]:
+            name = random.choices(names, weights)[0]
+            started = time.perf_counter()
+            try:
+                endpoint, status = _scenario(name, driver, username, token)
+            except Exception as e:
+                endpoint, status = name, f'{type(e).__name__}'
+            local.setdefault(endpoint, []).append((time.perf_counter() - started, status))
+        with lock:
+            for endpoint, values in local.items():
+                samples.setdefault(endpoint, []).extend(values)
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    for t in threads:
+        t.start()
+    start_barrier.wait()
+    started = time.perf_counter()
+    for t in threads:
+        t.join()
+    return samples, time.perf_counter() - started
+
+
+def _percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))]
+
+
+def summarize(samples, elapsed):
+    """Per-endpoint request count, error count, req/s and latency percentiles (ms)."""
+    rows = {}
+    for endpoint, values in sorted(samples.items()):
+        latencies = sorted(latency for latency, _ in values)
+        errors = {}
+        for _, status in values:
+            if not isinstance(status, int) or status >= 400:
+                errors[str(status)] = errors.get(str(status), 0) + 1
+        rows[endpoint] = {
+            'requests': len(values),
+            'errors': errors,
+            'rps': round(len(values) / elapsed, 1),
+            'p50_ms': round(_percentile(latencies, 0.50) * 1000, 1),
+            'p90_ms': round(_percentile(latencies, 0.90) * 1000, 1),
+            'p99_ms': round(_percentile(latencies, 0.99) * 1000, 1),
+            'max_ms': round(latencies[-1] * 1000, 1),
+        }
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--history', type=int, default=50, help='history rows seeded per user')
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=15)
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='comma-separated scenario=weight pairs')
+    parser.add_argument('--ai-latency', type=float, default=0.5, help='fake Gemini seconds per call')
+    parser.add_argument('--cache', default='memory', choices=['memory', 'sqlite', 'none'],
+                        help='AI response cache backend')
+    parser.add_argument('--bcrypt-rounds', type=int, default=4, help='bcrypt cost for seeded and new users')
+    parser.add_argument('--url', help='benchmark a running server instead of an in-process app')
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args()
+
+    _configure_env(args)
+    import logging
+    logging.disable(logging.WARNING)
+    from app import create_app
+    from migrations import init_db
+
+    app = create_app()
+    with app.app_context():
+        init_db()
+    print(f"database: {app.config['SQLALCHEMY_DATABASE_URI']}")
+    started = time.perf_counter()
+    usernames = seed(app, args.users, args.history)
+    print(f"seeded {args.users} users x {args.history} history rows in {time.perf_counter() - started:.1f}s")
+
+    driver = HttpDriver(args.url) if args.url else InProcessDriver(app)
+    samples, elapsed = run(driver, usernames, args.clients, args.seconds, args.mix)
+    rows = summarize(samples, elapsed)
+
+    target = args.url or 'in-process'
+    print(f"{target}, {args.clients} clients, {elapsed:.1f}s, fake AI latency {args.ai_latency}s")
+    print(f"{'endpoint':<24} {'reqs':>7} {'req/s':>8} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}  errors")
+    for endpoint, row in rows.items():
+        errors = ', '.join(f'{k}x{v}' for k, v in row['errors'].items()) or '-'
+        print(f"{endpoint:<24} {row['requests']:>7} {row['rps']:>8.1f} {row['p50_ms']:>8.1f} "
+              f"{row['p90_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['max_ms']:>8.1f}  {errors}")
+    total = sum(row['requests'] for row in rows.values())
+    print(f"{'total':<24} {total:>7} {total / elapsed:>8.1f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'target': target, 'clients': args.clients, 'seconds': round(elapsed, 2),
+                       'endpoints': rows}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
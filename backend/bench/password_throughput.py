@@ -0,0 +1,73 @@
+"""
+Password hashing benchmark — sustained logins/sec across hashing pool sizes.
+
+Runs `--clients` threads that each verify a password in a loop for
+`--seconds`, once per pool size, and prints throughput and latency. Pool
+size 0 means bcrypt runs on the calling (request) thread.
+
+Usage (from backend/):
+    python -m bench.password_throughput --rounds 12 --clients 16 --workers 0,1,2,4
+"""
+import argparse
+import os
+import statistics
+import threading
+import time
+from config import Config
+from services import passwords
+
+
+def run(workers, clients, seconds, hashed):
+    Config.PASSWORD_HASH_WORKERS = workers
+    if passwords._pool is not None:
+        passwords._pool.shutdown()
+        passwords._pool = None
+    passwords.verify_password('warm-up', hashed)  # start pool processes outside the timing
+
+    latencies = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def client():
+        local = []
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            passwords.verify_password('correct horse', hashed)
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    return len(latencies) / elapsed, statistics.median(latencies), p99
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rounds', type=int, default=Config.BCRYPT_ROUNDS)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--workers', default=f"0,1,2,{os.cpu_count() or 1}",
+                        help='comma-separated pool sizes to compare')
+    args = parser.parse_args()
+
+    Config.PASSWORD_HASH_WORKERS = 0
+    hashed = passwords.hash_password('correct horse', rounds=args.rounds)
+
+    print(f"bcrypt cost {args.rounds}, {args.clients} concurrent clients, {args.seconds}s per run")
+    print(f"{'workers':>8} {'logins/s':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    for workers in sorted({int(w) for w in args.workers.split(',')}):
+        rate, p50, p99 = run(workers, args.clients, args.seconds, hashed)
+        print(f"{workers:>8} {rate:>10.1f} {p50 * 1000:>8.1f} {p99 * 1000:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
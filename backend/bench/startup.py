@@ -0,0 +1,132 @@
+"""
+Startup benchmark — import time, app factory time and time to first request.
+
+Each trial is a fresh Python process (like a Gunicorn worker booting) that
+imports the app, calls create_app(), serves one history request and then
+one AI request through the test client, timing each step. The Gemini model
+is the fake one (GEMINI_FAKE) so the AI step measures the lazy client
+construction, not the network.
+
+Two profiles are compared:
+  - default      — the factory does no schema work ('flask init-db' ran at deploy)
+  - auto-init    — AUTO_INIT_DB=true, create_all + migrations on every boot
+
+With --check the run fails (exit 1) if the Gemini SDK was imported before
+the first AI call, or if the default profile's median time to first
+request exceeds --max-first-request-ms. The timing-free checks (no SDK
+import, no DDL in the factory) also run under pytest (tests/test_startup.py).
+
+Usage (from backend/):
+    python -m bench.startup --trials 7
+    python -m bench.startup --check --max-first-request-ms 1500
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Runs in the child process; prints one JSON line of timings
+CHILD = r'''
+import json, logging, sys, time
+started = time.perf_counter()
+logging.disable(logging.WARNING)
+import app as app_module
+imported = time.perf_counter()
+app = app_module.create_app()
+created = time.perf_counter()
+from flask_jwt_extended import create_access_token
+with app.app_context():
+    token = create_access_token(identity='1')
+client = app.test_client()
+headers = {'Authorization': f'Bearer {token}'}
+status = client.get('/api/history?limit=5', headers=headers).status_code
+first = time.perf_counter()
+sdk_before_ai = any(m.startswith('google.generativeai') for m in sys.modules)
+ai_status = client.post('/api/explain', json={'topic': 'Gravity'}, headers=headers).status_code
+first_ai = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'factory_ms': (created - imported) * 1000,
+    'first_request_ms': (first - started) * 1000,
+    'first_ai_ms': (first_ai - first) * 1000,
+    'status': status,
+    'ai_status': ai_status,
+    'sdk_before_ai': sdk_before_ai,
+}))
+'''
+
+PROFILES = {'default': {}, 'auto-init': {'AUTO_INIT_DB': 'true'}}
+METRICS = ('import_ms', 'factory_ms', 'first_request_ms', 'first_ai_ms', 'process_ms')
+
+
+def _prepare_database(env):
+    """Create the schema and one user once, as the deploy step would."""
+    code = (
+        'import logging; logging.disable(logging.WARNING)\n'
+        'from app import create_app\n'
+        'from migrations import init_db\n'
+        'from extensions import db\n'
+        'from models.user import User\n'
+        'app = create_app()\n'
+        'with app.app_context():\n'
+        '    init_db()\n'
+        '    db.session.add(User(username="startup-bench", password="x", age=14))\n'
+        '    db.session.commit()\n'
+    )
+    subprocess.run([sys.executable, '-c', code], env=env, check=True)
+
+
+def _trial(env):
+    started = time.perf_counter()
+    out = subprocess.run([sys.executable, '-c', CHILD], env=env, check=True, capture_output=True, text=True)
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    result['process_ms'] = (time.perf_counter() - started) * 1000
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--trials', type=int, default=5)
+    parser.add_argument('--check', action='store_true', help='exit non-zero on a regression')
+    parser.add_argument('--max-first-request-ms', type=float, default=2000)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'startup.db')
+    env['GEMINI_FAKE'] = 'true'
+    env['GEMINI_FAKE_LATENCY'] = '0'
+    env['HISTORY_WRITE_MODE'] = 'sync'
+    env['RATELIMIT_ENABLED'] = 'false'
+    _prepare_database(env)
+
+    medians = {}
+    failures = []
+    print(f"{'profile':<12}" + ''.join(f'{m:>18}' for m in METRICS))
+    for name, overrides in PROFILES.items():
+        results = [_trial({**env, **overrides}) for _ in range(args.trials)]
+        medians[name] = {m: statistics.median(r[m] for r in results) for m in METRICS}
+        print(f'{name:<12}' + ''.join(f'{medians[name][m]:>16.0f}ms' for m in METRICS))
+        for r in results:
+            if r['status'] != 200 or r['ai_status'] != 200:
+                failures.append(f'{name}: requests returned {r["status"]} / {r["ai_status"]}')
+            if r['sdk_before_ai']:
+                failures.append(f'{name}: Gemini SDK imported before the first AI call')
+
+    saved = medians['auto-init']['factory_ms'] - medians['default']['factory_ms']
+    print(f"schema work kept out of the factory: {saved:.0f}ms per worker boot")
+
+    if medians['default']['first_request_ms'] > args.max_first_request_ms:
+        failures.append(f"time to first request {medians['default']['first_request_ms']:.0f}ms "
+                        f"> {args.max_first_request_ms:.0f}ms")
+    for failure in sorted(set(failures)):
+        print(f'FAIL {failure}')
+    if args.check and failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
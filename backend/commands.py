@@ -0,0 +1,135 @@
+"""
+Flask CLI commands.
+
+flask --app app init-db             — create missing tables and apply pending migrations
+flask --app app migrate             — apply pending schema migrations
+flask --app app check-query-plans   — verify hot History queries use indexes (SQLite)
+flask --app app backfill-stats      — rebuild every user's UserStats rollup from history
+flask --app app rebuild-search-index — repopulate the history full-text index (SQLite)
+flask --app app compress-assets     — write .gz/.br variants of the built frontend files
+flask --app app token-report        — Gemini calls and tokens per prompt template, all users
+"""
+import click
+from sqlalchemy import select, func
+from extensions import db
+from migrations import run_migrations, init_db
+from models.history import History
+from services.history_store import backfill_user_stats, distinct_topics_count
+from services.history_search import create_search_index, rebuild_search_index
+from static_files import compress_assets
+from services.quota import template_totals
+
+
+def _hot_queries(user_id=1):
+    """The per-request History queries, as (name, statement) pairs."""
+    return [
+        ('history page', select(History.id, History.type, History.topic, History.created_at)
+            .where(History.user_id == user_id)
+            .order_by(History.created_at.desc(), History.id.desc())
+            .limit(21)),
+        ('stats distinct topics', distinct_topics_count(user_id)),
+        ('stats mcq count', select(func.count())
+            .select_from(History)
+            .where(History.user_id == user_id, History.type == 'mcq')),
+        ('stats scores', select(History.meta_data)
+            .where(History.user_id == user_id, History.type == 'mcq_score')),
+        ('stats session count', select(func.count())
+            .select_from(History)
+            .where(History.user_id == user_id)),
+        ('rollup topic check', select(func.count())
+            .select_from(History)
+            .where(History.user_id == user_id, History.type.in_(['explain', 'mcq']),
+                   History.topic == 'Photosynthesis')),
+        ('entry lookup', select(History)
+            .where(History.id == 1, History.user_id == user_id)),
+    ]
+
+
+def check_query_plans():
+    """
+    Run EXPLAIN QUERY PLAN on every hot query.
+
+    Returns:
+        list: (name, plan lines, problems) per query; problems is empty when the
+              query searches the history table through an index without a
+              temporary B-tree (for ORDER BY, DISTINCT or GROUP BY).
+    """
+    results = []
+    with db.engine.connect() as conn:
+        for name, stmt in _hot_queries():
+            sql = str(stmt.compile(conn, compile_kwargs={'literal_binds': True}))
+            plan = [row[-1] for row in conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {sql}')]
+            problems = [line for line in plan
+                        if (line.startswith('SCAN') and 'history' in line) or 'TEMP B-TREE' in line]
+            results.append((name, plan, problems))
+    return results
+
+
+def register_commands(app):
+    """Attach the CLI commands to the app."""
+
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Create missing tables and apply pending migrations."""
+        applied = init_db()
+        for version, description in applied:
+            click.echo(f"Applied {version}: {description}")
+        click.echo('Database is ready.')
+
+    @app.cli.command('migrate')
+    def migrate_command():
+        """Apply pending schema migrations."""
+        applied = run_migrations()
+        for version, description in applied:
+            click.echo(f"Applied {version}: {description}")
+        if not applied:
+            click.echo('Database is up to date.')
+
+    @app.cli.command('backfill-stats')
+    def backfill_stats_command():
+        """Rebuild every user's UserStats rollup from their history."""
+        count = backfill_user_stats()
+        click.echo(f"Rebuilt stats for {count} users.")
+
+    @app.cli.command('rebuild-search-index')
+    def rebuild_search_index_command():
+        """Recreate and repopulate the history full-text search index."""
+        with db.engine.begin() as conn:
+            if not create_search_index(conn):
+                raise click.ClickException('Full-text search is not supported on this database.')
+            count = rebuild_search_index(conn)
+        click.echo(f"Indexed {count} history entries.")
+
+    @app.cli.command('compress-assets')
+    def compress_assets_command():
+        """Precompress frontend/dist for serving (run after 'npm run build')."""
+        count, with_brotli = compress_assets(app.config['FRONTEND_DIST'])
+        encodings = 'gzip and brotli' if with_brotli else 'gzip (install brotli for .br)'
+        click.echo(f"Compressed {count} files with {encodings}.")
+
+    @app.cli.command('token-report')
+    def token_report_command():
+        """Print Gemini calls and tokens per prompt template (for tuning prompt sizes)."""
+        rows = template_totals()
+        if not rows:
+            click.echo('No Gemini usage recorded yet.')
+            return
+        click.echo(f"{'template':<20}{'calls':>8}{'prompt':>12}{'output':>12}{'prompt/call':>13}{'output/call':>13}")
+        for template, calls, prompt, output in rows:
+            click.echo(f"{template:<20}{calls:>8}{prompt:>12}{output:>12}"
+                       f"{prompt / calls:>13.0f}{output / calls:>13.0f}")
+
+    @app.cli.command('check-query-plans')
+    def check_query_plans_command():
+        """Fail if a hot History query would scan the table (SQLite only)."""
+        if db.engine.dialect.name != 'sqlite':
+            raise click.ClickException('EXPLAIN QUERY PLAN checks are only implemented for SQLite.')
+        failed = False
+        for name, plan, problems in check_query_plans():
+            status = 'FAIL' if problems else 'ok'
+            click.echo(f"[{status}] {name}")
+            for line in plan:
+                click.echo(f"    {line}")
+            failed = failed or bool(problems)
+        if failed:
+            raise click.ClickException('Some hot queries do not use an index.')
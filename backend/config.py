@@ -6,6 +6,8 @@ load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+basedir = os.path.abspath(os.path.dirname(__file__))
+
 class Config:
     DEBUG = os.environ.get('FLASK_DEBUG', 'false').lower() == 'true'
     # Flask
@@ -18,16 +20,134 @@ class Config:
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # SQLite engine profile — pragmas applied to every connection (see database.py)
+    SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_BUSY_TIMEOUT = int(os.getenv('SQLITE_BUSY_TIMEOUT', 15000))  # ms to wait for a write lock
+
+    # Postgres engine profile — connection pool per worker process
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', 30))  # seconds waiting for a connection
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))  # seconds before reconnecting
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true'
+
     # JWT — tokens expire after 7 days
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'change-this-jwt-secret')
     JWT_ACCESS_TOKEN_EXPIRES_MINUTES = 60 * 24 * 7  # 7 days in minutes
 
+    # /api/auth/me — served from token claims / an in-process cache without a DB read,
+    # unless AUTH_ME_FRESH is set (or the request passes ?fresh=true)
+    AUTH_ME_FRESH = os.getenv('AUTH_ME_FRESH', 'false').lower() == 'true'
+    USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', 300))  # seconds
+    USER_CACHE_MAX_ENTRIES = int(os.getenv('USER_CACHE_MAX_ENTRIES', 10000))
+
+    # Password hashing — bcrypt work factor (existing hashes are upgraded on login) and
+    # processes in each worker's hashing pool. 0 (default) hashes on the request thread:
+    # bcrypt releases the GIL, so threads already hash in parallel. 'auto' sizes the pool
+    # to CPU count // WEB_CONCURRENCY so all workers' pools together fit the cores.
+    BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', 12))
+    PASSWORD_HASH_WORKERS = (None if os.getenv('PASSWORD_HASH_WORKERS', '0').lower() == 'auto'
+                             else int(os.getenv('PASSWORD_HASH_WORKERS', 0)))
+
+    # Rate limiting — per user (per IP when anonymous). Counters must be shared by all workers
+    # for the limits to hold: with a SQLite database they default to a SQLite file in instance/
+    # (sqlite:///path, see services/rate_limit_store.py), otherwise use redis://localhost:6379
+    # (or any Redis-compatible server). memory:// keeps separate counters in every process.
+    RATELIMIT_STORAGE_URI = os.getenv('RATELIMIT_STORAGE_URI') or (
+        'sqlite:///' + os.path.join(basedir, 'instance', 'ratelimit.db')
+        if SQLALCHEMY_DATABASE_URI.startswith('sqlite') else 'memory://'
+    )
+    RATELIMIT_ENABLED = os.getenv('RATELIMIT_ENABLED', 'true').lower() == 'true'  # off only for load tests
+
+    # Metrics — Prometheus text at /metrics (per worker process). Scrapes must send
+    # 'Authorization: Bearer <METRICS_TOKEN>'; without a token /metrics is 404 (open only
+    # with FLASK_DEBUG). SERVER_TIMING adds per-phase timings
+    # (db, gemini, json) to every API response in a Server-Timing header.
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+    SERVER_TIMING = os.getenv('SERVER_TIMING', 'true').lower() == 'true'
+
+    # Schema setup — normally done once per deploy with 'flask init-db'; set AUTO_INIT_DB=true
+    # to have every app instance create tables and run migrations at startup instead
+    AUTO_INIT_DB = os.getenv('AUTO_INIT_DB', 'false').lower() == 'true'
+
+    # Frontend static files — browser cache lifetime (seconds) for files without a content
+    # hash in their name; hashed assets are cached for a year, index.html is always revalidated
+    STATIC_MAX_AGE = int(os.getenv('STATIC_MAX_AGE', 3600))
+
+    # History.response compression at rest (SQLite) — responses of at least MIN_BYTES are
+    # stored zlib-compressed; shorter ones stay plain text. Below ~512 bytes zlib saves little
+    # and every read still pays to decompress; explanations and quizzes are several KB, so
+    # they all clear it. Full-table reads get slower (see bench/history_storage.py), but
+    # only 'flask rebuild-search-index' and exports do those.
+    HISTORY_COMPRESSION = os.getenv('HISTORY_COMPRESSION', 'true').lower() == 'true'
+    HISTORY_COMPRESS_MIN_BYTES = int(os.getenv('HISTORY_COMPRESS_MIN_BYTES', 512))
+    HISTORY_COMPRESS_LEVEL = int(os.getenv('HISTORY_COMPRESS_LEVEL', 6))
+
+    # History logging for AI results — 'async' queues rows and commits them in batches on a
+    # background thread after the response is sent; 'sync' commits before responding
+    HISTORY_WRITE_MODE = os.getenv('HISTORY_WRITE_MODE', 'async').lower()
+    HISTORY_QUEUE_SIZE = int(os.getenv('HISTORY_QUEUE_SIZE', 1000))  # queued requests before writing inline
+    HISTORY_BATCH_SIZE = int(os.getenv('HISTORY_BATCH_SIZE', 100))  # rows per transaction
+    HISTORY_FLUSH_INTERVAL = float(os.getenv('HISTORY_FLUSH_INTERVAL', 0.5))  # seconds
+
+    # Daily AI budget per user (UTC days, tracked in the database; 0 = unlimited)
+    AI_DAILY_REQUEST_LIMIT = int(os.getenv('AI_DAILY_REQUEST_LIMIT', 100))
+    AI_DAILY_TOKEN_LIMIT = int(os.getenv('AI_DAILY_TOKEN_LIMIT', 200000))
+
     # Gemini API
     GEMINI_API_KEY = os.getenv('GEMINI_API_KEY', '')
+    GEMINI_MODEL = os.getenv('GEMINI_MODEL', 'models/gemini-2.5-flash')
+    GEMINI_REQUEST_TIMEOUT = int(os.getenv('GEMINI_REQUEST_TIMEOUT', 30))  # seconds per attempt
+
+    # Gemini client — retries with exponential backoff + jitter (honoring 429 retry hints)
+    # within GEMINI_RETRY_BUDGET seconds, and a circuit breaker that fails fast for
+    # GEMINI_BREAKER_COOLDOWN seconds after GEMINI_BREAKER_THRESHOLD consecutive failures
+    GEMINI_MAX_RETRIES = int(os.getenv('GEMINI_MAX_RETRIES', 2))
+    GEMINI_BACKOFF_BASE = float(os.getenv('GEMINI_BACKOFF_BASE', 1.0))  # seconds
+    GEMINI_BACKOFF_MAX = float(os.getenv('GEMINI_BACKOFF_MAX', 20.0))  # seconds
+    GEMINI_RETRY_BUDGET = float(os.getenv('GEMINI_RETRY_BUDGET', 30.0))  # seconds
+    GEMINI_BREAKER_THRESHOLD = int(os.getenv('GEMINI_BREAKER_THRESHOLD', 5))
+    GEMINI_BREAKER_COOLDOWN = int(os.getenv('GEMINI_BREAKER_COOLDOWN', 30))  # seconds
+
+    # Fake Gemini model for offline development and load tests (no API key needed)
+    GEMINI_FAKE = os.getenv('GEMINI_FAKE', 'false').lower() == 'true'
+    GEMINI_FAKE_LATENCY = float(os.getenv('GEMINI_FAKE_LATENCY', 0.5))  # seconds per call
+    GEMINI_FAKE_429_RATIO = float(os.getenv('GEMINI_FAKE_429_RATIO', 0.0))  # share of calls throttled
+    GEMINI_FAKE_MAX_CONCURRENCY = int(os.getenv('GEMINI_FAKE_MAX_CONCURRENCY', 0))  # 0 = no cap
+
+    # AI response cache — 'memory' (per worker), 'sqlite' (shared across workers) or 'none'
+    AI_CACHE_BACKEND = os.getenv('AI_CACHE_BACKEND', 'memory').lower()
+    AI_CACHE_TTL = int(os.getenv('AI_CACHE_TTL', 60 * 60 * 24))  # seconds
+    AI_CACHE_MAX_ENTRIES = int(os.getenv('AI_CACHE_MAX_ENTRIES', 5000))
+    AI_CACHE_PATH = os.getenv('AI_CACHE_PATH', os.path.join(basedir, 'instance', 'ai_cache.db'))
+
+    # AI dispatcher — concurrent Gemini calls per process and how many may queue behind them.
+    # Requests beyond that get 503 + Retry-After instead of holding a worker thread.
+    AI_MAX_CONCURRENCY = int(os.getenv('AI_MAX_CONCURRENCY', 4))
+    AI_MAX_QUEUE = int(os.getenv('AI_MAX_QUEUE', 8))
+    AI_QUEUE_TIMEOUT = int(os.getenv('AI_QUEUE_TIMEOUT', 10))  # seconds waiting for a slot
+    AI_CALL_TIMEOUT = int(os.getenv('AI_CALL_TIMEOUT', 75))  # seconds for a call incl. retry
+    AI_RETRY_AFTER = int(os.getenv('AI_RETRY_AFTER', 5))  # Retry-After header on 503
+
+    # MCQ generation — extra attempts when Gemini returns malformed or short output
+    MCQ_PARSE_RETRIES = int(os.getenv('MCQ_PARSE_RETRIES', 2))
+
+    # MCQ question bank — quizzes are sampled from stored questions; Gemini tops the
+    # bank up when it holds fewer than count * VARIETY questions newer than MAX_AGE_DAYS
+    MCQ_BANK_ENABLED = os.getenv('MCQ_BANK_ENABLED', 'true').lower() == 'true'
+    MCQ_BANK_VARIETY = int(os.getenv('MCQ_BANK_VARIETY', 2))
+    MCQ_BANK_MAX_AGE_DAYS = int(os.getenv('MCQ_BANK_MAX_AGE_DAYS', 30))
+
+    # Batch MCQ generation — topics are packed into prompts up to this output budget
+    MCQ_BATCH_MAX_OUTPUT_TOKENS = int(os.getenv('MCQ_BATCH_MAX_OUTPUT_TOKENS', 6000))
+    MCQ_TOKENS_PER_QUESTION = int(os.getenv('MCQ_TOKENS_PER_QUESTION', 120))  # rough estimate
+    MCQ_BATCH_PARALLELISM = int(os.getenv('MCQ_BATCH_PARALLELISM', 3))  # prompts in flight per batch
 
 
 # --- Startup warnings ---
-if not Config.GEMINI_API_KEY:
+if not Config.GEMINI_API_KEY and not Config.GEMINI_FAKE:
     logger.warning("⚠️  GEMINI_API_KEY is not set! AI features will not work.")
 
 if Config.SECRET_KEY == 'change-this-in-production':
@@ -35,3 +155,9 @@ if Config.SECRET_KEY == 'change-this-in-production':
 
 if Config.JWT_SECRET_KEY == 'change-this-jwt-secret':
     logger.warning("⚠️  JWT_SECRET_KEY is using the default value. Change it for production!")
+
+# Gunicorn and most PaaS hosts read the worker count from WEB_CONCURRENCY
+if (Config.RATELIMIT_ENABLED and Config.RATELIMIT_STORAGE_URI.startswith('memory://')
+        and int(os.getenv('WEB_CONCURRENCY', 1)) > 1):
+    logger.warning("⚠️  RATELIMIT_STORAGE_URI is memory:// with several workers; each worker keeps its own "
+                   "counters, so rate limits are multiplied by the worker count. Use sqlite:// or redis://.")
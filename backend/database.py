@@ -0,0 +1,61 @@
+"""
+Database engine profiles.
+
+SQLite (the default) runs in WAL mode so readers never block the writer,
+waits SQLITE_BUSY_TIMEOUT ms for a lock instead of failing with "database
+is locked", and uses synchronous=NORMAL (durable across application
+crashes; only a power loss can drop the last few commits). Postgres gets a
+sized connection pool with pre-ping and recycling so idle connections
+dropped by the server or a proxy are replaced transparently.
+
+Provides:
+  - normalize_uri(uri) — accept Heroku-style postgres:// URLs
+  - engine_options(uri) — SQLALCHEMY_ENGINE_OPTIONS for the URI's backend
+  - configure_engine(engine) — apply per-connection SQLite pragmas
+"""
+import logging
+from sqlalchemy import event
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_uri(uri):
+    """SQLAlchemy only accepts the postgresql:// scheme."""
+    if uri.startswith('postgres://'):
+        return 'postgresql://' + uri[len('postgres://'):]
+    return uri
+
+
+def _is_sqlite(uri):
+    return uri.startswith('sqlite')
+
+
+def engine_options(uri):
+    """Engine keyword arguments for the database at uri, from Config."""
+    if _is_sqlite(uri):
+        # sqlite3's own lock wait, in seconds; busy_timeout below covers the same for pragmas
+        return {'connect_args': {'timeout': Config.SQLITE_BUSY_TIMEOUT / 1000}}
+    return {
+        'pool_size': Config.DB_POOL_SIZE,
+        'max_overflow': Config.DB_MAX_OVERFLOW,
+        'pool_timeout': Config.DB_POOL_TIMEOUT,
+        'pool_recycle': Config.DB_POOL_RECYCLE,
+        'pool_pre_ping': Config.DB_POOL_PRE_PING,
+    }
+
+
+def configure_engine(engine):
+    """Register the on-connect SQLite pragmas (no-op for other backends)."""
+    if engine.dialect.name != 'sqlite':
+        return
+    in_memory = engine.url.database in (None, '', ':memory:')
+
+    @event.listens_for(engine, 'connect')
+    def _set_sqlite_pragmas(dbapi_conn, connection_record):
+        cursor = dbapi_conn.cursor()
+        if not in_memory:
+            cursor.execute(f'PRAGMA journal_mode={Config.SQLITE_JOURNAL_MODE}')
+        cursor.execute(f'PRAGMA busy_timeout={int(Config.SQLITE_BUSY_TIMEOUT)}')
+        cursor.execute(f'PRAGMA synchronous={Config.SQLITE_SYNCHRONOUS}')
+        cursor.close()
@@ -1,8 +1,25 @@
 from flask_sqlalchemy import SQLAlchemy
-from flask_jwt_extended import JWTManager
+from flask_jwt_extended import JWTManager, verify_jwt_in_request, get_jwt_identity
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
+# Registers the sqlite:// rate-limit storage scheme
+import services.rate_limit_store  # noqa: F401
+
+
+def rate_limit_key():
+    """
+    Rate-limit authenticated requests per user and anonymous ones per client IP,
+    so a whole school behind one NAT address doesn't share a single bucket.
+    """
+    try:
+        verify_jwt_in_request(optional=True)
+        identity = get_jwt_identity()
+    except Exception:
+        identity = None
+    return f"user:{identity}" if identity else get_remote_address()
+
 
 db = SQLAlchemy()
 jwt = JWTManager()
-limiter = Limiter(key_func=get_remote_address)
\ No newline at end of file
+# Storage comes from RATELIMIT_STORAGE_URI (see Config) so limits are shared across workers
+limiter = Limiter(key_func=rate_limit_key)
@@ -0,0 +1,164 @@
+"""
+Lightweight schema migrations.
+
+db.create_all() only creates missing tables; it never changes a table that
+already exists, so indexes and columns added to models don't reach existing
+learning_platform.db files. Each migration here runs once per database, in
+version order, and is recorded in the schema_migrations table.
+
+Provides:
+  - migration(version, description) — decorator registering a migration step
+  - run_migrations() — apply pending migrations (needs an app context)
+  - init_db() — create missing tables, then apply pending migrations
+  - applied_migrations() — versions already applied to the current database
+"""
+import logging
+from datetime import datetime
+from sqlalchemy import text, inspect
+from extensions import db
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS = []
+
+
+def migration(version, description):
+    """Register fn(connection) as migration `version`. Versions must be unique and increasing."""
+    def decorator(fn):
+        MIGRATIONS.append((version, description, fn))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return fn
+    return decorator
+
+
+def _ensure_version_table(conn):
+    conn.execute(text(
+        'CREATE TABLE IF NOT EXISTS schema_migrations ('
+        ' version INTEGER PRIMARY KEY,'
+        ' description VARCHAR(200) NOT NULL,'
+        ' applied_at TIMESTAMP NOT NULL)'
+    ))
+
+
+def applied_migrations():
+    """Return the set of migration versions already applied."""
+    with db.engine.begin() as conn:
+        _ensure_version_table(conn)
+        return {row[0] for row in conn.execute(text('SELECT version FROM schema_migrations'))}
+
+
+def run_migrations():
+    """
+    Apply every pending migration, each in its own transaction.
+
+    Returns:
+        list: (version, description) of the migrations that were applied
+    """
+    done = applied_migrations()
+    applied = []
+    for version, description, fn in MIGRATIONS:
+        if version in done:
+            continue
+        logger.info(f"Applying migration {version}: {description}")
+        with db.engine.begin() as conn:
+            fn(conn)
+            conn.execute(
+                text('INSERT INTO schema_migrations (version, description, applied_at) VALUES (:v, :d, :t)'),
+                {'v': version, 'd': description, 't': datetime.utcnow()}
+            )
+        applied.append((version, description))
+    return applied
+
+
+def init_db():
+    """
+    Bring the database schema up to date: create missing tables, then apply
+    pending migrations. Run once per deploy ('flask init-db'), not per worker.
+
+    Returns:
+        list: (version, description) of the migrations that were applied
+    """
+    # Models register their tables on import
+    import models.user, models.history, models.user_stats, models.ai_usage, models.question_bank  # noqa: F401
+    db.create_all()
+    return run_migrations()
+
+
+def _create_index(conn, table, name):
+    """Create a model-declared index if the database doesn't have it yet."""
+    index = next(i for i in table.indexes if i.name == name)
+    index.create(bind=conn, checkfirst=True)
+
+
+@migration(1, 'Add history indexes on (user_id, created_at) and (user_id, type, topic)')
+def _history_indexes(conn):
+    from models.history import History
+    _create_index(conn, History.__table__, 'ix_history_user_created')
+    _create_index(conn, History.__table__, 'ix_history_user_type_topic')
+
+
+@migration(2, 'Create user_stats rollup table')
+def _user_stats_rollup(conn):
+    # Rows are built from history on each user's first stats access,
+    # or all at once with `flask backfill-stats`.
+    from models.user_stats import UserStats
+    UserStats.__table__.create(bind=conn, checkfirst=True)
+
+
+@migration(3, 'Create bank_question table for the MCQ question bank')
+def _question_bank(conn):
+    from models.question_bank import BankQuestion
+    BankQuestion.__table__.create(bind=conn, checkfirst=True)
+
+
+@migration(4, 'Create ai_usage table for per-user daily AI budgets')
+def _ai_usage(conn):
+    from models.ai_usage import AIUsage
+    AIUsage.__table__.create(bind=conn, checkfirst=True)
+
+
+@migration(5, 'Create full-text search index over history topics and responses')
+def _history_search(conn):
+    from services.history_search import create_search_index, rebuild_search_index
+    if create_search_index(conn):
+        indexed = rebuild_search_index(conn)
+        logger.info(f"Indexed {indexed} history entries for search")
+
+
+@migration(6, 'Compress long history responses (SQLite)')
+def _compress_history(conn):
+    # Rewriting a row through the model's column type compresses it; rows
+    # are processed in id batches so large databases don't need one huge
+    # statement. Postgres compresses large values itself (TOAST).
+    from config import Config
+    from models.history import History
+    if conn.dialect.name != 'sqlite' or not Config.HISTORY_COMPRESSION:
+        return
+    table = History.__table__
+    last_id, compressed = 0, 0
+    while True:
+        rows = conn.execute(text(
+            "SELECT id, response FROM history "
+            "WHERE id > :last AND typeof(response) = 'text' AND length(CAST(response AS BLOB)) >= :min "
+            "ORDER BY id LIMIT 500"
+        ), {'last': last_id, 'min': Config.HISTORY_COMPRESS_MIN_BYTES}).all()
+        if not rows:
+            break
+        for row in rows:
+            conn.execute(table.update().where(table.c.id == row.id).values(response=row.response))
+        last_id, compressed = rows[-1].id, compressed + len(rows)
+    logger.info(f"Compressed {compressed} history responses")
+
+
+@migration(7, 'Add user_stats.history_version')
+def _history_version(conn):
+    # Backs the ETags on /api/history and /api/stats; existing rows start at 0
+    columns = {c['name'] for c in inspect(conn).get_columns('user_stats')}
+    if 'history_version' not in columns:
+        conn.execute(text('ALTER TABLE user_stats ADD COLUMN history_version INTEGER NOT NULL DEFAULT 0'))
+
+
+@migration(8, 'Create ai_template_usage table for per-template token totals')
+def _ai_template_usage(conn):
+    from models.ai_usage import AITemplateUsage
+    AITemplateUsage.__table__.create(bind=conn, checkfirst=True)
@@ -0,0 +1,45 @@
+"""
+AIUsage model — per-user, per-day counters of AI requests and tokens.
+
+Backs the daily AI budget enforced by services/quota.py. One row per
+(user, UTC day); rows are updated with atomic increments so concurrent
+workers never lose counts.
+
+AITemplateUsage — all-time Gemini calls and tokens per (user, prompt
+template), for tuning prompts against their real cost.
+"""
+from extensions import db
+
+
+class AIUsage(db.Model):
+    __tablename__ = 'ai_usage'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    requests = db.Column(db.Integer, nullable=False, default=0)
+    tokens = db.Column(db.Integer, nullable=False, default=0)
+
+    def to_dict(self):
+        return {
+            'day': self.day.isoformat(),
+            'requests': self.requests,
+            'tokens': self.tokens
+        }
+
+
+class AITemplateUsage(db.Model):
+    __tablename__ = 'ai_template_usage'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    template = db.Column(db.String(100), primary_key=True)  # e.g. 'explain/Short', 'mcq'
+    calls = db.Column(db.Integer, nullable=False, default=0)
+    prompt_tokens = db.Column(db.Integer, nullable=False, default=0)
+    output_tokens = db.Column(db.Integer, nullable=False, default=0)
+
+    def to_dict(self):
+        return {
+            'template': self.template,
+            'calls': self.calls,
+            'prompt_tokens': self.prompt_tokens,
+            'output_tokens': self.output_tokens
+        }
@@ -6,21 +6,37 @@ the AI-generated response, and a timestamp.
 """
 from extensions import db
 from datetime import datetime
+from models.types import CompressedText
 
 
 class History(db.Model):
     __tablename__ = 'history'
+    __table_args__ = (
+        # Per-user listing, newest first (history page, keyset pagination)
+        db.Index('ix_history_user_created', 'user_id', 'created_at'),
+        # Per-user filters by type, and distinct topic counts (stats)
+        db.Index('ix_history_user_type_topic', 'user_id', 'type', 'topic'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     type = db.Column(db.String(20), nullable=False)  # 'explain' or 'mcq'
     topic = db.Column(db.String(500), nullable=False)
-    response = db.Column(db.Text, nullable=False)
+    response = db.Column(CompressedText, nullable=False)  # zlib-compressed at rest when long (SQLite)
     meta_data = db.Column(db.JSON, nullable=True) # For saving scores, options, etc.
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     user = db.relationship('User', backref=db.backref('history', lazy=True))
 
+    def to_summary_dict(self):
+        """Lightweight projection for list views — omits response and metadata."""
+        return {
+            'id': self.id,
+            'type': self.type,
+            'topic': self.topic,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
     def to_dict(self):
         return {
             'id': self.id,
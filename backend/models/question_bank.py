@@ -0,0 +1,34 @@
+"""
+BankQuestion model — de-duplicated pool of generated MCQs per topic.
+
+Questions produced by Gemini are stored under a normalized topic key so
+later quizzes on the same topic can be sampled locally instead of
+regenerated. The fingerprint (hash of the normalized question text) keeps
+the same question from being stored twice for a topic.
+"""
+from extensions import db
+from datetime import datetime
+
+
+class BankQuestion(db.Model):
+    __tablename__ = 'bank_question'
+    __table_args__ = (
+        db.UniqueConstraint('topic_key', 'fingerprint', name='uq_bank_question_topic_fingerprint'),
+        db.Index('ix_bank_question_topic_created', 'topic_key', 'created_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    topic_key = db.Column(db.String(80), nullable=False)
+    topic = db.Column(db.String(500), nullable=False)  # topic as first requested, for display
+    question = db.Column(db.Text, nullable=False)
+    options = db.Column(db.JSON, nullable=False)  # 4 option texts
+    answer = db.Column(db.String(1), nullable=False)  # 'a'-'d'
+    fingerprint = db.Column(db.String(64), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'question': self.question,
+            'options': self.options,
+            'answer': self.answer
+        }
@@ -0,0 +1,60 @@
+"""
+Custom column types.
+
+CompressedText stores long text zlib-compressed behind a one-byte format
+header and hands plain str back to the application:
+
+    b'\\x00' + utf-8 bytes      — stored uncompressed
+    b'\\x01' + zlib stream      — zlib-compressed utf-8
+
+Values shorter than HISTORY_COMPRESS_MIN_BYTES stay plain TEXT, as do rows
+written before compression existed, and both read back unchanged. This only
+applies on SQLite: Postgres already compresses large text values itself
+(TOAST), and its full-text index needs the column to stay readable text.
+"""
+import zlib
+from sqlalchemy.types import TypeDecorator, Text
+from config import Config
+
+RAW = b'\x00'
+ZLIB = b'\x01'
+
+
+def compress_text(value, min_bytes, level=6):
+    """Encode value for storage: str if short, else header byte + payload."""
+    data = value.encode('utf-8')
+    if len(data) < min_bytes:
+        return value
+    packed = zlib.compress(data, level)
+    # Incompressible text is kept raw rather than paying the zlib overhead
+    if len(packed) >= len(data):
+        return RAW + data
+    return ZLIB + packed
+
+
+def decompress_text(value):
+    """Inverse of compress_text; str values (short or legacy rows) pass through."""
+    if value is None or isinstance(value, str):
+        return value
+    value = bytes(value)
+    header, payload = value[:1], value[1:]
+    if header == ZLIB:
+        return zlib.decompress(payload).decode('utf-8')
+    if header == RAW:
+        return payload.decode('utf-8')
+    raise ValueError(f'Unknown compressed text format {header!r}')
+
+
+class CompressedText(TypeDecorator):
+    """Text column compressed at rest on SQLite (see module docstring)."""
+
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None or dialect.name != 'sqlite' or not Config.HISTORY_COMPRESSION:
+            return value
+        return compress_text(value, Config.HISTORY_COMPRESS_MIN_BYTES, Config.HISTORY_COMPRESS_LEVEL)
+
+    def process_result_value(self, value, dialect):
+        return decompress_text(value)
@@ -1,6 +1,8 @@
 from extensions import db
 from datetime import datetime
-import bcrypt
+from sqlalchemy import event
+from services.passwords import hash_password, verify_password, needs_rehash
+from services import user_cache
 
 class User(db.Model):
     __tablename__ = 'user'
@@ -12,11 +14,14 @@ class User(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     def set_password(self, plain_password):
-        salt = bcrypt.gensalt()
-        self.password = bcrypt.hashpw(plain_password.encode('utf-8'), salt).decode('utf-8')
+        self.password = hash_password(plain_password)
 
     def check_password(self, plain_password):
-        return bcrypt.checkpw(plain_password.encode('utf-8'), self.password.encode('utf-8'))
+        return verify_password(plain_password, self.password)
+
+    def password_needs_rehash(self):
+        """True if the stored hash was made with a different BCRYPT_ROUNDS."""
+        return needs_rehash(self.password)
 
     def to_dict(self):
         return {
@@ -24,4 +29,21 @@ class User(db.Model):
             'username': self.username,
             'age': self.age,
             'created_at': self.created_at.isoformat() if self.created_at else None
-        }
\ No newline at end of file
+        }
+
+
+@event.listens_for(User, 'after_update')
+def _refresh_cached_profile(mapper, connection, target):
+    """
+    Keep this worker's /api/auth/me cache in step with profile changes.
+
+    The new profile is cached rather than just dropped, because /me would
+    otherwise fall back to the (now outdated) claims in the caller's token.
+    """
+    user_cache.put(target.to_dict())
+
+
+@event.listens_for(User, 'after_delete')
+def _drop_cached_profile(mapper, connection, target):
+    """A deleted account must not keep answering /api/auth/me from this worker's cache."""
+    user_cache.invalidate(target.id)
@@ -0,0 +1,44 @@
+"""
+UserStats model — per-user rollup of History, maintained incrementally.
+
+One row per user, updated in the same transaction as every History insert or
+delete (see services/history_store.py), so /api/stats is a primary-key lookup
+instead of a scan of the user's history. history_version goes up with every
+change to the user's history and backs the ETags on /api/history and /api/stats.
+"""
+from extensions import db
+from datetime import datetime
+
+
+class UserStats(db.Model):
+    __tablename__ = 'user_stats'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    topics_learned = db.Column(db.Integer, nullable=False, default=0)  # distinct explain/mcq topics
+    mcq_count = db.Column(db.Integer, nullable=False, default=0)  # MCQ sessions generated
+    correct_answers = db.Column(db.Integer, nullable=False, default=0)  # sum of saved scores
+    total_answers = db.Column(db.Integer, nullable=False, default=0)  # sum of saved totals
+    session_count = db.Column(db.Integer, nullable=False, default=0)  # all history entries
+    history_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # bumped on every change
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        accuracy = 0
+        if self.total_answers > 0:
+            accuracy = round((self.correct_answers / self.total_answers) * 100)
+
+        # Total history entries as a proxy for time spent — 1 entry ≈ 3 minutes
+        time_minutes = self.session_count * 3
+        if time_minutes >= 60:
+            hours = time_minutes // 60
+            mins = time_minutes % 60
+            time_spent = f"{hours}h {mins}m" if mins > 0 else f"{hours}h"
+        else:
+            time_spent = f"{time_minutes}m" if time_minutes > 0 else "0m"
+
+        return {
+            'time_spent': time_spent,
+            'topics_learned': self.topics_learned,
+            'questions_solved': self.mcq_count,
+            'accuracy': accuracy
+        }
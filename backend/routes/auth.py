@@ -3,14 +3,28 @@ Auth routes — handles user signup and login.
 
 POST /api/auth/signup — Create a new user account
 POST /api/auth/login  — Authenticate and receive JWT token
+GET  /api/auth/me     — Current user profile (from token claims unless ?fresh=true)
 """
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity, get_jwt
 from models.user import User
 from extensions import db
+from config import Config
+from services import user_cache
 
 auth_bp = Blueprint('auth', __name__)
 
+PROFILE_CLAIMS = ('username', 'age', 'created_at')
+
+
+def _issue_token(user):
+    """Access token carrying the profile fields /me needs, so it can skip the DB."""
+    profile = user.to_dict()
+    return create_access_token(
+        identity=str(user.id),
+        additional_claims={name: profile[name] for name in PROFILE_CLAIMS}
+    )
+
 
 @auth_bp.route('/signup', methods=['POST'])
 def signup():
@@ -47,7 +61,7 @@ def signup():
     db.session.add(user)
     db.session.commit()
 
-    token = create_access_token(identity=str(user.id))
+    token = _issue_token(user)
     return jsonify({'token': token, 'user': user.to_dict()}), 201
 
 
@@ -58,6 +72,7 @@ def login():
 
     Expects JSON: { username: str, password: str }
     Returns: { token: str, user: dict } with 200 on success, 401 on failure.
+    Re-hashes the password when BCRYPT_ROUNDS has changed since it was stored.
     """
     data = request.get_json()
 
@@ -72,7 +87,11 @@ def login():
     if not user or not user.check_password(password):
         return jsonify({'error': 'Invalid username or password'}), 401
 
-    token = create_access_token(identity=str(user.id))
+    if user.password_needs_rehash():
+        user.set_password(password)
+        db.session.commit()
+
+    token = _issue_token(user)
     return jsonify({'token': token, 'user': user.to_dict()}), 200
 
 @auth_bp.route('/me', methods=['GET'])
@@ -80,9 +99,26 @@ def login():
 def me():
     """
     Get the currently authenticated user based on the JWT token.
+
+    Served without a DB round trip from this worker's user cache or, failing
+    that, the profile claims embedded in the token. Pass ?fresh=true (or set
+    AUTH_ME_FRESH) to always read the database; tokens issued before claims
+    were added also fall back to a DB read.
     """
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user_id = int(get_jwt_identity())
+    fresh = Config.AUTH_ME_FRESH or request.args.get('fresh', 'false').lower() == 'true'
+
+    if not fresh:
+        profile = user_cache.get(user_id)
+        if profile is not None:
+            return jsonify(profile), 200
+        claims = get_jwt()
+        if all(name in claims for name in PROFILE_CLAIMS):
+            return jsonify({'id': user_id, **{name: claims[name] for name in PROFILE_CLAIMS}}), 200
+
+    user = db.session.get(User, user_id)
     if not user:
         return jsonify({'error': 'User not found'}), 404
-    return jsonify(user.to_dict()), 200
\ No newline at end of file
+    profile = user.to_dict()
+    user_cache.put(profile)
+    return jsonify(profile), 200
\ No newline at end of file
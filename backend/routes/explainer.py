@@ -4,63 +4,175 @@ Explainer route — generates AI-powered topic explanations.
 POST /api/explain (JWT protected)
 Accepts: topic, language, size, age
 Returns: { explanation: str }
+
+POST /api/explain/stream (JWT protected)
+Accepts: topic, language, size, age
+Returns: text/event-stream of 'chunk' events ({ text }) followed by a
+         'done' event ({ id } — null while the history row is still queued)
+         or an 'error' event ({ error, status })
 """
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from services.gemini import explain_topic, RateLimitError, InvalidRequestError
+from services.gemini import (
+    explain_topic, stream_explanation, RateLimitError, InvalidRequestError, ServiceBusyError
+)
 from models.history import History
-from extensions import db, limiter
+from services.history_writer import log_entry
+from services.quota import consume_requests, record_usage, QuotaExceededError
+from services.prompts import TokenUsage
+from extensions import limiter
+from services import metrics
+import json
+import logging
 import re
 
+logger = logging.getLogger(__name__)
+
 explainer_bp = Blueprint('explainer', __name__)
 
+VALID_LANGUAGES = ['English', 'Spanish', 'Marathi', 'Hindi', 'French', 'German', 'Chinese', 'Japanese', 'Arabic']
+VALID_SIZES = ['Short', 'Medium', 'Long']
 
-@explainer_bp.route('/explain', methods=['POST'])
-@jwt_required()
-@limiter.limit("10 per minute")
-def explain():
-    """
-    Generate an AI explanation for a given topic.
 
-    Input sanitization: strips HTML tags, limits topic to 500 chars.
-    Validates: language (English/Hindi/Spanish/Marathi/French/German/Chinese/Japanese/Arabic),
-               size (Short/Medium/Long).
-    Saves result to history after successful generation.
-    Error handling: 429 for rate limits, 400 for invalid requests, 500 for other errors.
+def _parse_explain_request(data):
     """
-    data = request.get_json()
+    Validate and sanitize an explain request body.
 
+    Returns:
+        tuple: (params dict, None) on success, or (None, error response tuple)
+    """
     topic = data.get('topic', '').strip()
     language = data.get('language', 'English')
     size = data.get('size', 'Medium')
     age = data.get('age', 16)
 
     if not topic:
-        return jsonify({'error': 'Topic is required'}), 400
+        return None, (jsonify({'error': 'Topic is required'}), 400)
 
     # Input sanitization — limit length and strip HTML/script tags
     topic = re.sub(r'<[^>]+>', '', topic)[:500]
 
-    valid_languages = ['English', 'Spanish', 'Marathi', 'Hindi', 'French', 'German', 'Chinese', 'Japanese', 'Arabic']
-    if language not in valid_languages:
-        return jsonify({'error': 'Invalid language selected'}), 400
+    if language not in VALID_LANGUAGES:
+        return None, (jsonify({'error': 'Invalid language selected'}), 400)
+
+    if size not in VALID_SIZES:
+        return None, (jsonify({'error': 'Invalid size selected'}), 400)
+
+    return {'topic': topic, 'language': language, 'size': size, 'age': age}, None
+
+
+@explainer_bp.route('/explain', methods=['POST'])
+@jwt_required()
+@limiter.limit("10 per minute")
+def explain():
+    """
+    Generate an AI explanation for a given topic.
+
+    Input sanitization: strips HTML tags, limits topic to 500 chars.
+    Validates: language (English/Hindi/Spanish/Marathi/French/German/Chinese/Japanese/Arabic),
+               size (Short/Medium/Long).
+    Logs the result to history (in the background unless HISTORY_WRITE_MODE=sync),
+    with the Gemini token usage in meta_data.
+    Counts against the user's daily AI budget.
+    Error handling: 429 for rate limits or an exhausted daily budget, 400 for invalid requests,
+                    503 + Retry-After when the AI queue is full, 500 for other errors.
+    """
+    params, error = _parse_explain_request(request.get_json())
+    if error:
+        return error
 
-    if size not in ['Short', 'Medium', 'Long']:
-        return jsonify({'error': 'Invalid size selected'}), 400
+    user_id = int(get_jwt_identity())
+    usage = TokenUsage('explain', params['size'])
 
     try:
-        result = explain_topic(topic, language, size, age)
+        consume_requests(user_id)
+        result = explain_topic(**params, usage=usage)
+        record_usage(user_id, usage)
 
         # Save to history
-        user_id = int(get_jwt_identity())
-        entry = History(user_id=user_id, type='explain', topic=topic, response=result)
-        db.session.add(entry)
-        db.session.commit()
+        log_entry(History(user_id=user_id, type='explain', topic=params['topic'], response=result,
+                          meta_data={'usage': usage.to_dict()}))
 
         return jsonify({'explanation': result}), 200
+    except QuotaExceededError as e:
+        return jsonify({'error': str(e), 'code': 'quota_exceeded'}), 429, {'Retry-After': str(e.retry_after)}
+    except ServiceBusyError as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': str(e.retry_after)}
+    except RateLimitError as e:
+        return jsonify({'error': str(e)}), 429
+    except InvalidRequestError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': 'Something went wrong. Please try again.'}), 500
+
+
+def _sse(event, data):
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@explainer_bp.route('/explain/stream', methods=['POST'])
+@jwt_required()
+@limiter.limit("10 per minute")
+def explain_stream():
+    """
+    Stream an AI explanation as Server-Sent Events.
+
+    Same validation as /explain. The first chunk is awaited before the
+    response starts, so errors up to that point (including 503 when the AI
+    queue is full) are returned as regular JSON responses; later errors are
+    sent as an 'error' event because the 200 status has already gone out.
+    The assembled explanation is logged to history once the stream completes.
+    """
+    params, error = _parse_explain_request(request.get_json())
+    if error:
+        return error
+
+    user_id = int(get_jwt_identity())
+    usage = TokenUsage('explain', params['size'])
+    stream = stream_explanation(**params, usage=usage)
+
+    try:
+        consume_requests(user_id)
+        with metrics.timed('gemini'):
+            first = next(stream, '')
+    except QuotaExceededError as e:
+        return jsonify({'error': str(e), 'code': 'quota_exceeded'}), 429, {'Retry-After': str(e.retry_after)}
+    except ServiceBusyError as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': str(e.retry_after)}
     except RateLimitError as e:
         return jsonify({'error': str(e)}), 429
     except InvalidRequestError as e:
         return jsonify({'error': str(e)}), 400
     except Exception as e:
-        return jsonify({'error': 'Something went wrong. Please try again.'}), 500
\ No newline at end of file
+        return jsonify({'error': 'Something went wrong. Please try again.'}), 500
+
+    def generate():
+        chunks = [first]
+        yield _sse('chunk', {'text': first})
+        try:
+            for chunk in stream:
+                chunks.append(chunk)
+                yield _sse('chunk', {'text': chunk})
+        except RateLimitError as e:
+            yield _sse('error', {'error': str(e), 'status': 429})
+            return
+        except InvalidRequestError as e:
+            yield _sse('error', {'error': str(e), 'status': 400})
+            return
+        except Exception as e:
+            logger.error(f"Explanation stream failed: {e}")
+            yield _sse('error', {'error': 'Something went wrong. Please try again.', 'status': 500})
+            return
+
+        result = ''.join(chunks)
+        record_usage(user_id, usage)
+        entry = log_entry(History(user_id=user_id, type='explain', topic=params['topic'], response=result,
+                                  meta_data={'usage': usage.to_dict()}))
+        yield _sse('done', {'id': entry.id})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
@@ -1,26 +1,224 @@
 """
 History route — retrieves and deletes user's interaction history.
 
-GET  /api/history        — get all history for current user (JWT protected)
+GET  /api/history        — page through history for current user (JWT protected)
+                           Query: limit (1-100, default 20), cursor (from next_cursor),
+                                  full=true to include response and metadata
+                           Returns: { history: [...], next_cursor: str|null }
+                           Weak ETag; If-None-Match → 304 while the history is unchanged
+GET  /api/history/search — full-text search of the current user's history (JWT protected)
+                           Query: q, limit (1-100, default 20), cursor (from next_cursor)
+                           Returns: { results: [{ id, type, topic, created_at, snippet }],
+                                      next_cursor: str|null } — best matches first; matched
+                                      terms in snippet are wrapped in <mark></mark>
+GET  /api/history/export — download the whole history (JWT protected)
+                           Query: format=ndjson (default) or csv; streamed oldest first
+GET  /api/history/:id    — get one full history entry (JWT protected)
+DELETE /api/history      — delete many entries at once (JWT protected)
+                           Body: { ids?: [int], type?: str, topic?: str,
+                                   before?: iso date, after?: iso date (UTC unless an offset is given) }
+                                 — entries matching every given filter — or { all: true }
+                           Returns: { deleted: int }
 DELETE /api/history/:id  — delete a specific history entry (JWT protected)
-GET  /api/stats          — get user statistics (JWT protected)
 """
-from flask import Blueprint, jsonify
+from flask import Blueprint, Response, jsonify, request, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from extensions import limiter
 from models.history import History
-from extensions import db
-from sqlalchemy import func
+from services.history_store import delete_entry, delete_entries, iter_entries
+from services.history_writer import flush_pending
+from services.history_search import search_history
+from services.conditional import history_etag, not_modified, tag
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import defer
+from datetime import datetime, timezone
+import base64
+import csv
+import io
+import json
 
 history_bp = Blueprint('history', __name__)
 
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+MAX_BULK_IDS = 1000
+ENTRY_TYPES = ('explain', 'mcq', 'mcq_score')
+EXPORT_FIELDS = ('id', 'type', 'topic', 'created_at', 'response', 'meta_data')
+
+
+def _encode_cursor(entry):
+    """Opaque keyset cursor pointing just past entry in (created_at, id) order."""
+    raw = f"{entry.created_at.isoformat()}|{entry.id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def _decode_cursor(cursor):
+    """Inverse of _encode_cursor. Raises ValueError on malformed input."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        created_at, entry_id = raw.split('|')
+        return datetime.fromisoformat(created_at), int(entry_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
 
 @history_bp.route('/history', methods=['GET'])
 @jwt_required()
 def get_history():
-    """Get all history entries for the current user, newest first."""
+    """
+    Get a page of history entries for the current user, newest first.
+
+    Uses keyset pagination on (created_at, id), so every page costs the same
+    no matter how deep into the history it is. Entries are returned as
+    summaries unless full=true is passed. Tagged with the user's history
+    version, so an unchanged page is answered with a 304 before any query runs.
+    """
+    user_id = int(get_jwt_identity())
+
+    try:
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+        if limit < 1 or limit > MAX_PAGE_SIZE:
+            raise ValueError
+    except (ValueError, TypeError):
+        return jsonify({'error': f'Limit must be between 1 and {MAX_PAGE_SIZE}'}), 400
+
+    full = request.args.get('full', 'false').lower() == 'true'
+    cursor = request.args.get('cursor')
+
+    etag = history_etag(user_id, limit, full, cursor)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    query = History.query.filter(History.user_id == user_id)
+    if not full:
+        query = query.options(defer(History.response), defer(History.meta_data))
+
+    if cursor:
+        try:
+            created_at, entry_id = _decode_cursor(cursor)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        query = query.filter(or_(
+            History.created_at < created_at,
+            and_(History.created_at == created_at, History.id < entry_id)
+        ))
+
+    entries = query.order_by(History.created_at.desc(), History.id.desc()).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(entries) > limit:
+        entries = entries[:limit]
+        next_cursor = _encode_cursor(entries[-1])
+
+    serialize = History.to_dict if full else History.to_summary_dict
+    return tag((jsonify({'history': [serialize(e) for e in entries], 'next_cursor': next_cursor}), 200), etag)
+
+
+@history_bp.route('/history/search', methods=['GET'])
+@jwt_required()
+def search():
+    """
+    Search the current user's history topics and responses.
+
+    Ranked by relevance, so pages are addressed by position; the cursor is
+    the offset of the next page.
+    """
     user_id = int(get_jwt_identity())
-    entries = History.query.filter_by(user_id=user_id).order_by(History.created_at.desc()).all()
-    return jsonify({'history': [e.to_dict() for e in entries]}), 200
+
+    try:
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+        if limit < 1 or limit > MAX_PAGE_SIZE:
+            raise ValueError
+    except (ValueError, TypeError):
+        return jsonify({'error': f'Limit must be between 1 and {MAX_PAGE_SIZE}'}), 400
+
+    try:
+        offset = int(request.args.get('cursor') or 0)
+        if offset < 0:
+            raise ValueError
+    except (ValueError, TypeError):
+        return jsonify({'error': 'Invalid cursor'}), 400
+
+    query = request.args.get('q', '')[:200]
+    try:
+        results, has_more = search_history(user_id, query, limit=limit, offset=offset)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    next_cursor = str(offset + limit) if has_more else None
+    return jsonify({'results': results, 'next_cursor': next_cursor}), 200
+
+
+def _export_record(row):
+    return {
+        'id': row.id,
+        'type': row.type,
+        'topic': row.topic,
+        'created_at': row.created_at.isoformat() if row.created_at else None,
+        'response': row.response,
+        'meta_data': row.meta_data,
+    }
+
+
+def _ndjson(rows):
+    for row in rows:
+        yield json.dumps(_export_record(row), ensure_ascii=False) + '\n'
+
+
+def _csv(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+    writer.writeheader()
+    for row in rows:
+        record = _export_record(row)
+        record['meta_data'] = json.dumps(record['meta_data']) if record['meta_data'] is not None else ''
+        writer.writerow(record)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+@history_bp.route('/history/export', methods=['GET'])
+@jwt_required()
+@limiter.limit("10 per hour")
+def export_history():
+    """
+    Stream the current user's full history as NDJSON or CSV, oldest first.
+
+    Rows are read through a server-side cursor and written out as they
+    arrive, so memory use doesn't grow with the size of the history.
+    """
+    user_id = int(get_jwt_identity())
+    fmt = request.args.get('format', 'ndjson').lower()
+    if fmt not in ('ndjson', 'csv'):
+        return jsonify({'error': 'Format must be ndjson or csv'}), 400
+
+    # Include entries logged a moment ago that are still queued
+    flush_pending()
+    rows = iter_entries(user_id)
+    body, mimetype = (_ndjson(rows), 'application/x-ndjson') if fmt == 'ndjson' else (_csv(rows), 'text/csv')
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={
+            'Content-Disposition': f'attachment; filename="history.{fmt}"',
+            'Cache-Control': 'no-store',
+        }
+    )
+
+
+@history_bp.route('/history/<int:entry_id>', methods=['GET'])
+@jwt_required()
+def get_history_entry(entry_id):
+    """Get a single history entry with its full response (only if owned by current user)."""
+    user_id = int(get_jwt_identity())
+    entry = History.query.filter_by(id=entry_id, user_id=user_id).first()
+
+    if not entry:
+        return jsonify({'error': 'Entry not found'}), 404
+
+    return jsonify(entry.to_dict()), 200
 
 
 @history_bp.route('/history/<int:entry_id>', methods=['DELETE'])
@@ -33,9 +231,58 @@ def delete_history(entry_id):
     if not entry:
         return jsonify({'error': 'Entry not found'}), 404
 
-    db.session.delete(entry)
-    db.session.commit()
+    delete_entry(entry)
     return jsonify({'message': 'Deleted'}), 200
 
 
+def _parse_date(value, name):
+    """ISO date/datetime as naive UTC, like History.created_at; naive input is taken as UTC."""
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (ValueError, TypeError):
+        raise ValueError(f'{name} must be an ISO date or datetime')
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+@history_bp.route('/history', methods=['DELETE'])
+@jwt_required()
+def bulk_delete_history():
+    """
+    Delete many of the current user's entries in one set-based operation.
+
+    Entries must match every filter given; an empty filter set is rejected
+    unless all=true is passed, so a malformed request can't clear the history.
+    """
+    user_id = int(get_jwt_identity())
+    data = request.get_json(silent=True) or {}
+
+    ids = data.get('ids')
+    type_ = data.get('type')
+    topic = data.get('topic')
+    try:
+        if ids is not None:
+            if not isinstance(ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+                raise ValueError('ids must be a list of integers')
+            if len(ids) > MAX_BULK_IDS:
+                raise ValueError(f'At most {MAX_BULK_IDS} ids per request')
+        if type_ is not None and type_ not in ENTRY_TYPES:
+            raise ValueError(f"type must be one of {', '.join(ENTRY_TYPES)}")
+        if topic is not None and (not isinstance(topic, str) or not topic):
+            raise ValueError('topic must be a non-empty string')
+        before = _parse_date(data['before'], 'before') if data.get('before') else None
+        after = _parse_date(data['after'], 'after') if data.get('after') else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    filters = (ids, type_, topic, before, after)
+    if all(f is None for f in filters) and data.get('all') is not True:
+        return jsonify({'error': 'Give ids, type, topic, before or after, or all=true to clear everything'}), 400
+    if ids == []:
+        return jsonify({'deleted': 0}), 200
 
+    # Entries still queued by the history writer would otherwise survive the delete
+    flush_pending()
+    deleted = delete_entries(user_id, ids=ids, type_=type_, topic=topic, before=before, after=after)
+    return jsonify({'deleted': deleted}), 200
@@ -3,7 +3,11 @@ MCQ route — generates AI-powered multiple choice questions.
 
 POST /api/mcq (JWT protected)
 Accepts: topic, count
-Returns: { mcq: str } (raw Q&A text, parsed by frontend)
+Returns: { questions: [{ question: str, options: [4 x str], answer: 'a'-'d' }] }
+
+POST /api/mcq/batch (JWT protected)
+Accepts: topics: [str | { topic, count }], count (default for plain-string topics)
+Returns: { sets: [{ topic: str, questions: [...] }] }
 
 POST /api/mcq/score (JWT protected)
 Accepts: topic, score, total
@@ -11,13 +15,30 @@ Returns: { message: str }
 """
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from services.gemini import generate_mcq, RateLimitError, InvalidRequestError
+from services.gemini import RateLimitError, InvalidRequestError, ServiceBusyError, MalformedOutputError
+from services.gemini import generate_mcq_batch
+from services.question_bank import get_quiz, add_questions
+from services.mcq import dumps
 from models.history import History
-from extensions import db, limiter
+from services.history_store import save_entry
+from services.history_writer import log_entry, log_entries
+from services.quota import consume_requests, record_usage, QuotaExceededError
+from services.prompts import TokenUsage
+from config import Config
+from extensions import limiter
 import re
 
 mcq_bp = Blueprint('mcq', __name__)
 
+MAX_BATCH_TOPICS = 10
+MAX_BATCH_TOPIC_COUNT = 50
+MAX_BATCH_TOTAL = 100
+
+
+def _sanitize_topic(topic):
+    """Input sanitization — limit length and strip HTML/script tags."""
+    return re.sub(r'<[^>]+>', '', topic)[:500]
+
 
 @mcq_bp.route('/mcq', methods=['POST'])
 @jwt_required()
@@ -28,8 +49,14 @@ def mcq():
 
     Input sanitization: strips HTML tags, limits topic to 500 chars.
     Validates: count must be integer between 1 and 30.
-    Saves result to history after successful generation.
-    Error handling: 429 for rate limits, 400 for invalid requests, 500 for other errors.
+    Questions are sampled from the per-topic question bank, which is topped
+    up from Gemini when it runs short (see services/question_bank.py).
+    Logs the structured questions to history after successful generation,
+    with the Gemini token usage (none when served from the bank) in meta_data.
+    Counts against the user's daily AI budget.
+    Error handling: 429 for rate limits or an exhausted daily budget, 400 for invalid requests,
+                    502 when Gemini keeps returning malformed questions,
+                    503 + Retry-After when the AI queue is full, 500 for other errors.
     """
     data = request.get_json()
 
@@ -39,8 +66,7 @@ def mcq():
     if not topic:
         return jsonify({'error': 'Topic is required'}), 400
 
-    # Input sanitization — limit length and strip HTML/script tags
-    topic = re.sub(r'<[^>]+>', '', topic)[:500]
+    topic = _sanitize_topic(topic)
 
     ALLOWED_COUNTS = [5, 10, 15, 20]
     try:
@@ -50,26 +76,124 @@ def mcq():
     except (ValueError, TypeError):
         return jsonify({'error': 'Count must be one of: 5, 10, 15, 20.'}), 400
 
+    user_id = int(get_jwt_identity())
+    usage = TokenUsage('mcq')
+
     try:
-        result = generate_mcq(topic, count)
+        consume_requests(user_id)
+        questions = get_quiz(topic, count, usage=usage)
+        response = dumps(questions)
+        record_usage(user_id, usage)
 
-        # Save to history
-        user_id = int(get_jwt_identity())
-        entry = History(
+        # Log to history (written in the background unless HISTORY_WRITE_MODE=sync)
+        log_entry(History(
             user_id=user_id, 
             type='mcq', 
             topic=topic, 
-            response=result,
-            meta_data={'count': count}
-        )
-        db.session.add(entry)
-        db.session.commit()
+            response=response,
+            meta_data={'count': count, 'format': 'json', 'usage': usage.to_dict()}
+        ))
+
+        return jsonify({'questions': questions}), 200
+    except QuotaExceededError as e:
+        return jsonify({'error': str(e), 'code': 'quota_exceeded'}), 429, {'Retry-After': str(e.retry_after)}
+    except ServiceBusyError as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': str(e.retry_after)}
+    except RateLimitError as e:
+        return jsonify({'error': str(e)}), 429
+    except InvalidRequestError as e:
+        return jsonify({'error': str(e)}), 400
+    except MalformedOutputError as e:
+        return jsonify({'error': str(e)}), 502
+    except Exception as e:
+        return jsonify({'error': 'Failed to generate MCQs. Please try again.'}), 500
+
+
+@mcq_bp.route('/mcq/batch', methods=['POST'])
+@jwt_required()
+@limiter.limit("5 per minute")
+def mcq_batch():
+    """
+    Generate MCQs for several topics in one request.
+
+    Validates: 1-10 topics, 1-50 questions per topic, at most 100 in total.
+    Topics are packed into as few Gemini prompts as the token budget allows
+    and generated concurrently. All resulting history rows are logged
+    together (one transaction); questions are also added to the question bank.
+    Each row's meta_data carries its share (by question count) of the batch's tokens.
+    Each topic counts as one request against the user's daily AI budget.
+    Error handling: same as /mcq.
+    """
+    data = request.get_json()
+    topics = data.get('topics')
+    default_count = data.get('count', 5)
+
+    if not isinstance(topics, list) or not topics:
+        return jsonify({'error': 'Topics must be a non-empty list'}), 400
+    if len(topics) > MAX_BATCH_TOPICS:
+        return jsonify({'error': f'At most {MAX_BATCH_TOPICS} topics per batch'}), 400
+
+    requests = []
+    for item in topics:
+        if isinstance(item, dict):
+            topic, count = item.get('topic', ''), item.get('count', default_count)
+        else:
+            topic, count = item, default_count
+
+        topic = _sanitize_topic(str(topic).strip())
+        if not topic:
+            return jsonify({'error': 'Every topic must be non-empty'}), 400
+        try:
+            count = int(count)
+            if count < 1 or count > MAX_BATCH_TOPIC_COUNT:
+                raise ValueError
+        except (ValueError, TypeError):
+            return jsonify({'error': f'Count must be between 1 and {MAX_BATCH_TOPIC_COUNT} per topic.'}), 400
+        requests.append((topic, count))
+
+    if sum(count for _, count in requests) > MAX_BATCH_TOTAL:
+        return jsonify({'error': f'At most {MAX_BATCH_TOTAL} questions per batch'}), 400
+
+    user_id = int(get_jwt_identity())
+    usage = TokenUsage('mcq_batch')
+
+    try:
+        consume_requests(user_id, len(requests))
+        results = generate_mcq_batch(requests, usage=usage)
+        responses = [dumps(questions) for questions in results]
+        record_usage(user_id, usage)
+        total_questions = sum(count for _, count in requests)
+
+        if Config.MCQ_BANK_ENABLED:
+            for (topic, _), questions in zip(requests, results):
+                add_questions(topic, questions)
+
+        log_entries([
+            History(
+                user_id=user_id,
+                type='mcq',
+                topic=topic,
+                response=response,
+                meta_data={'count': count, 'format': 'json', 'batch': True,
+                           'usage': usage.to_dict(share=count / total_questions)}
+            )
+            for (topic, count), response in zip(requests, responses)
+        ])
 
-        return jsonify({'mcq': result}), 200
+        return jsonify({'sets': [
+            {'topic': topic, 'questions': questions}
+            for (topic, _), questions in zip(requests, results)
+        ]}), 200
+    except QuotaExceededError as e:
+        return jsonify({'error': str(e), 'code': 'quota_exceeded'}), 429, {'Retry-After': str(e.retry_after)}
+    except ServiceBusyError as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': str(e.retry_after)}
     except RateLimitError as e:
         return jsonify({'error': str(e)}), 429
     except InvalidRequestError as e:
         return jsonify({'error': str(e)}), 400
+    except MalformedOutputError as e:
+        return jsonify({'error': str(e)}), 502
     except Exception as e:
         return jsonify({'error': 'Failed to generate MCQs. Please try again.'}), 500
 
@@ -94,7 +218,6 @@ def save_score():
         response=f"Scored {score}/{total}",
         meta_data={'score': score, 'total': total}
     )
-    db.session.add(entry)
-    db.session.commit()
+    save_entry(entry)
     
     return jsonify({'message': 'Score saved'}), 200
\ No newline at end of file
@@ -0,0 +1,27 @@
+"""
+Metrics route — exposes this worker's metrics for Prometheus.
+
+GET /metrics
+Returns: Prometheus text exposition format. Requires
+         'Authorization: Bearer <METRICS_TOKEN>'. Without METRICS_TOKEN the
+         endpoint is 404, except when the app runs in debug mode.
+"""
+import hmac
+from flask import Blueprint, Response, request, jsonify, abort, current_app
+from config import Config
+from services.metrics import REGISTRY
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Render request, database, Gemini and AI cache metrics."""
+    # Traffic, quota and breaker state are not public: no token, no endpoint
+    if not Config.METRICS_TOKEN and not current_app.debug:
+        abort(404)
+    if Config.METRICS_TOKEN:
+        supplied = request.headers.get('Authorization', '').removeprefix('Bearer ')
+        if not hmac.compare_digest(supplied, Config.METRICS_TOKEN):
+            return jsonify({'error': 'Unauthorized'}), 401
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
@@ -1,61 +1,43 @@
 from flask import Blueprint, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models.history import History
-from extensions import db
-from sqlalchemy import func, distinct
+from services.history_store import get_user_stats
+from services.conditional import history_etag, not_modified, tag
+from services.quota import get_usage, get_template_usage
+from config import Config
 
 stats_bp = Blueprint('stats', __name__)
 
 @stats_bp.route('/api/stats', methods=['GET'])
 @jwt_required()
 def get_stats():
-    """Return learning analytics for the current user."""
-    user_id = get_jwt_identity()
-    
-    # Count distinct topics ever explained or quizzed
-    topics_learned = db.session.query(func.count(distinct(History.topic)))\
-        .filter(History.user_id == user_id, History.type.in_(['explain', 'mcq']))\
-        .scalar() or 0
-    
-    # Count MCQ sessions
-    questions_solved = History.query\
-        .filter_by(user_id=user_id, type='mcq')\
-        .count()
-    
-    # Calculate accuracy from meta_data JSON field where type is 'mcq_score'
-    mcq_sessions_with_score = History.query\
-        .filter_by(user_id=user_id, type='mcq_score')\
-        .all()
-    
-    accuracy = 0
-    if mcq_sessions_with_score:
-        total_correct = 0
-        total_questions = 0
-        for session in mcq_sessions_with_score:
-            if session.meta_data:
-                try:
-                    score = int(session.meta_data.get('score', 0))
-                    total = int(session.meta_data.get('total', 0))
-                    total_correct += score
-                    total_questions += total
-                except (ValueError, TypeError):
-                    pass
-        if total_questions > 0:
-            accuracy = round((total_correct / total_questions) * 100)
-    
-    # Count total history entries (as a proxy for time spent — 1 entry ≈ 3 minutes)
-    total_sessions = History.query.filter_by(user_id=user_id).count()
-    time_minutes = total_sessions * 3
-    if time_minutes >= 60:
-        hours = time_minutes // 60
-        mins = time_minutes % 60
-        time_spent = f"{hours}h {mins}m" if mins > 0 else f"{hours}h"
-    else:
-        time_spent = f"{time_minutes}m" if time_minutes > 0 else "0m"
-    
+    """
+    Return learning analytics for the current user.
+
+    Served from the UserStats rollup, which is kept up to date on every
+    history write, so this is a single primary-key lookup. Tagged with the
+    user's history version; a matching If-None-Match gets a 304.
+    """
+    user_id = int(get_jwt_identity())
+    etag = history_etag(user_id, 'stats')
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+    return tag((jsonify(get_user_stats(user_id).to_dict()), 200), etag)
+
+
+@stats_bp.route('/api/stats/usage', methods=['GET'])
+@jwt_required()
+def get_ai_usage():
+    """
+    Return today's AI usage for the current user alongside the daily limits
+    (0 = unlimited), plus all-time Gemini calls and tokens per prompt template.
+    """
+    user_id = int(get_jwt_identity())
+    usage = get_usage(user_id)
     return jsonify({
-        'time_spent': time_spent,
-        'topics_learned': topics_learned,
-        'questions_solved': questions_solved,
-        'accuracy': accuracy
+        'requests': usage.requests if usage else 0,
+        'tokens': usage.tokens if usage else 0,
+        'request_limit': Config.AI_DAILY_REQUEST_LIMIT,
+        'token_limit': Config.AI_DAILY_TOKEN_LIMIT,
+        'templates': [row.to_dict() for row in get_template_usage(user_id)]
     }), 200
@@ -0,0 +1,281 @@
+"""
+AI response cache — content-addressed store for generated Gemini output.
+
+Keys are derived from the *normalized* request (topic, language, size, age band)
+or (topic, count), so "Photosynthesis" and "  photosynthesis " for a 13 and a
+14 year old share one entry.
+
+Provides:
+  - make_key(kind, *parts) — build a content-addressed cache key
+  - age_band(age) — collapse an age into the band used for keying
+  - MemoryCache — in-process TTL + LRU cache (per worker)
+  - SQLiteCache — on-disk TTL + LRU cache shared across Gunicorn workers
+  - NullCache — disables caching
+  - get_cache() — the process-wide cache configured from Config
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (inclusive) of each age band — explanations are written for a
+# band of readers rather than an exact birthday.
+AGE_BANDS = [(7, '0-7'), (10, '8-10'), (13, '11-13'), (16, '14-16'), (18, '17-18')]
+
+
+def age_band(age):
+    """Map an age to its band label ('adult' above 18, 'unknown' if not a number)."""
+    try:
+        age = int(age)
+    except (TypeError, ValueError):
+        return 'unknown'
+    for upper, label in AGE_BANDS:
+        if age <= upper:
+            return label
+    return 'adult'
+
+
+def _normalize(value):
+    if isinstance(value, str):
+        return ' '.join(value.split()).lower()
+    return value
+
+
+def make_key(kind, *parts):
+    """
+    Build a content-addressed key for a generation request.
+
+    Args:
+        kind: Request kind, e.g. 'explain' or 'mcq'
+        *parts: Request fields; strings are whitespace-collapsed and lowercased
+
+    Returns:
+        str: '<kind>:<sha256 of the normalized fields>'
+    """
+    payload = json.dumps([_normalize(p) for p in parts], ensure_ascii=False)
+    return f"{kind}:{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+
+class _Counters:
+    """Hit/miss/eviction counters shared by all backends."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.sets = 0
+        self.evictions = 0
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def as_dict(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'sets': self.sets,
+            'evictions': self.evictions,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class NullCache:
+    """Cache backend that never stores anything."""
+
+    backend = 'none'
+
+    def __init__(self):
+        self.counters = _Counters()
+
+    def get(self, key):
+        self.counters.incr('misses')
+        return None
+
+    def set(self, key, value):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def clear(self):
+        pass
+
+    def stats(self):
+        return {'backend': self.backend, 'entries': 0, **self.counters.as_dict()}
+
+
+class MemoryCache:
+    """
+    In-process cache with per-entry TTL and LRU eviction.
+
+    Each Gunicorn worker holds its own copy; use SQLiteCache to share entries.
+    """
+
+    backend = 'memory'
+
+    def __init__(self, ttl=86400, max_entries=1000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.counters = _Counters()
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                value, expires_at = item
+                if expires_at > time.time():
+                    self._data.move_to_end(key)
+                    self.counters.incr('hits')
+                    return value
+                del self._data[key]
+        self.counters.incr('misses')
+        return None
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.time() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.counters.incr('evictions')
+        self.counters.incr('sets')
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        return {'backend': self.backend, 'entries': len(self._data), **self.counters.as_dict()}
+
+
+class SQLiteCache:
+    """
+    Disk-backed cache with TTL and LRU eviction, shared by every process that
+    points at the same file. Connections are per-thread; the file runs in WAL
+    mode so readers never block the writer.
+    """
+
+    backend = 'sqlite'
+
+    def __init__(self, path, ttl=86400, max_entries=10000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.counters = _Counters()
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS ai_cache ('
+            ' key TEXT PRIMARY KEY,'
+            ' value TEXT NOT NULL,'
+            ' expires_at REAL NOT NULL,'
+            ' accessed_at REAL NOT NULL)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS ix_ai_cache_accessed_at ON ai_cache (accessed_at)')
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        now = time.time()
+        try:
+            conn = self._conn()
+            row = conn.execute(
+                'SELECT value, expires_at FROM ai_cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is not None and row[1] > now:
+                conn.execute('UPDATE ai_cache SET accessed_at = ? WHERE key = ?', (now, key))
+                self.counters.incr('hits')
+                return row[0]
+        except sqlite3.Error as e:
+            logger.warning(f"AI cache read failed: {e}")
+        self.counters.incr('misses')
+        return None
+
+    def set(self, key, value):
+        now = time.time()
+        try:
+            conn = self._conn()
+            conn.execute(
+                'INSERT OR REPLACE INTO ai_cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)',
+                (key, value, now + self.ttl, now)
+            )
+            self.counters.incr('sets')
+            self._evict(conn, now)
+        except sqlite3.Error as e:
+            logger.warning(f"AI cache write failed: {e}")
+
+    def _evict(self, conn, now):
+        expired = conn.execute('DELETE FROM ai_cache WHERE expires_at <= ?', (now,)).rowcount
+        overflow = conn.execute('SELECT COUNT(*) FROM ai_cache').fetchone()[0] - self.max_entries
+        evicted = 0
+        if overflow > 0:
+            evicted = conn.execute(
+                'DELETE FROM ai_cache WHERE key IN '
+                '(SELECT key FROM ai_cache ORDER BY accessed_at ASC LIMIT ?)', (overflow,)
+            ).rowcount
+        if expired or evicted:
+            self.counters.incr('evictions', expired + evicted)
+
+    def delete(self, key):
+        self._conn().execute('DELETE FROM ai_cache WHERE key = ?', (key,))
+
+    def clear(self):
+        self._conn().execute('DELETE FROM ai_cache')
+
+    def stats(self):
+        try:
+            entries = self._conn().execute('SELECT COUNT(*) FROM ai_cache').fetchone()[0]
+        except sqlite3.Error:
+            entries = None
+        return {'backend': self.backend, 'entries': entries, **self.counters.as_dict()}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def build_cache(config=Config):
+    """Construct the cache backend selected by config.AI_CACHE_BACKEND."""
+    backend = config.AI_CACHE_BACKEND
+    if backend == 'memory':
+        return MemoryCache(ttl=config.AI_CACHE_TTL, max_entries=config.AI_CACHE_MAX_ENTRIES)
+    if backend == 'sqlite':
+        return SQLiteCache(config.AI_CACHE_PATH, ttl=config.AI_CACHE_TTL,
+                           max_entries=config.AI_CACHE_MAX_ENTRIES)
+    if backend != 'none':
+        logger.warning(f"Unknown AI_CACHE_BACKEND '{backend}', caching disabled.")
+    return NullCache()
+
+
+def get_cache():
+    """Return the process-wide cache, building it on first use."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = build_cache()
+    return _cache
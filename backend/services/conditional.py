@@ -0,0 +1,48 @@
+"""
+Conditional GET helpers — weak ETags derived from a user's history version.
+
+Responses built purely from a user's history (the history list, stats)
+are tagged with the history version from the UserStats rollup. A client
+that sends the tag back in If-None-Match gets a 304 without the route
+running its queries or serializing anything.
+
+Provides:
+  - history_etag(user_id, *parts) — weak ETag for a history-derived response
+  - not_modified(etag) — the 304 response if the request's If-None-Match matches, else None
+  - tag(response, etag) — attach the ETag and revalidation headers to a response
+"""
+import hashlib
+from flask import request, make_response
+from services.history_store import history_version
+
+
+def history_etag(user_id, *parts):
+    """
+    Weak ETag for a response derived from user_id's history.
+
+    Args:
+        user_id: Owner of the history
+        parts: Anything else the response depends on (e.g. query arguments)
+    """
+    key = f"{user_id}:{history_version(user_id)}:" + '|'.join(str(p) for p in parts)
+    return hashlib.blake2b(key.encode('utf-8'), digest_size=10).hexdigest()
+
+
+def _headers(response, etag):
+    response.set_etag(etag, weak=True)
+    # Per-user data: browsers may keep it but must revalidate, shared caches must not store it
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.vary.add('Authorization')
+    return response
+
+
+def not_modified(etag):
+    """A 304 for etag if the client already has it, otherwise None."""
+    if request.if_none_match.contains_weak(etag):
+        return _headers(make_response('', 304), etag)
+    return None
+
+
+def tag(response, etag):
+    """Attach etag to a (response, status) tuple or response and return the response."""
+    return _headers(make_response(response), etag)
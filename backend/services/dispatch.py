@@ -0,0 +1,147 @@
+"""
+AI call dispatcher — runs Gemini requests on a bounded thread pool.
+
+At most AI_MAX_CONCURRENCY upstream calls run at once and at most
+AI_MAX_QUEUE more may wait for a slot. Anything beyond that is rejected
+immediately with ServiceBusyError (mapped to 503 + Retry-After by the routes)
+instead of tying up another request thread for the length of a generation.
+Keep AI_MAX_CONCURRENCY + AI_MAX_QUEUE below the server's worker thread count
+so non-AI endpoints such as /api/auth/me always have a thread available.
+
+Provides:
+  - ServiceBusyError — raised when the AI queue is full or a call waits too long
+  - AIDispatcher — bounded executor with admission control
+  - get_dispatcher() — the process-wide dispatcher configured from Config
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceBusyError(Exception):
+    """Raised when the AI dispatcher cannot accept or finish a call in time."""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AIDispatcher:
+    """Bounded thread pool for AI calls with queue-depth backpressure."""
+
+    def __init__(self, max_concurrency=4, max_queue=8, queue_timeout=10, call_timeout=75, retry_after=5):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.call_timeout = call_timeout
+        self.retry_after = retry_after
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='ai-call')
+        # Admission: calls running + waiting. Active: calls talking to Gemini right now.
+        self._admission = threading.BoundedSemaphore(max_concurrency + max_queue)
+        self._active = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._depth = 0
+        self.rejected = 0
+
+    def _busy(self, message="AI service is at capacity. Please try again shortly."):
+        return ServiceBusyError(message, self.retry_after)
+
+    def _admit(self):
+        if not self._admission.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise self._busy()
+        with self._lock:
+            self._depth += 1
+
+    def _release(self):
+        with self._lock:
+            self._depth -= 1
+        self._admission.release()
+
+    @contextmanager
+    def slot(self):
+        """
+        Hold one upstream slot on the calling thread, e.g. for a streamed
+        response that has to be consumed where it is produced.
+
+        Raises:
+            ServiceBusyError: If the queue is full or no slot frees up in time
+        """
+        self._admit()
+        try:
+            if not self._active.acquire(timeout=self.queue_timeout):
+                raise self._busy()
+            try:
+                yield
+            finally:
+                self._active.release()
+        finally:
+            self._release()
+
+    def run(self, fn, *args, **kwargs):
+        """
+        Run fn on the AI pool and wait for its result.
+
+        Raises:
+            ServiceBusyError: If the queue is full or the call exceeds call_timeout
+            Whatever fn raises
+        """
+        self._admit()
+        abandoned = threading.Event()
+        try:
+            future = self._executor.submit(self._run_active, abandoned, fn, *args, **kwargs)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+
+        try:
+            return future.result(timeout=self.call_timeout)
+        except FutureTimeoutError:
+            # The caller has gone; don't start the call if it hasn't started yet
+            abandoned.set()
+            future.cancel()
+            logger.warning(f"AI call exceeded {self.call_timeout}s, returning 503")
+            raise self._busy("AI service took too long. Please try again.")
+
+    def _run_active(self, abandoned, fn, *args, **kwargs):
+        # Slots are shared with slot(), so a pool thread can wait here; bound the wait
+        if not self._active.acquire(timeout=self.queue_timeout):
+            raise self._busy()
+        try:
+            if abandoned.is_set():
+                logger.info("Skipping AI call whose caller already timed out")
+                raise self._busy("AI service took too long. Please try again.")
+            return fn(*args, **kwargs)
+        finally:
+            self._active.release()
+
+    def depth(self):
+        """Number of admitted calls (running + waiting)."""
+        with self._lock:
+            return self._depth
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher():
+    """Return the process-wide dispatcher, building it on first use."""
+    global _dispatcher
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                _dispatcher = AIDispatcher(
+                    max_concurrency=Config.AI_MAX_CONCURRENCY,
+                    max_queue=Config.AI_MAX_QUEUE,
+                    queue_timeout=Config.AI_QUEUE_TIMEOUT,
+                    call_timeout=Config.AI_CALL_TIMEOUT,
+                    retry_after=Config.AI_RETRY_AFTER,
+                )
+    return _dispatcher
@@ -0,0 +1,136 @@
+"""
+Fake Gemini model — an offline stand-in for google.generativeai.GenerativeModel.
+
+Selected with GEMINI_FAKE=true (see Config) so the app can be exercised and
+load-benchmarked without an API key or quota. It answers explain prompts
+with placeholder markdown, MCQ prompts with valid JSON for the requested
+number of questions (including multi-topic batch prompts), sleeps for a
+configurable latency and can inject 429s to exercise the client's backoff,
+adaptive concurrency and circuit breaker.
+
+Provides:
+  - FakeModel — drop-in replacement exposing generate_content()
+  - ResourceExhausted — raised for injected 429s (named like the real
+    google.api_core exception so error classification treats it the same)
+"""
+import json
+import random
+import re
+import threading
+import time
+
+
+class ResourceExhausted(Exception):
+    """Injected 429 — mirrors google.api_core.exceptions.ResourceExhausted."""
+    pass
+
+
+class _Usage:
+    """Mirrors the response usage_metadata fields Gemini reports."""
+
+    def __init__(self, prompt, text):
+        self.prompt_token_count = max(1, len(prompt) // 4)
+        self.candidates_token_count = max(1, len(text) // 4)
+
+
+class _Response:
+    def __init__(self, text, usage_metadata=None):
+        self.text = text
+        self.usage_metadata = usage_metadata
+
+
+class _StreamResponse:
+    """Iterable of chunks; like the real SDK, usage_metadata is set once fully consumed."""
+
+    def __init__(self, chunks, usage):
+        self._chunks = chunks
+        self._usage = usage
+        self.usage_metadata = None
+
+    def __iter__(self):
+        yield from self._chunks
+        self.usage_metadata = self._usage
+
+
+_SECTION = re.compile(r'^\d+\. "(.*)": exactly (\d+) questions$', re.MULTILINE)
+_COUNT = re.compile(r'exactly (\d+) multiple choice questions')
+_TOPIC = re.compile(r'(?:topic|about) "([^"]*)"')
+
+
+class FakeModel:
+    """
+    Deterministic-enough Gemini stand-in.
+
+    Args:
+        latency: Seconds each call takes (streamed calls spread it over chunks)
+        rate_limit_ratio: Probability (0-1) that a call raises ResourceExhausted
+        max_concurrency: Calls beyond this many in flight raise ResourceExhausted,
+                         imitating an upstream that throttles bursts (0 = no cap)
+    """
+
+    def __init__(self, latency=0.5, rate_limit_ratio=0.0, max_concurrency=0):
+        self.latency = latency
+        self.rate_limit_ratio = rate_limit_ratio
+        self.max_concurrency = max_concurrency
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.calls = 0
+
+    def generate_content(self, prompt, generation_config=None, stream=False, request_options=None):
+        self._enter()
+        try:
+            text = self._answer(prompt, generation_config or {})
+            if stream:
+                return _StreamResponse(self._stream(text), _Usage(prompt, text))
+            time.sleep(self.latency)
+            return _Response(text, _Usage(prompt, text))
+        finally:
+            self._exit()
+
+    def _enter(self):
+        with self._lock:
+            self.calls += 1
+            saturated = self.max_concurrency and self._in_flight >= self.max_concurrency
+            if saturated or random.random() < self.rate_limit_ratio:
+                raise ResourceExhausted('429 Resource has been exhausted (fake). Please retry in 1s.')
+            self._in_flight += 1
+
+    def _exit(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    def _stream(self, text):
+        pieces = [text[i:i + 40] for i in range(0, len(text), 40)] or ['']
+        for piece in pieces:
+            time.sleep(self.latency / len(pieces))
+            yield _Response(piece)
+
+    def _answer(self, prompt, generation_config):
+        if generation_config.get('response_mime_type') != 'application/json':
+            topic = _TOPIC.search(prompt)
+            topic = topic.group(1) if topic else 'this topic'
+            return (f"**{topic}** is explained here by the fake Gemini model.\n\n"
+                    f"- It stands in for real output during tests and benchmarks.\n"
+                    f"- The text is placeholder content.\n")
+
+        sections = _SECTION.findall(prompt)
+        if sections:
+            return json.dumps([
+                {'topic': topic, 'questions': _questions(topic, int(count))}
+                for topic, count in sections
+            ])
+        count = _COUNT.search(prompt)
+        topic = _TOPIC.search(prompt)
+        return json.dumps(_questions(topic.group(1) if topic else 'topic', int(count.group(1)) if count else 5))
+
+
+def _questions(topic, count):
+    stamp = random.randrange(1 << 30)
+    return [
+        {
+            'question': f'Fake question {n + 1} about {topic} ({stamp:x})?',
+            'options': ['Option one', 'Option two', 'Option three', 'Option four'],
+            'answer': random.choice('abcd'),
+        }
+        for n in range(count)
+    ]
@@ -2,33 +2,47 @@
 Gemini API service — wraps Google Generative AI calls with error handling and retry logic.
 
 Provides:
-  - explain_topic(topic, language, size, age) — generate topic explanation
-  - generate_mcq(topic, count) — generate MCQ questions
+  - explain_topic(topic, language, size, age, usage) — generate topic explanation
+  - stream_explanation(topic, language, size, age, usage) — same, yielded in chunks as generated
+  - generate_mcq(topic, count, use_cache, usage) — generate validated, structured MCQ questions
+  - generate_mcq_batch(requests, usage) — generate MCQs for many topics in as few calls as possible
   - RateLimitError — raised when API rate limit (429) is hit
   - InvalidRequestError — raised when request is invalid
+  - MalformedOutputError — raised when MCQ output stays invalid after retries
+  - ServiceBusyError — raised when the AI dispatcher is at capacity (see services/dispatch.py)
+    or the Gemini circuit breaker is open (see services/gemini_client.py)
+
+Responses are served from the AI response cache (services/cache.py) when an
+equivalent request was answered recently, and concurrent identical requests
+are coalesced into one upstream call (services/singleflight.py). Upstream
+calls run on the bounded AI dispatcher rather than the request thread, and
+go through the Gemini client, which handles retries, backoff and throttling.
+
+Prompts come from the template registry (services/prompts.py). Every
+function takes an optional TokenUsage that collects the tokens of the
+Gemini calls it actually makes — none for cache hits, or when another
+request's identical call is shared.
 """
-import time
+import json
 import logging
-import google.generativeai as genai
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from config import Config
+from services.cache import get_cache, make_key, age_band
+from services.singleflight import SingleFlight
+from services.dispatch import get_dispatcher, ServiceBusyError
+from services.gemini_client import get_client, RateLimitError, InvalidRequestError
+from services import metrics
+from services.mcq import parse_mcq, parse_mcq_sections, dumps, MalformedOutputError
+from services.prompts import render, EXPLAIN_LENGTHS, DEFAULT_EXPLAIN_LENGTH, CODE_EXAMPLE_RULES, DEFAULT_CODE_EXAMPLE_RULE
 
 logger = logging.getLogger(__name__)
 
-genai.configure(api_key=Config.GEMINI_API_KEY)
-model = genai.GenerativeModel('models/gemini-2.5-flash')
+# Identical prompts that are in flight at the same time share one Gemini call
+inflight = SingleFlight()
 
 
-class RateLimitError(Exception):
-    """Raised when Gemini API rate limit is hit."""
-    pass
-
-
-class InvalidRequestError(Exception):
-    """Raised when Gemini API receives an invalid request."""
-    pass
-
-
-def explain_topic(topic, language, size, age):
+def explain_topic(topic, language, size, age, usage=None):
     """
     Generate a topic explanation using Gemini AI.
 
@@ -36,7 +50,8 @@ def explain_topic(topic, language, size, age):
         topic: The topic to explain (str, max 500 chars after sanitization)
         language: Output language (English, Hindi, Marathi, Spanish)
         size: Explanation length (Short, Medium, Long)
-        age: Target audience age (int, used to adjust complexity)
+        age: Target audience age (int; the prompt and cache key use its age band)
+        usage: Optional TokenUsage to add this request's Gemini tokens to
 
     Returns:
         str: The generated explanation text (markdown formatted)
@@ -44,98 +59,210 @@ def explain_topic(topic, language, size, age):
     Raises:
         RateLimitError: If Gemini API rate limit is exceeded
         InvalidRequestError: If the request is invalid
+        ServiceBusyError: If the AI dispatcher is at capacity
+    """
+    band = age_band(age)
+    prompt = _explain_prompt(topic, language, size, band)
+    key = make_key('explain', topic, language, size, band)
+    return _cached(key, partial(_upstream, prompt, usage=usage))
+
+
+def stream_explanation(topic, language, size, age, usage=None):
     """
-    size_map = {
-        'Short': 'in 3-4 sentences',
-        'Medium': 'in 2-3 paragraphs',
-        'Long': 'in detail with multiple sections'
-    }
-    length = size_map.get(size, 'in 2-3 paragraphs')
+    Generate a topic explanation, yielding text chunks as Gemini produces them.
 
-    prompt = f"""You are a creative and friendly expert teacher.
-Explain the topic "{topic}" to a {age} year old student.
-Write the explanation in {language}.
-Keep the explanation {length}.
+    A cached explanation is yielded as a single chunk. A fully streamed
+    explanation is added to the cache once the last chunk arrives.
 
-Formatting Rules:
-1. Always format your response in clean Markdown.
-2. Use bolding to emphasize key terms.
-3. Use bullet points or numbered lists to break down complex ideas.
-4. If the topic involves programming, math, or technical syntax (and the student is over 12), you MUST include relevant code examples inside proper Markdown code blocks (e.g., ```python ... ```).
-5. For a {age} year old: use appropriate vocabulary, relatable analogies, and keep it engaging but not patronizing. Never use overly dense jargon without explaining it first."""
+    Yields:
+        str: Successive pieces of the markdown explanation
 
-    return _call_gemini(prompt)
+    Raises:
+        RateLimitError: If Gemini API rate limit is exceeded
+        InvalidRequestError: If the request is invalid
+        ServiceBusyError: If the AI dispatcher is at capacity
+    """
+    band = age_band(age)
+    key = make_key('explain', topic, language, size, band)
+    cache = get_cache()
+    cached = cache.get(key)
+    if cached is not None:
+        yield cached
+        return
+
+    chunks = []
+    with get_dispatcher().slot():
+        for chunk in get_client().stream(_explain_prompt(topic, language, size, band), usage=usage):
+            chunks.append(chunk)
+            yield chunk
+
+    result = ''.join(chunks)
+    if result:
+        cache.set(key, result)
+
+
+def _audience(band):
+    """Describe an age band for the prompt ('a student aged 11-13', 'an adult learner')."""
+    if band == 'adult':
+        return 'an adult learner'
+    if band == 'unknown':
+        return 'a student'
+    return f'a student aged {band}'
+
+
+def _explain_prompt(topic, language, size, band):
+    """
+    Build the explainer prompt for the given request fields.
+
+    The prompt is written for the age band, not the exact age, because the
+    band is what the cache key holds: every age in a band shares the cached
+    explanation, so they must share the prompt that produced it.
+    """
+    length = EXPLAIN_LENGTHS.get(size, DEFAULT_EXPLAIN_LENGTH)
+    code_examples = CODE_EXAMPLE_RULES.get(band, DEFAULT_CODE_EXAMPLE_RULE)
+    return render('explain', topic=topic, audience=_audience(band), code_examples=code_examples,
+                  language=language, length=length)
 
 
-def generate_mcq(topic, count):
+def generate_mcq(topic, count, use_cache=True, usage=None):
     """
     Generate multiple choice questions using Gemini AI.
 
+    Asks Gemini for JSON output, validates it, and regenerates (up to
+    Config.MCQ_PARSE_RETRIES times) when the output is malformed or short.
+
     Args:
         topic: The topic for questions (str)
         count: Number of questions to generate (int, 1-30)
+        use_cache: False to always generate a new set (concurrent identical
+                   calls are still coalesced)
+        usage: Optional TokenUsage to add this request's Gemini tokens to
 
     Returns:
-        str: Raw MCQ text in format "Q1. ... a) ... b) ... c) ... d) ... Answer: a"
+        list: `count` dicts of { question: str, options: [4 x str], answer: 'a'-'d' }
 
     Raises:
         RateLimitError: If Gemini API rate limit is exceeded
         InvalidRequestError: If the request is invalid
+        ServiceBusyError: If the AI dispatcher is at capacity
+        MalformedOutputError: If no valid question set was produced after retries
     """
-    prompt = f"""Generate exactly {count} multiple choice questions about "{topic}".
+    prompt = render('mcq', topic=topic, count=count)
+    key = make_key('mcq.json', topic, count)
+    return json.loads(_cached(key, partial(_generate_mcq_json, prompt, count, usage), use_cache=use_cache))
+
 
-Format each question exactly like this:
-Q1. Question text here
-a) Option A
-b) Option B
-c) Option C
-d) Option D
-Answer: a
+def _generate_mcq_json(prompt, count, usage=None):
+    """Call Gemini in JSON mode until it returns `count` valid questions; returns compact JSON."""
+    attempts = Config.MCQ_PARSE_RETRIES + 1
+    for attempt in range(attempts):
+        raw = _upstream(prompt, generation_config={'response_mime_type': 'application/json'}, usage=usage)
+        try:
+            return dumps(parse_mcq(raw, count))
+        except MalformedOutputError as e:
+            logger.warning(f"Malformed MCQ output (attempt {attempt + 1}/{attempts}): {e}")
+    raise MalformedOutputError('AI returned an incomplete quiz. Please try again.')
 
-Follow this exact format for all {count} questions. Number them Q1, Q2, Q3 etc.
-Do not add any extra text before or after the questions."""
 
-    return _call_gemini(prompt)
+def generate_mcq_batch(requests, usage=None):
+    """
+    Generate MCQs for several topics at once.
+
+    Topics are packed into as few prompts as the output token budget allows
+    (Config.MCQ_BATCH_MAX_OUTPUT_TOKENS at roughly MCQ_TOKENS_PER_QUESTION
+    per question); a topic larger than one prompt's budget is split across
+    prompts. Prompts run concurrently, at most MCQ_BATCH_PARALLELISM at a
+    time, each on the AI dispatcher.
+
+    Args:
+        requests: list of (topic, count) tuples
+        usage: Optional TokenUsage to add the tokens of every prompt to
 
+    Returns:
+        list: One list of question dicts per request, in request order
 
-def _call_gemini(prompt, retries=1):
+    Raises:
+        Same as generate_mcq
     """
-    Call Gemini API with timeout and simple retry logic.
+    per_prompt = max(1, Config.MCQ_BATCH_MAX_OUTPUT_TOKENS // Config.MCQ_TOKENS_PER_QUESTION)
+    chunks = _pack_batch(requests, per_prompt)
+
+    results = [[] for _ in requests]
+    workers = max(1, min(Config.MCQ_BATCH_PARALLELISM, len(chunks)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='mcq-batch') as pool:
+        futures = [pool.submit(_generate_batch_chunk, requests, chunk, usage) for chunk in chunks]
+        for chunk, future in zip(chunks, futures):
+            for (index, _), questions in zip(chunk, future.result()):
+                results[index].extend(questions)
+    return results
+
 
-    Uses a 30-second timeout per request. On failure (except InvalidArgument),
-    waits 2 seconds and retries once before raising an error.
+def _pack_batch(requests, per_prompt):
     """
-    for attempt in range(retries + 1):
+    First-fit pack (request index, question count) parts into prompts of at
+    most per_prompt questions, splitting requests that don't fit in one.
+    """
+    chunks = []
+    room = []
+    for index, (_, count) in enumerate(requests):
+        remaining = count
+        while remaining > 0:
+            target = next((i for i, r in enumerate(room) if r > 0), None)
+            if target is None:
+                chunks.append([])
+                room.append(per_prompt)
+                target = len(chunks) - 1
+            part = min(remaining, room[target])
+            chunks[target].append((index, part))
+            room[target] -= part
+            remaining -= part
+    return chunks
+
+
+def _generate_batch_chunk(requests, chunk, usage=None):
+    """Generate one packed prompt, retrying malformed output like _generate_mcq_json."""
+    sections = "\n".join(
+        f'{n}. "{requests[index][0]}": exactly {count} questions'
+        for n, (index, count) in enumerate(chunk, start=1)
+    )
+    prompt = render('mcq_batch', sections=sections)
+    counts = [count for _, count in chunk]
+    attempts = Config.MCQ_PARSE_RETRIES + 1
+    for attempt in range(attempts):
+        raw = _upstream(prompt, generation_config={'response_mime_type': 'application/json'}, usage=usage)
         try:
-            response = model.generate_content(prompt, request_options={"timeout": 30})
-            return response.text
-        except Exception as e:
-            error_type = type(e).__name__
+            return parse_mcq_sections(raw, counts)
+        except MalformedOutputError as e:
+            logger.warning(f"Malformed batch MCQ output (attempt {attempt + 1}/{attempts}): {e}")
+    raise MalformedOutputError('AI returned an incomplete quiz. Please try again.')
 
-            # Don't retry on invalid argument — it won't help
-            if 'InvalidArgument' in error_type:
-                raise InvalidRequestError("Invalid request. Please modify your topic.")
 
-            # On last attempt, handle the error
-            if attempt == retries:
-                _handle_gemini_error(e)
+def _cached(key, produce, use_cache=True):
+    """
+    Return the cached response for key, calling produce() on a miss.
 
-            # Retry: wait 2 seconds then try again
-            logger.warning(f"Gemini call failed (attempt {attempt + 1}), retrying in 2s: {e}")
-            time.sleep(2)
+    produce must return the string to cache. Concurrent misses for the same
+    key wait on a single call and all receive its result (or its error).
+    With use_cache=False the cache is neither read nor written.
+    """
+    if use_cache:
+        result = get_cache().get(key)
+        if result is not None:
+            return result
+        return inflight.do(key, _generate_and_store, key, produce)
+    return inflight.do(f"{key}:uncached", produce)
 
 
-def _handle_gemini_error(e):
-    """Centralized error handler — maps Gemini exceptions to custom errors."""
-    error_type = type(e).__name__
+def _generate_and_store(key, produce):
+    """Leader side of _cached: produce the result and populate the cache."""
+    result = produce()
+    if result:
+        get_cache().set(key, result)
+    return result
 
-    # google.api_core.exceptions.ResourceExhausted (429)
-    if 'ResourceExhausted' in error_type or '429' in str(e):
-        raise RateLimitError("AI service is busy. Please wait a moment and try again.")
 
-    # Timeout or deadline exceeded
-    if 'DeadlineExceeded' in error_type or 'Timeout' in error_type:
-        raise RateLimitError("AI service took too long. Please try again.")
+def _upstream(prompt, generation_config=None, usage=None):
+    """Run one Gemini call on the bounded AI dispatcher (timed as the request's 'gemini' phase)."""
+    with metrics.timed('gemini'):
+        return get_dispatcher().run(get_client().generate, prompt, generation_config=generation_config, usage=usage)
 
-    # Re-raise anything else
-    raise Exception(f"AI service error: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,468 @@
+"""
+Gemini client — the one place that talks to the Gemini API.
+
+Wraps the model with three protections so a burst of 429s doesn't turn into
+every worker hammering the API:
+
+  - Adaptive concurrency (AIMD): the number of calls allowed in flight grows
+    by ~1 per window of successful calls and halves when Gemini throttles us,
+    never exceeding AI_MAX_CONCURRENCY.
+  - Retries with exponential backoff and full jitter, honoring the retry
+    delay Gemini sends with a 429, within a per-call retry budget.
+  - A circuit breaker: after GEMINI_BREAKER_THRESHOLD consecutive
+    throttled/failed calls, calls fail fast with CircuitOpenError (503 +
+    Retry-After) for GEMINI_BREAKER_COOLDOWN seconds, then one probe call
+    decides whether to close it again.
+
+With GEMINI_FAKE=true the client drives services/fake_gemini.FakeModel
+instead of the real API, for offline development and load benchmarks.
+
+Provides:
+  - RateLimitError — raised when Gemini keeps throttling or times out
+  - InvalidRequestError — raised when Gemini rejects the request
+  - CircuitOpenError — raised (a ServiceBusyError) while the breaker is open
+  - AdaptiveLimiter — AIMD concurrency limiter
+  - CircuitBreaker — consecutive-failure breaker with half-open probing
+  - GeminiClient — generate(prompt) / stream(prompt) with the above applied
+  - get_client() — the process-wide client configured from Config
+"""
+import logging
+import math
+import random
+import re
+import threading
+import time
+from config import Config
+from services.dispatch import ServiceBusyError
+from services import metrics
+from services.prompts import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitError(Exception):
+    """Raised when Gemini API rate limit is hit."""
+    pass
+
+
+class InvalidRequestError(Exception):
+    """Raised when Gemini API receives an invalid request."""
+    pass
+
+
+class CircuitOpenError(ServiceBusyError):
+    """Raised without calling Gemini while the circuit breaker is open."""
+    pass
+
+
+# Error kinds returned by _classify
+INVALID, THROTTLED, TIMEOUT, UNAVAILABLE, ERROR = 'invalid', 'throttled', 'timeout', 'unavailable', 'error'
+
+# Kinds that mean "upstream is saturated or down": they shrink the limiter and trip the breaker
+_SATURATION = {THROTTLED, TIMEOUT, UNAVAILABLE}
+
+
+def _classify(e):
+    """Map a Gemini / google.api_core exception to an error kind by its type name and message."""
+    error_type = type(e).__name__
+    message = str(e)
+    if 'InvalidArgument' in error_type:
+        return INVALID
+    if 'ResourceExhausted' in error_type or '429' in message:
+        return THROTTLED
+    if 'DeadlineExceeded' in error_type or 'Timeout' in error_type:
+        return TIMEOUT
+    if error_type in ('ServiceUnavailable', 'InternalServerError') or '503' in message:
+        return UNAVAILABLE
+    return ERROR
+
+
+_RETRY_IN = re.compile(r'retry in ([\d.]+)\s*s', re.IGNORECASE)
+_RETRY_DELAY = re.compile(r'retry_delay\s*\{\s*seconds:\s*(\d+)')
+
+
+def _retry_hint(e):
+    """Seconds the server asked us to wait (RetryInfo detail or message text), or None."""
+    for detail in getattr(e, 'details', None) or []:
+        delay = getattr(detail, 'retry_delay', None)
+        if delay is not None and hasattr(delay, 'seconds'):
+            return delay.seconds + getattr(delay, 'nanos', 0) / 1e9
+    match = _RETRY_IN.search(str(e)) or _RETRY_DELAY.search(str(e))
+    return float(match.group(1)) if match else None
+
+
+def _raise_for(kind, e):
+    """Raise the error the routes expect for a failed call."""
+    if kind == INVALID:
+        raise InvalidRequestError("Invalid request. Please modify your topic.")
+    if kind == THROTTLED:
+        raise RateLimitError("AI service is busy. Please wait a moment and try again.")
+    if kind == TIMEOUT:
+        raise RateLimitError("AI service took too long. Please try again.")
+    raise Exception(f"AI service error: {str(e)}")
+
+
+def _record_usage(response, prompt, text, usage=None):
+    """
+    Add the token counts Gemini reports for a response to the metrics, and
+    to usage (a services.prompts.TokenUsage) if given. Counts the model
+    doesn't report are estimated from the prompt / response text for usage.
+    """
+    reported = getattr(response, 'usage_metadata', None)
+    counts = {}
+    for kind, field in (('prompt', 'prompt_token_count'), ('output', 'candidates_token_count')):
+        count = getattr(reported, field, None)
+        if isinstance(count, int) and count:
+            metrics.gemini_tokens.inc(count, kind=kind)
+            counts[kind] = count
+    if usage is not None:
+        usage.add(counts.get('prompt') or estimate_tokens(prompt), counts.get('output') or estimate_tokens(text))
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limiter.
+
+    The limit rises by 1/limit per successful call (about +1 per window of
+    `limit` successes) and is halved on a throttle, at most once per
+    `decrease_interval` seconds so one burst of 429s counts as one signal.
+    """
+
+    def __init__(self, min_limit=1, max_limit=4, initial=None, decrease_interval=1.0):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = float(initial if initial is not None else max_limit)
+        self.decrease_interval = decrease_interval
+        self._in_flight = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self, timeout=None):
+        """Wait for a free slot; returns False if none freed up within timeout."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._in_flight < int(self.limit), timeout=timeout):
+                return False
+            self._in_flight += 1
+            return True
+
+    def release(self):
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify()
+
+    def on_success(self):
+        with self._cond:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+    def on_throttle(self):
+        with self._cond:
+            now = time.monotonic()
+            if now - self._last_decrease < self.decrease_interval:
+                return
+            self._last_decrease = now
+            previous = self.limit
+            self.limit = max(self.min_limit, self.limit / 2)
+            if int(previous) != int(self.limit):
+                logger.warning(f"Gemini throttled, concurrency limit {int(previous)} -> {int(self.limit)}")
+
+    def in_flight(self):
+        with self._cond:
+            return self._in_flight
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failures, fails fast for `cooldown`
+    seconds, then lets a single probe through (half-open): success closes
+    the breaker, failure opens it again.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, threshold=5, cooldown=30):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        self.short_circuited = 0
+
+    def before_call(self):
+        """
+        Raises:
+            CircuitOpenError: If the breaker is open (or a probe is already running)
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            remaining = self._opened_at + self.cooldown - time.monotonic()
+            if self.state == self.OPEN and remaining <= 0:
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+            self.short_circuited += 1
+        raise CircuitOpenError(
+            "AI service is temporarily unavailable. Please try again shortly.",
+            max(1, math.ceil(remaining))
+        )
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info("Gemini circuit breaker closed")
+            self.state = self.CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"Gemini circuit breaker opened for {self.cooldown}s "
+                                   f"after {self._failures} consecutive failures")
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+    def record_neutral(self):
+        """End a probe whose outcome says nothing about upstream health (e.g. a 400)."""
+        with self._lock:
+            self._probing = False
+
+
+class GeminiClient:
+    """Gemini model wrapper with adaptive concurrency, backoff and a circuit breaker."""
+
+    def __init__(self, model_factory, limiter, breaker, max_retries=2, backoff_base=1.0,
+                 backoff_max=20.0, retry_budget=30.0, request_timeout=30, acquire_timeout=10,
+                 retry_after=5, sleep=time.sleep):
+        self._model_factory = model_factory
+        self._model = None
+        self._model_lock = threading.Lock()
+        self.limiter = limiter
+        self.breaker = breaker
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_budget = retry_budget
+        self.request_timeout = request_timeout
+        self.acquire_timeout = acquire_timeout
+        self.retry_after = retry_after
+        self._sleep = sleep
+        self._counts_lock = threading.Lock()
+        self._counts = {'calls': 0, 'retries': 0, 'throttled': 0, 'failed': 0}
+
+    @property
+    def model(self):
+        """The underlying model, built on first use."""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    self._model = self._model_factory()
+        return self._model
+
+    def generate(self, prompt, generation_config=None, usage=None):
+        """
+        Generate a complete response.
+
+        Token counts of the successful attempt are added to usage
+        (a services.prompts.TokenUsage) when given.
+
+        Returns:
+            str: The response text
+
+        Raises:
+            RateLimitError: If Gemini keeps throttling / timing out past the retry budget
+            InvalidRequestError: If the request is invalid
+            CircuitOpenError: If the breaker is open
+            ServiceBusyError: If no concurrency slot frees up in time
+        """
+        deadline = time.monotonic() + self.retry_budget
+        for attempt in range(self.max_retries + 1):
+            self._begin()
+            started = time.perf_counter()
+            try:
+                try:
+                    response = self.model.generate_content(
+                        prompt, generation_config=generation_config,
+                        request_options={"timeout": self.request_timeout}
+                    )
+                    text = response.text
+                finally:
+                    # Free the slot before any backoff so waiting callers can use it
+                    self.limiter.release()
+            except Exception as e:
+                metrics.gemini_calls.observe(time.perf_counter() - started, mode='generate', outcome=_classify(e))
+                self._sleep(self._fail(e, attempt, deadline))
+                continue
+            metrics.gemini_calls.observe(time.perf_counter() - started, mode='generate', outcome='ok')
+            _record_usage(response, prompt, text, usage)
+            self._succeed()
+            return text
+
+    def stream(self, prompt, usage=None):
+        """
+        Generate a response chunk by chunk. Token counts are added to usage
+        once the stream completes (see generate).
+
+        Retries only while nothing has been yielded yet — a partially
+        delivered answer cannot be replayed. The concurrency slot is held
+        until the stream finishes.
+
+        Yields:
+            str: Successive pieces of the response text
+
+        Raises:
+            Same as generate()
+        """
+        deadline = time.monotonic() + self.retry_budget
+        for attempt in range(self.max_retries + 1):
+            started = False
+            pieces = []
+            failure = None
+            self._begin()
+            began = time.perf_counter()
+            try:
+                response = self.model.generate_content(
+                    prompt, stream=True, request_options={"timeout": self.request_timeout}
+                )
+                for chunk in response:
+                    text = chunk.text
+                    if text:
+                        started = True
+                        pieces.append(text)
+                        yield text
+            except GeneratorExit:
+                # Consumer went away mid-stream; don't leave a half-open probe pending
+                self.breaker.record_neutral()
+                raise
+            except Exception as e:
+                metrics.gemini_calls.observe(time.perf_counter() - began, mode='stream', outcome=_classify(e))
+                if started:
+                    kind = _classify(e)
+                    self._record_failure(kind)
+                    _raise_for(kind, e)
+                failure = e
+            finally:
+                self.limiter.release()
+            if failure is not None:
+                # Back off outside the slot (released above)
+                self._sleep(self._fail(failure, attempt, deadline))
+                continue
+            metrics.gemini_calls.observe(time.perf_counter() - began, mode='stream', outcome='ok')
+            _record_usage(response, prompt, ''.join(pieces), usage)
+            self._succeed()
+            return
+
+    def _begin(self):
+        """Pass the breaker and take a limiter slot for one attempt."""
+        self.breaker.before_call()
+        if not self.limiter.acquire(timeout=self.acquire_timeout):
+            self.breaker.record_neutral()
+            raise ServiceBusyError("AI service is at capacity. Please try again shortly.", self.retry_after)
+        self._count('calls')
+
+    def _succeed(self):
+        self.limiter.on_success()
+        self.breaker.record_success()
+
+    def _record_failure(self, kind):
+        if kind == THROTTLED:
+            self._count('throttled')
+            self.limiter.on_throttle()
+        if kind in _SATURATION:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_neutral()
+
+    def _fail(self, e, attempt, deadline):
+        """
+        Account for a failed attempt and raise the mapped error, or return
+        the backoff delay before the next attempt. The caller sleeps, after
+        releasing its limiter slot.
+        """
+        kind = _classify(e)
+        self._record_failure(kind)
+
+        if kind == INVALID or attempt == self.max_retries or self.breaker.state == CircuitBreaker.OPEN:
+            self._count('failed')
+            _raise_for(kind, e)
+
+        delay = self._backoff(attempt, _retry_hint(e) if kind == THROTTLED else None)
+        if time.monotonic() + delay > deadline:
+            self._count('failed')
+            _raise_for(kind, e)
+
+        self._count('retries')
+        metrics.gemini_retries.inc(reason=kind)
+        logger.warning(f"Gemini call failed (attempt {attempt + 1}, {kind}), retrying in {delay:.1f}s: {e}")
+        return delay
+
+    def _backoff(self, attempt, hint=None):
+        """Full-jitter exponential backoff, never shorter than the server's retry hint."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        if hint is not None:
+            delay = max(delay, hint)
+        return delay
+
+    def _count(self, name):
+        with self._counts_lock:
+            self._counts[name] += 1
+
+    def stats(self):
+        """Counters plus the current concurrency limit and breaker state."""
+        with self._counts_lock:
+            counts = dict(self._counts)
+        return {
+            **counts,
+            'concurrency_limit': int(self.limiter.limit),
+            'in_flight': self.limiter.in_flight(),
+            'breaker': self.breaker.state,
+            'short_circuited': self.breaker.short_circuited,
+        }
+
+
+def _build_model():
+    """The configured model: FakeModel when GEMINI_FAKE is set, else the real Gemini model."""
+    if Config.GEMINI_FAKE:
+        from services.fake_gemini import FakeModel
+        logger.warning("GEMINI_FAKE is set — using the fake Gemini model.")
+        return FakeModel(
+            latency=Config.GEMINI_FAKE_LATENCY,
+            rate_limit_ratio=Config.GEMINI_FAKE_429_RATIO,
+            max_concurrency=Config.GEMINI_FAKE_MAX_CONCURRENCY,
+        )
+    import google.generativeai as genai
+    genai.configure(api_key=Config.GEMINI_API_KEY)
+    return genai.GenerativeModel(Config.GEMINI_MODEL)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Return the process-wide Gemini client, building it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = GeminiClient(
+                    _build_model,
+                    AdaptiveLimiter(min_limit=1, max_limit=Config.AI_MAX_CONCURRENCY),
+                    CircuitBreaker(threshold=Config.GEMINI_BREAKER_THRESHOLD,
+                                   cooldown=Config.GEMINI_BREAKER_COOLDOWN),
+                    max_retries=Config.GEMINI_MAX_RETRIES,
+                    backoff_base=Config.GEMINI_BACKOFF_BASE,
+                    backoff_max=Config.GEMINI_BACKOFF_MAX,
+                    retry_budget=Config.GEMINI_RETRY_BUDGET,
+                    request_timeout=Config.GEMINI_REQUEST_TIMEOUT,
+                    acquire_timeout=Config.AI_QUEUE_TIMEOUT,
+                    retry_after=Config.AI_RETRY_AFTER,
+                )
+    return _client
@@ -0,0 +1,309 @@
+"""
+History search — full-text search over a user's history topics and responses.
+
+SQLite: an FTS5 table (history_fts, rowid = history.id) holding each
+entry's topic, its searchable text and an owner token. The history store
+writes it in the same transaction as the History rows, so it is always in
+step. The owner token is part of the MATCH, so the index itself narrows
+results to one user instead of filtering every match afterwards.
+
+Postgres: a GIN index over to_tsvector(topic || response), ranked with
+ts_rank and highlighted with ts_headline; the expression index keeps
+itself up to date.
+
+Other databases (or SQLite builds without FTS5) fall back to a LIKE scan
+of the user's rows; on SQLite that only sees topics and responses short
+enough to be stored uncompressed (see models.types.CompressedText).
+
+Provides:
+  - SEARCH_TABLE — name of the SQLite FTS5 table
+  - searchable_text(type, response) — the text indexed for an entry
+  - index_entries(entries) / unindex_entries(entries) — keep the SQLite index in step
+  - unindex_where(id_query) — drop the rows selected by a query of history ids (bulk delete)
+  - create_search_index(conn) / rebuild_search_index(conn) — schema setup and backfill
+  - index_missing(conn) — index rows saved while the FTS table was missing
+  - search_history(user_id, query, limit, offset) — ranked results with snippets
+"""
+import json
+import logging
+import re
+import time
+from types import SimpleNamespace
+from sqlalchemy import text, table, column, delete, select
+from extensions import db
+
+logger = logging.getLogger(__name__)
+
+SEARCH_TABLE = 'history_fts'
+
+# Highlight markers around matched terms in snippets
+MARK_START, MARK_END = '<mark>', '</mark>'
+SNIPPET_TOKENS = 16
+
+_TERM = re.compile(r'\w+', re.UNICODE)
+
+
+def _owner(user_id):
+    return f'u{user_id}'
+
+
+def searchable_text(type_, response):
+    """Plain text to index for an entry: quiz questions and options, or the response as is."""
+    if type_ == 'mcq' and response and response.lstrip().startswith('['):
+        try:
+            questions = json.loads(response)
+            return '\n'.join(
+                ' '.join([q.get('question', '')] + list(q.get('options', [])))
+                for q in questions if isinstance(q, dict)
+            )
+        except ValueError:
+            pass
+    return response or ''
+
+
+def _dialect():
+    return db.engine.dialect.name
+
+
+def _fts_ready(conn):
+    """True if the SQLite FTS table exists on this database."""
+    row = conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {'name': SEARCH_TABLE}
+    ).first()
+    return row is not None
+
+
+# Databases whose FTS table exists, and when a missing one was last checked.
+# Only a positive result is kept for good: the table can appear later
+# ('flask migrate' on a running deployment), so a miss is rechecked. Rows
+# saved while it was missing are indexed by the first write after it appears
+# (_catch_up), so search doesn't silently miss them.
+_ready = set()
+_missing = {}
+_catch_up = set()
+_RECHECK_SECONDS = 30
+
+
+def _sqlite_index_ready():
+    url = str(db.engine.url)
+    if url in _ready:
+        return True
+    now = time.monotonic()
+    checked = _missing.get(url)
+    if checked is not None and now - checked < _RECHECK_SECONDS:
+        return False
+    with db.engine.connect() as conn:
+        ready = _fts_ready(conn)
+    if ready:
+        _ready.add(url)
+        if _missing.pop(url, None) is not None:
+            _catch_up.add(url)
+        return True
+    _missing[url] = now
+    logger.warning(f"{SEARCH_TABLE} does not exist; new history entries are not indexed for search "
+                   f"until it is created ('flask migrate' or 'flask rebuild-search-index'), then "
+                   f"the entries saved meanwhile are indexed by the next history write")
+    return False
+
+
+def _insert_rows(conn, rows):
+    conn.execute(
+        text(f'INSERT INTO {SEARCH_TABLE} (rowid, topic, body, owner) VALUES (:id, :topic, :body, :owner)'),
+        [{'id': r.id, 'topic': r.topic, 'body': searchable_text(r.type, r.response), 'owner': _owner(r.user_id)}
+         for r in rows]
+    )
+
+
+def _history_rows(conn, *clauses, batch_size=500):
+    """Yield batches of the History rows matching clauses, in id order."""
+    from models.history import History
+    history = History.__table__
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            history.select()
+            .with_only_columns(history.c.id, history.c.user_id, history.c.type, history.c.topic, history.c.response)
+            .where(history.c.id > last_id, *clauses).order_by(history.c.id).limit(batch_size)
+        ).all()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1].id
+
+
+def index_missing(conn, batch_size=500):
+    """
+    Index every History row that has no FTS row (saved while the table was
+    missing). Safe to run concurrently: each batch replaces its rows.
+
+    Returns:
+        int: Rows indexed
+    """
+    from models.history import History
+    fts = table(SEARCH_TABLE, column('rowid'))
+    total = 0
+    for rows in _history_rows(conn, History.__table__.c.id.not_in(select(fts.c.rowid)), batch_size=batch_size):
+        conn.execute(delete(fts).where(fts.c.rowid.in_([r.id for r in rows])))
+        _insert_rows(conn, rows)
+        total += len(rows)
+    return total
+
+
+def index_entries(entries):
+    """Add flushed History rows to the SQLite FTS index (same transaction; no-op elsewhere)."""
+    if _dialect() != 'sqlite' or not entries or not _sqlite_index_ready():
+        return
+    url = str(db.engine.url)
+    if url in _catch_up:
+        # The table just appeared: index everything it is missing, these entries included
+        _catch_up.discard(url)
+        indexed = index_missing(db.session)
+        logger.info(f"Indexed {indexed} history entries saved while {SEARCH_TABLE} was missing")
+        return
+    _insert_rows(db.session, entries)
+
+
+def unindex_entries(entries):
+    """Remove History rows from the SQLite FTS index (same transaction; no-op elsewhere)."""
+    if _dialect() != 'sqlite' or not entries or not _sqlite_index_ready():
+        return
+    db.session.execute(text(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = :id'), [{'id': e.id} for e in entries])
+
+
+def unindex_where(id_query):
+    """Remove the History rows whose ids id_query selects from the SQLite FTS index."""
+    if _dialect() != 'sqlite' or not _sqlite_index_ready():
+        return
+    fts = table(SEARCH_TABLE, column('rowid'))
+    db.session.execute(delete(fts).where(fts.c.rowid.in_(id_query)))
+
+
+def create_search_index(conn):
+    """Create the search index for conn's database. Returns False if unsupported."""
+    dialect = conn.dialect.name
+    if dialect == 'sqlite':
+        try:
+            conn.execute(text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} "
+                f"USING fts5(topic, body, owner, tokenize='porter unicode61')"
+            ))
+        except Exception as e:
+            logger.warning(f"SQLite FTS5 unavailable, history search will use LIKE: {e}")
+            return False
+        _ready.clear()
+        _missing.clear()
+        _catch_up.clear()
+        return True
+    if dialect == 'postgresql':
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_history_search ON history "
+            "USING GIN (to_tsvector('english', topic || ' ' || response))"
+        ))
+        return True
+    return False
+
+
+def rebuild_search_index(conn, batch_size=500):
+    """Repopulate the SQLite FTS table from history in batches. Returns rows indexed."""
+    if conn.dialect.name != 'sqlite' or not _fts_ready(conn):
+        return 0
+    conn.execute(text(f'DELETE FROM {SEARCH_TABLE}'))
+    total = 0
+    for rows in _history_rows(conn, batch_size=batch_size):
+        _insert_rows(conn, rows)
+        total += len(rows)
+    return total
+
+
+def _terms(query):
+    return _TERM.findall(query or '')[:16]
+
+
+def search_history(user_id, query, limit=20, offset=0):
+    """
+    Search user_id's history, best matches first.
+
+    Every term must match; the last one also matches as a prefix, so
+    results update as the user types.
+
+    Returns:
+        tuple: (list of result dicts with id/type/topic/created_at/snippet, has_more)
+
+    Raises:
+        ValueError: If query contains no searchable terms
+    """
+    terms = _terms(query)
+    if not terms:
+        raise ValueError('Search query must contain letters or digits')
+
+    dialect = _dialect()
+    if dialect == 'sqlite' and _sqlite_index_ready():
+        rows = _search_fts5(user_id, terms, limit + 1, offset)
+    elif dialect == 'postgresql':
+        rows = _search_postgres(user_id, terms, limit + 1, offset)
+    else:
+        rows = _search_like(user_id, terms, limit + 1, offset)
+
+    results = [{
+        'id': r.id,
+        'type': r.type,
+        'topic': r.topic,
+        'created_at': r.created_at.isoformat() if r.created_at else None,
+        'snippet': r.snippet,
+    } for r in rows[:limit]]
+    return results, len(rows) > limit
+
+
+def _search_fts5(user_id, terms, limit, offset):
+    # Quote every term so FTS5 query syntax in user input is treated as text
+    quoted = [f'"{t}"' for t in terms]
+    quoted[-1] += '*'
+    match = f'owner:{_owner(user_id)} AND {{topic body}}: ({" ".join(quoted)})'
+    return db.session.execute(text(
+        f"SELECT h.id, h.type, h.topic, h.created_at, "
+        f"snippet({SEARCH_TABLE}, 1, :start, :end, '…', :tokens) AS snippet "
+        f"FROM {SEARCH_TABLE} JOIN history h ON h.id = {SEARCH_TABLE}.rowid "
+        f"WHERE {SEARCH_TABLE} MATCH :match "
+        f"ORDER BY bm25({SEARCH_TABLE}, 5.0, 1.0, 0.0) LIMIT :limit OFFSET :offset"
+    ).columns(created_at=db.DateTime), {
+        'match': match, 'start': MARK_START, 'end': MARK_END, 'tokens': SNIPPET_TOKENS,
+        'limit': limit, 'offset': offset
+    }).all()
+
+
+def _search_postgres(user_id, terms, limit, offset):
+    tsquery = ' & '.join(terms[:-1] + [f'{terms[-1]}:*'])
+    return db.session.execute(text(
+        "SELECT id, type, topic, created_at, "
+        "ts_headline('english', response, to_tsquery('english', :q), "
+        "  'StartSel=' || :start || ', StopSel=' || :end || ', MaxWords=' || :tokens || ', MinWords=5') AS snippet "
+        "FROM history "
+        "WHERE user_id = :uid AND to_tsvector('english', topic || ' ' || response) @@ to_tsquery('english', :q) "
+        "ORDER BY ts_rank(to_tsvector('english', topic || ' ' || response), to_tsquery('english', :q)) DESC "
+        "LIMIT :limit OFFSET :offset"
+    ).columns(created_at=db.DateTime), {'q': tsquery, 'uid': user_id, 'start': MARK_START, 'end': MARK_END,
+        'tokens': SNIPPET_TOKENS, 'limit': limit, 'offset': offset}).all()
+
+
+def _search_like(user_id, terms, limit, offset):
+    from models.history import History
+
+    query = History.query.filter(History.user_id == user_id)
+    for term in terms:
+        pattern = f'%{term}%'
+        query = query.filter(History.topic.ilike(pattern) | History.response.ilike(pattern))
+    entries = query.order_by(History.created_at.desc(), History.id.desc()).offset(offset).limit(limit).all()
+    return [SimpleNamespace(id=e.id, type=e.type, topic=e.topic, created_at=e.created_at,
+                            snippet=_snippet(searchable_text(e.type, e.response), terms))
+            for e in entries]
+
+
+def _snippet(body, terms):
+    """Window of text around the first matched term, with terms wrapped in MARK_START/END."""
+    lower = body.lower()
+    hits = [i for i in (lower.find(t.lower()) for t in terms) if i >= 0]
+    start = max(0, min(hits) - 60) if hits else 0
+    window = body[start:start + 160]
+    for term in terms:
+        window = re.sub(f'({re.escape(term)})', rf'{MARK_START}\1{MARK_END}', window, flags=re.IGNORECASE)
+    return ('…' if start else '') + window + ('…' if start + 160 < len(body) else '')
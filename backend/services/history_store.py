@@ -0,0 +1,310 @@
+"""
+History store — the single write path for History rows.
+
+Every insert and delete goes through here so the per-user UserStats rollup
+and the full-text search index are updated in the same transaction as the
+rows they cover.
+
+Provides:
+  - save_entries(entries) / save_entry(entry) — insert History rows and commit
+  - delete_entry(entry) — delete one History row and commit
+  - delete_entries(user_id, ids, type, topic, before, after) — set-based bulk delete, one commit
+  - get_user_stats(user_id) — the rollup row, built from history on first use
+  - history_version(user_id) — counter bumped by every write, for ETags
+  - rebuild_user_stats(user_id) — recompute one user's rollup from scratch
+  - distinct_topics_count(user_id) — statement counting a user's distinct topics
+  - backfill_user_stats() — rebuild the rollup for every user
+"""
+import logging
+from collections import Counter
+from sqlalchemy import func, select, delete, case, union
+from sqlalchemy.exc import IntegrityError
+from extensions import db
+from models.history import History
+from models.user import User
+from models.user_stats import UserStats
+from services.history_search import index_entries, unindex_entries, unindex_where
+
+logger = logging.getLogger(__name__)
+
+TOPIC_TYPES = ('explain', 'mcq')
+
+
+def _score_of(meta_data):
+    """(correct, total) recorded in an mcq_score entry's meta_data, or (0, 0) if unreadable."""
+    if not meta_data:
+        return 0, 0
+    try:
+        return int(meta_data.get('score', 0)), int(meta_data.get('total', 0))
+    except (ValueError, TypeError):
+        return 0, 0
+
+
+def _topic_row_count(user_id, topic):
+    return History.query.filter(
+        History.user_id == user_id,
+        History.type.in_(TOPIC_TYPES),
+        History.topic == topic
+    ).count()
+
+
+def distinct_topics_count(user_id):
+    """
+    Statement counting user_id's distinct explain/mcq topics.
+
+    A union of one ordered per-type query each: SQLite merges them straight off
+    ix_history_user_type_topic, where count(DISTINCT) over type IN (...) would
+    sort the user's topics in a temporary B-tree.
+    """
+    topics = union(*[
+        select(History.topic).where(History.user_id == user_id, History.type == type_)
+        for type_ in TOPIC_TYPES
+    ]).order_by('topic').subquery()
+    return select(func.count()).select_from(topics)
+
+
+def _compute_stats(user_id):
+    """Aggregate a user's history into rollup values with set-based queries."""
+    topics_learned = db.session.scalar(distinct_topics_count(user_id)) or 0
+
+    mcq_count = History.query.filter_by(user_id=user_id, type='mcq').count()
+    session_count = History.query.filter_by(user_id=user_id).count()
+
+    correct_answers = total_answers = 0
+    scores = History.query.with_entities(History.meta_data)\
+        .filter_by(user_id=user_id, type='mcq_score')
+    for (meta_data,) in scores:
+        correct, total = _score_of(meta_data)
+        correct_answers += correct
+        total_answers += total
+
+    return {
+        'topics_learned': topics_learned,
+        'mcq_count': mcq_count,
+        'correct_answers': correct_answers,
+        'total_answers': total_answers,
+        'session_count': session_count,
+    }
+
+
+def rebuild_user_stats(user_id):
+    """Recompute user_id's rollup from their history. Does not commit."""
+    stats = db.session.get(UserStats, user_id)
+    if stats is None:
+        stats = UserStats(user_id=user_id)
+        db.session.add(stats)
+    for name, value in _compute_stats(user_id).items():
+        setattr(stats, name, value)
+    stats.history_version = (stats.history_version or 0) + 1
+    db.session.flush()
+    return stats
+
+
+def get_user_stats(user_id):
+    """
+    Return the rollup row for user_id.
+
+    Users with history from before the rollup existed get their row built on
+    first access (and committed), so every later call is a single lookup.
+    """
+    return _ensure_user_stats(user_id)
+
+
+def history_version(user_id):
+    """
+    Version of user_id's history: changes whenever an entry is added or
+    deleted, in the same transaction as the change.
+    """
+    version = db.session.query(UserStats.history_version).filter_by(user_id=user_id).scalar()
+    if version is None:
+        version = _ensure_user_stats(user_id).history_version
+    return version
+
+
+def _ensure_user_stats(user_id):
+    """The rollup row for user_id, building and committing it if it doesn't exist yet."""
+    stats = db.session.get(UserStats, user_id)
+    if stats is not None:
+        return stats
+    try:
+        stats = rebuild_user_stats(user_id)
+        db.session.commit()
+    except IntegrityError:
+        # Another worker built it first; theirs is just as current
+        db.session.rollback()
+        stats = db.session.get(UserStats, user_id)
+    return stats
+
+
+def _apply(user_id, entries, sign):
+    """
+    Add (sign=1) or subtract (sign=-1) entries from the user's rollup.
+
+    Must run after the inserts/deletes are flushed, so the topic counts below
+    see the new state of the table within this transaction.
+    """
+    stats = db.session.get(UserStats, user_id)
+    mcq = sum(1 for e in entries if e.type == 'mcq')
+    correct = total = 0
+    for e in entries:
+        if e.type == 'mcq_score':
+            c, t = _score_of(e.meta_data)
+            correct += c
+            total += t
+
+    # A topic is new if every remaining row for it is one we just added,
+    # and gone if no rows for it remain after a delete.
+    topics = Counter(e.topic for e in entries if e.type in TOPIC_TYPES)
+    topic_delta = 0
+    for topic, n in topics.items():
+        remaining = _topic_row_count(user_id, topic)
+        if (sign > 0 and remaining == n) or (sign < 0 and remaining == 0):
+            topic_delta += sign
+
+    _adjust(stats, sign * len(entries), sign * mcq, sign * correct, sign * total, topic_delta)
+
+
+def _adjust(stats, sessions, mcq, correct, total, topics):
+    """Add the given deltas to a rollup row and bump its history version."""
+    # Column expressions turn into atomic "SET x = x + n" updates
+    stats.session_count = UserStats.session_count + sessions
+    stats.mcq_count = UserStats.mcq_count + mcq
+    stats.correct_answers = UserStats.correct_answers + correct
+    stats.total_answers = UserStats.total_answers + total
+    stats.topics_learned = UserStats.topics_learned + topics
+    stats.history_version = UserStats.history_version + 1
+
+
+def save_entries(entries):
+    """Insert History rows, update their owners' rollups, and commit once."""
+    by_user = {}
+    for entry in entries:
+        by_user.setdefault(entry.user_id, []).append(entry)
+
+    # Make sure rollup rows exist before the new rows are visible to a rebuild
+    for user_id in by_user:
+        _ensure_user_stats(user_id)
+
+    db.session.add_all(entries)
+    db.session.flush()
+    index_entries(entries)
+    for user_id, user_entries in by_user.items():
+        _apply(user_id, user_entries, 1)
+    db.session.commit()
+    return entries
+
+
+def save_entry(entry):
+    """Insert a single History row (see save_entries)."""
+    save_entries([entry])
+    return entry
+
+
+def delete_entry(entry):
+    """Delete a History row, update the owner's rollup, and commit."""
+    user_id = entry.user_id
+    if db.session.get(UserStats, user_id) is None:
+        rebuild_user_stats(user_id)
+    unindex_entries([entry])
+    db.session.delete(entry)
+    db.session.flush()
+    _apply(user_id, [entry], -1)
+    db.session.commit()
+
+
+def _filters(user_id, ids=None, type_=None, topic=None, before=None, after=None):
+    """WHERE clauses selecting user_id's rows, narrowed by any of the optional filters."""
+    clauses = [History.user_id == user_id]
+    if ids is not None:
+        clauses.append(History.id.in_(ids))
+    if type_ is not None:
+        clauses.append(History.type == type_)
+    if topic is not None:
+        clauses.append(History.topic == topic)
+    if before is not None:
+        clauses.append(History.created_at < before)
+    if after is not None:
+        clauses.append(History.created_at >= after)
+    return clauses
+
+
+def delete_entries(user_id, ids=None, type_=None, topic=None, before=None, after=None):
+    """
+    Delete all of user_id's rows matching the filters (all of them if none
+    are given) with set-based statements, update the rollup, and commit once.
+
+    Args:
+        user_id: Owner of the rows
+        ids: Only these entry ids
+        type_: Only entries of this type
+        topic: Only entries for exactly this topic
+        before / after: Only entries created before / at or after these datetimes
+
+    Returns:
+        int: Number of entries deleted
+    """
+    clauses = _filters(user_id, ids, type_, topic, before, after)
+    stats = _ensure_user_stats(user_id)
+
+    # Everything the rollup needs to know about the doomed rows, in one pass
+    count, mcq = db.session.execute(
+        select(func.count(), func.coalesce(func.sum(case((History.type == 'mcq', 1), else_=0)), 0))
+        .where(*clauses)
+    ).one()
+    if not count:
+        return 0
+    correct = total = 0
+    for (meta_data,) in db.session.execute(select(History.meta_data).where(*clauses, History.type == 'mcq_score')):
+        c, t = _score_of(meta_data)
+        correct += c
+        total += t
+    topics = set(db.session.scalars(
+        select(History.topic).where(*clauses, History.type.in_(TOPIC_TYPES)).distinct()
+    ))
+
+    unindex_where(select(History.id).where(*clauses))
+    db.session.execute(delete(History).where(*clauses).execution_options(synchronize_session=False))
+
+    # Topics with no explain/mcq rows left are no longer "learned"
+    remaining = set()
+    topic_list = list(topics)
+    for start in range(0, len(topic_list), 500):
+        remaining.update(db.session.scalars(
+            select(History.topic).where(
+                History.user_id == user_id, History.type.in_(TOPIC_TYPES),
+                History.topic.in_(topic_list[start:start + 500])).distinct()
+        ))
+
+    _adjust(stats, -count, -mcq, -correct, -total, -len(topics - remaining))
+    db.session.commit()
+    # Rows deleted behind the ORM's back must not linger in the identity map
+    db.session.expire_all()
+    return count
+
+
+def iter_entries(user_id, batch_size=500):
+    """
+    Yield every History row of user_id, oldest first, as lightweight Row
+    objects, streaming through a server-side cursor batch_size rows at a time
+    instead of loading the whole history.
+    """
+    result = db.session.execute(
+        select(History.id, History.type, History.topic, History.response, History.meta_data, History.created_at)
+        .where(History.user_id == user_id)
+        .order_by(History.created_at, History.id)
+        .execution_options(stream_results=True, yield_per=batch_size)
+    )
+    try:
+        yield from result
+    finally:
+        result.close()
+
+
+def backfill_user_stats():
+    """Rebuild the rollup for every user and commit. Returns the number of users processed."""
+    count = 0
+    for (user_id,) in db.session.query(User.id):
+        rebuild_user_stats(user_id)
+        count += 1
+    db.session.commit()
+    return count
@@ -0,0 +1,214 @@
+"""
+History writer — write-behind logging of AI results to History.
+
+In 'async' mode (HISTORY_WRITE_MODE) routes hand finished History rows to
+a bounded in-process queue and return immediately; a background thread
+drains the queue and saves the rows in batched transactions through the
+history store, so the commit (and any SQLite lock wait) is off the request
+path. Rows appear in /api/history within about HISTORY_FLUSH_INTERVAL.
+
+Queued rows are flushed when the process exits normally. A hard crash
+can lose what is still queued; use 'sync' mode when every row must be
+committed before the response is sent. When the queue is full, rows are
+written synchronously instead of being dropped.
+
+Provides:
+  - HistoryWriter — bounded queue + background flusher
+  - init_app(app) — bind the process-wide writer to the Flask app
+  - log_entries(entries) / log_entry(entry) — save History rows per the configured mode
+  - flush_pending(timeout) — wait for queued rows before reading/deleting a user's history
+  - get_writer() — the process-wide writer
+"""
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from config import Config
+from extensions import db
+from models.history import History
+from services.history_store import save_entries
+
+logger = logging.getLogger(__name__)
+
+_FIELDS = ('user_id', 'type', 'topic', 'response', 'meta_data', 'created_at')
+
+
+def _to_record(entry):
+    record = {field: getattr(entry, field) for field in _FIELDS}
+    # Stamp now, not at flush time, so history order follows request order
+    record['created_at'] = record['created_at'] or datetime.utcnow()
+    return record
+
+
+class HistoryWriter:
+    """Bounded queue of History records flushed in batches on a background thread."""
+
+    def __init__(self, max_queue=1000, batch_size=100, flush_interval=0.5):
+        self.app = None
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.written = 0
+        self.failed = 0
+        self.overflowed = 0
+
+    def submit(self, records):
+        """
+        Queue records (dicts of History fields) for writing.
+
+        Returns:
+            bool: False if the queue is full and nothing was queued
+        """
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(records)
+            return True
+        except queue.Full:
+            self.overflowed += 1
+            return False
+
+    def depth(self):
+        """Requests' worth of records waiting to be written."""
+        return self._queue.qsize()
+
+    def _ensure_thread(self):
+        """Start the flusher — again after a fork, since threads don't survive one."""
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='history-writer', daemon=True)
+                self._pid = os.getpid()
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            batch, taken = list(item), 1
+            deadline = time.monotonic() + self.flush_interval
+            stop = False
+            # Gather more work for the same transaction until the batch is full or the interval ends
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                taken += 1
+                if item is None:
+                    stop = True
+                    break
+                batch.extend(item)
+            try:
+                self._write(batch)
+            except Exception as e:
+                self.failed += len(batch)
+                logger.error(f"History writer failed to write {len(batch)} entries: {e}")
+            finally:
+                for _ in range(taken):
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def _write(self, records):
+        with self.app.app_context():
+            try:
+                save_entries([History(**r) for r in records])
+                self.written += len(records)
+                return
+            except Exception as e:
+                db.session.rollback()
+                logger.warning(f"History batch of {len(records)} failed, retrying one by one: {e}")
+            # Isolate the bad record(s) so one failure doesn't lose the whole batch
+            for record in records:
+                try:
+                    save_entries([History(**record)])
+                    self.written += 1
+                except Exception as e:
+                    db.session.rollback()
+                    self.failed += 1
+                    logger.error(f"Dropped history entry for user {record['user_id']}: {e}")
+
+    def flush(self, timeout=None):
+        """Block until everything queued so far is written; False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self, timeout=10):
+        """Write out the queue and stop the flusher thread."""
+        if self._thread is None or not self._thread.is_alive() or self._pid != os.getpid():
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            logger.error("History writer queue still full at shutdown; queued entries may be lost")
+            return
+        self._thread.join(timeout)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    """Return the process-wide writer, building it on first use."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = HistoryWriter(
+                    max_queue=Config.HISTORY_QUEUE_SIZE,
+                    batch_size=Config.HISTORY_BATCH_SIZE,
+                    flush_interval=Config.HISTORY_FLUSH_INTERVAL,
+                )
+                atexit.register(_writer.close)
+    return _writer
+
+
+def init_app(app):
+    """Flush into app's database (the writer thread needs an app context)."""
+    get_writer().app = app
+
+
+def log_entries(entries):
+    """
+    Save unsaved History rows: queued for the background writer in 'async'
+    mode, committed before returning in 'sync' mode (or when the queue is full).
+
+    Entry ids are only assigned in 'sync' mode.
+    """
+    if Config.HISTORY_WRITE_MODE == 'async':
+        writer = get_writer()
+        if writer.app is not None:
+            if writer.submit([_to_record(e) for e in entries]):
+                return entries
+            logger.warning("History write queue full; writing synchronously")
+    return save_entries(entries)
+
+
+def log_entry(entry):
+    """Save a single History row (see log_entries)."""
+    log_entries([entry])
+    return entry
+
+
+def flush_pending(timeout=2):
+    """
+    In 'async' mode, wait (up to timeout seconds) until queued rows are
+    written, for operations that must see every entry (export, bulk delete).
+    """
+    if Config.HISTORY_WRITE_MODE == 'async' and _writer is not None and _writer.app is not None:
+        if not _writer.flush(timeout):
+            logger.warning(f"History writer still busy after {timeout}s; queued entries may be missed")
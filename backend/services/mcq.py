@@ -0,0 +1,151 @@
+"""
+MCQ format — parses and validates generated multiple choice questions.
+
+A question is stored and returned as:
+    { "question": str, "options": [str, str, str, str], "answer": "a"|"b"|"c"|"d" }
+
+Provides:
+  - parse_mcq(raw, count) — parse Gemini output (JSON, or the legacy
+    "Q1. ... a) ... Answer: a" text format) into validated questions
+  - parse_mcq_sections(raw, counts) — parse a multi-topic batch response
+  - dumps(questions) — compact JSON used for History.response and the cache
+  - MalformedOutputError — raised when output can't be turned into `count` valid questions
+"""
+import json
+import re
+
+ANSWER_LETTERS = ['a', 'b', 'c', 'd']
+
+_OPTION_PREFIX = re.compile(r'^\s*[a-dA-D][\).:]\s*')
+
+
+class MalformedOutputError(Exception):
+    """Raised when generated MCQ output is missing, unparsable or incomplete."""
+    pass
+
+
+def _clean_option(text):
+    return _OPTION_PREFIX.sub('', str(text)).strip()
+
+
+def _validate(item):
+    """Normalize one question dict, or raise MalformedOutputError."""
+    if not isinstance(item, dict):
+        raise MalformedOutputError('Question is not an object')
+
+    question = str(item.get('question', '')).strip()
+    options = item.get('options')
+    answer = str(item.get('answer', '')).strip().lower()[:1]
+
+    if not question:
+        raise MalformedOutputError('Question text is missing')
+    if not isinstance(options, list) or len(options) != len(ANSWER_LETTERS):
+        raise MalformedOutputError(f'Question must have exactly {len(ANSWER_LETTERS)} options')
+    options = [_clean_option(o) for o in options]
+    if not all(options):
+        raise MalformedOutputError('Option text is missing')
+    if answer not in ANSWER_LETTERS:
+        raise MalformedOutputError('Answer must be one of a, b, c, d')
+
+    return {'question': question, 'options': options, 'answer': answer}
+
+
+def _parse_text(raw):
+    """Parse the legacy plain-text format into question dicts."""
+    items = []
+    for block in re.split(r'\n(?=Q\d+\.)', raw.strip()):
+        lines = [line.strip() for line in block.strip().split('\n') if line.strip()]
+        if len(lines) < 2:
+            continue
+        item = {'question': re.sub(r'^Q\d+\.\s*', '', lines[0]), 'options': [], 'answer': ''}
+        for line in lines[1:]:
+            if re.match(r'^[a-d]\)', line, re.IGNORECASE):
+                item['options'].append(line)
+            elif re.match(r'^Answer:', line, re.IGNORECASE):
+                item['answer'] = re.sub(r'^Answer:\s*', '', line, flags=re.IGNORECASE)
+        items.append(item)
+    return items
+
+
+def _strip_fence(raw):
+    text = (raw or '').strip()
+    # Models sometimes wrap JSON in a markdown code fence
+    fenced = re.match(r'^```(?:json)?\s*(.*?)\s*```$', text, re.DOTALL)
+    return fenced.group(1) if fenced else text
+
+
+def _load(raw):
+    """Extract the list of raw question items from JSON or legacy text output."""
+    text = _strip_fence(raw)
+
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return _parse_text(text)
+
+    if isinstance(data, dict):
+        data = data.get('questions')
+    if not isinstance(data, list):
+        raise MalformedOutputError('Expected a list of questions')
+    return data
+
+
+def parse_mcq(raw, count):
+    """
+    Parse and validate generated MCQ output.
+
+    Args:
+        raw: Model output (JSON array / {"questions": [...]}, or legacy text)
+        count: Number of questions that were requested
+
+    Returns:
+        list: `count` question dicts
+
+    Raises:
+        MalformedOutputError: If the output is unparsable or fewer than
+            `count` valid questions were produced (invalid ones are dropped)
+    """
+    questions = []
+    for item in _load(raw):
+        try:
+            questions.append(_validate(item))
+        except MalformedOutputError:
+            continue
+    if len(questions) < count:
+        raise MalformedOutputError(f'Expected {count} questions, got {len(questions)}')
+    return questions[:count]
+
+
+def parse_mcq_sections(raw, counts):
+    """
+    Parse a batch response: a JSON array with one {"topic", "questions"}
+    object per requested topic, in request order.
+
+    Args:
+        raw: Model output
+        counts: Number of questions requested for each section
+
+    Returns:
+        list: One list of validated questions per section
+
+    Raises:
+        MalformedOutputError: If a section is missing or short
+    """
+    try:
+        data = json.loads(_strip_fence(raw))
+    except ValueError:
+        raise MalformedOutputError('Batch output is not valid JSON')
+    if not isinstance(data, list) or len(data) < len(counts):
+        raise MalformedOutputError(f'Expected {len(counts)} topic sections')
+
+    sections = []
+    for section, count in zip(data, counts):
+        if not isinstance(section, dict):
+            raise MalformedOutputError('Topic section is not an object')
+        sections.append(parse_mcq(json.dumps(section.get('questions')), count))
+    return sections
+
+
+def dumps(questions):
+    """Serialize questions compactly for storage."""
+    return json.dumps(questions, ensure_ascii=False, separators=(',', ':'))
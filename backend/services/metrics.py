@@ -0,0 +1,262 @@
+"""
+Metrics — in-process counters and histograms, rendered in Prometheus text format.
+
+Records per-endpoint request latency, database query count/time, Gemini
+latency/tokens/retries and AI cache effectiveness. Each worker keeps its own
+registry (scrape every worker, or aggregate by instance label). During a
+request the same timings are summed per phase so app.py can return them
+in a Server-Timing header.
+
+Provides:
+  - Counter / Histogram — labelled metric types
+  - REGISTRY — the process-wide registry; render() produces /metrics output
+  - start_request() / phase(name, seconds) / request_phases() — per-request timing
+  - timed(name) — context manager recording a phase
+  - instrument_engine(engine) — count and time SQLAlchemy queries
+  - TimedJSONProvider — Flask JSON provider that times serialization
+  - http_requests, db_queries, gemini_* — the metrics the app records
+"""
+import threading
+import time
+from contextlib import contextmanager
+from flask import g, has_request_context
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import event
+
+# Seconds; covers fast DB reads up to long Gemini generations
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _label_str(names, values):
+    if not names:
+        return ''
+    return '{' + ','.join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + '}'
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    kind = 'counter'
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(n, '') for n in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, _label_str(self.labels, k), v) for k, v in sorted(self._values.items())]
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(n, '') for n in self.labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [per-bucket counts, sum, count]
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    def samples(self):
+        out = []
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                for bound, n in zip(self.buckets, counts):
+                    out.append((f'{self.name}_bucket', _label_str(self.labels + ('le',), key + (bound,)), n))
+                out.append((f'{self.name}_bucket', _label_str(self.labels + ('le',), key + ('+Inf',)), count))
+                out.append((f'{self.name}_sum', _label_str(self.labels, key), round(total, 6)))
+                out.append((f'{self.name}_count', _label_str(self.labels, key), count))
+        return out
+
+
+class Registry:
+    """Holds metrics and collector callbacks; render() emits Prometheus text."""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def collector(self, fn):
+        """Register fn() -> [(name, kind, help, [(labels dict, value)])], read at scrape time."""
+        self._collectors.append(fn)
+        return fn
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(f'{name}{labels} {value}' for name, labels, value in metric.samples())
+        for fn in self._collectors:
+            for name, kind, help, values in fn():
+                lines.append(f'# HELP {name} {help}')
+                lines.append(f'# TYPE {name} {kind}')
+                for labels, value in values:
+                    lines.append(f'{name}{_label_str(tuple(labels), tuple(labels.values()))} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+http_requests = REGISTRY.register(Histogram(
+    'http_request_duration_seconds', 'HTTP request latency by endpoint', ('method', 'endpoint', 'status')))
+db_queries = REGISTRY.register(Histogram(
+    'db_query_duration_seconds', 'SQL statement latency', buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)))
+db_queries_per_request = REGISTRY.register(Histogram(
+    'db_queries_per_request', 'SQL statements issued per HTTP request', ('endpoint',),
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100)))
+gemini_calls = REGISTRY.register(Histogram(
+    'gemini_request_duration_seconds', 'Gemini API call latency per attempt', ('mode', 'outcome')))
+gemini_tokens = REGISTRY.register(Counter(
+    'gemini_tokens_total', 'Tokens reported by Gemini usage metadata', ('kind',)))
+ai_template_tokens = REGISTRY.register(Counter(
+    'ai_template_tokens_total', 'Tokens used per prompt template (reported or estimated)', ('template', 'kind')))
+gemini_retries = REGISTRY.register(Counter(
+    'gemini_retries_total', 'Gemini attempts retried after a failure', ('reason',)))
+
+
+# --- Per-request phases (Server-Timing) ---
+
+def start_request():
+    """Begin timing the current request."""
+    g._metrics_start = time.perf_counter()
+    g._metrics_phases = {}
+    g._metrics_queries = 0
+
+
+def phase(name, seconds):
+    """Add seconds to the named phase of the current request (no-op outside a request)."""
+    if has_request_context() and hasattr(g, '_metrics_phases'):
+        g._metrics_phases[name] = g._metrics_phases.get(name, 0.0) + seconds
+
+
+@contextmanager
+def timed(name):
+    """Time the enclosed block as a phase of the current request."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        phase(name, time.perf_counter() - started)
+
+
+def request_phases():
+    """(total seconds, {phase: seconds}, query count) for the current request, or None."""
+    if not hasattr(g, '_metrics_start'):
+        return None
+    return time.perf_counter() - g._metrics_start, g._metrics_phases, g._metrics_queries
+
+
+# --- SQLAlchemy ---
+
+def instrument_engine(engine):
+    """Count and time every statement run on engine."""
+    if getattr(engine, '_metrics_instrumented', False):
+        return
+    engine._metrics_instrumented = True
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('_metrics_started', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['_metrics_started'].pop()
+        db_queries.observe(elapsed)
+        if has_request_context() and hasattr(g, '_metrics_phases'):
+            g._metrics_queries += 1
+            phase('db', elapsed)
+
+
+# --- JSON serialization ---
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Default JSON provider that records serialization time as the 'json' phase."""
+
+    def dumps(self, obj, **kwargs):
+        with timed('json'):
+            return super().dumps(obj, **kwargs)
+
+
+# --- Scrape-time collectors ---
+
+@REGISTRY.collector
+def _ai_collectors():
+    from services.cache import get_cache
+    from services.dispatch import get_dispatcher
+    from services.gemini_client import get_client
+    from services.gemini import inflight
+
+    cache = get_cache().stats()
+    dedup = inflight.totals()
+    client = get_client().stats()
+    dispatcher = get_dispatcher()
+    return [
+        ('ai_cache_requests_total', 'counter', 'AI response cache lookups by result',
+         [({'result': 'hit'}, cache['hits']), ({'result': 'miss'}, cache['misses'])]),
+        ('ai_cache_hit_ratio', 'gauge', 'AI response cache hit ratio since start',
+         [({}, cache['hit_ratio'])]),
+        ('ai_cache_entries', 'gauge', 'Entries in the AI response cache',
+         [({'backend': cache['backend']}, cache['entries'] or 0)]),
+        ('ai_singleflight_calls_total', 'counter', 'Generation requests by coalescing outcome',
+         [({'outcome': 'executed'}, dedup['executions']), ({'outcome': 'deduplicated'}, dedup['deduplicated'])]),
+        ('gemini_calls_total', 'counter', 'Gemini attempts started', [({}, client['calls'])]),
+        ('gemini_throttled_total', 'counter', 'Gemini attempts rejected with 429', [({}, client['throttled'])]),
+        ('gemini_short_circuited_total', 'counter', 'Calls refused while the circuit breaker was open',
+         [({}, client['short_circuited'])]),
+        ('gemini_concurrency_limit', 'gauge', 'Current adaptive Gemini concurrency limit',
+         [({}, client['concurrency_limit'])]),
+        ('gemini_circuit_open', 'gauge', '1 while the Gemini circuit breaker is not closed',
+         [({}, int(client['breaker'] != 'closed'))]),
+        ('ai_dispatcher_depth', 'gauge', 'AI calls running or queued', [({}, dispatcher.depth())]),
+        ('ai_dispatcher_rejected_total', 'counter', 'AI calls rejected with 503', [({}, dispatcher.rejected)]),
+    ]
+
+
+@REGISTRY.collector
+def _history_writer_collector():
+    from services.history_writer import get_writer
+
+    writer = get_writer()
+    return [
+        ('history_write_queue_depth', 'gauge', 'Requests with history rows waiting to be written',
+         [({}, writer.depth())]),
+        ('history_rows_written_total', 'counter', 'History rows written by the background writer',
+         [({}, writer.written)]),
+        ('history_rows_failed_total', 'counter', 'History rows the background writer could not save',
+         [({}, writer.failed)]),
+        ('history_queue_overflows_total', 'counter', 'Writes done inline because the queue was full',
+         [({}, writer.overflowed)]),
+    ]
@@ -0,0 +1,87 @@
+"""
+Password hashing — runs bcrypt in a process pool instead of on the request thread.
+
+bcrypt is deliberately CPU-heavy, but it releases the GIL, so request threads
+already hash in parallel and by default (PASSWORD_HASH_WORKERS=0) it runs
+inline; bench/password_throughput.py shows no gain from a pool. A pool of
+PASSWORD_HASH_WORKERS processes can still be configured. Every Gunicorn
+worker gets its own pool, so 'auto' sizes it to CPU count // WEB_CONCURRENCY
+to keep the total number of hashing processes within the cores.
+
+Provides:
+  - hash_password(plain) — bcrypt hash with the configured work factor
+  - verify_password(plain, hashed) — constant-time check against a stored hash
+  - needs_rehash(hashed) — True when a stored hash uses a different work factor
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import bcrypt
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def _hash(plain, rounds):
+    return bcrypt.hashpw(plain, bcrypt.gensalt(rounds=rounds)).decode('utf-8')
+
+
+def _check(plain, hashed):
+    return bcrypt.checkpw(plain, hashed)
+
+
+def _worker_count():
+    workers = Config.PASSWORD_HASH_WORKERS
+    if workers is None:
+        # 'auto': share the cores between the web workers' pools
+        web_workers = max(1, int(os.getenv('WEB_CONCURRENCY', 1)))
+        return max(1, (os.cpu_count() or 1) // web_workers)
+    return workers
+
+
+def _get_pool():
+    """Pool for this process — rebuilt after a fork, since pools don't survive one."""
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ProcessPoolExecutor(max_workers=_worker_count())
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def _run(fn, *args):
+    if _worker_count() == 0:
+        return fn(*args)
+    try:
+        return _get_pool().submit(fn, *args).result()
+    except BrokenProcessPool:
+        global _pool
+        logger.warning("Password hashing pool broke; hashing inline and rebuilding the pool")
+        with _pool_lock:
+            _pool = None
+        return fn(*args)
+
+
+def hash_password(plain, rounds=None):
+    """Hash plain with bcrypt at `rounds` (default Config.BCRYPT_ROUNDS)."""
+    return _run(_hash, plain.encode('utf-8'), rounds or Config.BCRYPT_ROUNDS)
+
+
+def verify_password(plain, hashed):
+    """Check plain against a stored bcrypt hash."""
+    return _run(_check, plain.encode('utf-8'), hashed.encode('utf-8'))
+
+
+def needs_rehash(hashed, rounds=None):
+    """True if hashed ('$2b$<cost>$...') was made with a cost other than `rounds`."""
+    try:
+        cost = int(hashed.split('$')[2])
+    except (IndexError, ValueError):
+        return True
+    return cost != (rounds or Config.BCRYPT_ROUNDS)
@@ -0,0 +1,174 @@
+"""
+Prompt templates and token accounting for Gemini calls.
+
+Templates are compiled once at import into literal / field parts, so a
+prompt is rendered with a single join instead of re-building a long
+f-string per call. Each template keeps its fixed instructions first and
+the request-specific lines last: every prompt from a template starts with
+the same prefix (`PromptTemplate.prefix`), which keeps prompts comparable
+and lets Gemini reuse cached prefix work where it supports that.
+
+TokenUsage collects the prompt / output token counts Gemini reports for
+the calls made on behalf of one request (summed over retries and batch
+chunks). Routes store it in History.meta_data and the per-template
+rollup (services/quota.py), and it feeds the ai_template_tokens_total
+metric, so templates and size settings like EXPLAIN_LENGTHS can be tuned
+against real cost.
+
+Provides:
+  - PromptTemplate — a compiled template
+  - register(name, text) / render(name, **fields) — the template registry
+  - TEMPLATES — registered templates by name
+  - EXPLAIN_LENGTHS — explanation size → length instruction
+  - CODE_EXAMPLE_RULES — age band → code example instruction
+  - TokenUsage — per-request token accumulator
+  - estimate_tokens(text) — rough token count when Gemini reports none
+"""
+import threading
+from string import Formatter
+from services import metrics
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token)."""
+    return max(1, len(text or '') // 4)
+
+
+class PromptTemplate:
+    """A str.format-style template split into literal / field parts at construction."""
+
+    def __init__(self, name, text):
+        self.name = name
+        self.text = text
+        self._parts = []
+        for literal, field, spec, conversion in Formatter().parse(text):
+            if spec or conversion:
+                raise ValueError(f"Template {name}: format specs are not supported ({{{field}}})")
+            self._parts.append((literal, field))
+        self.fields = frozenset(field for _, field in self._parts if field)
+        self.prefix = self._parts[0][0] if self._parts else ''
+
+    def render(self, **fields):
+        """
+        Fill in the template.
+
+        Raises:
+            KeyError: If a field is missing
+        """
+        missing = self.fields - fields.keys()
+        if missing:
+            raise KeyError(f"Template {self.name} is missing fields: {', '.join(sorted(missing))}")
+        return ''.join(literal + (str(fields[field]) if field else '') for literal, field in self._parts)
+
+
+TEMPLATES = {}
+
+
+def register(name, text):
+    """Compile text and register it under name. Returns the template."""
+    if name in TEMPLATES:
+        raise ValueError(f"Prompt template {name} is already registered")
+    template = TEMPLATES[name] = PromptTemplate(name, text)
+    return template
+
+
+def render(name, **fields):
+    """Render the registered template name with fields."""
+    return TEMPLATES[name].render(**fields)
+
+
+# Explanation size → length instruction
+EXPLAIN_LENGTHS = {
+    'Short': 'in 3-4 sentences',
+    'Medium': 'in 2-3 paragraphs',
+    'Long': 'in detail with multiple sections'
+}
+DEFAULT_EXPLAIN_LENGTH = EXPLAIN_LENGTHS['Medium']
+
+# Age band → how technical topics use code (rule depends on the band, like the audience line)
+CODE_EXAMPLE_RULES = {
+    '0-7': 'Do not use code blocks; explain programming, math or technical ideas in plain words and everyday examples.',
+    '8-10': 'Do not use code blocks; explain programming, math or technical ideas in plain words and everyday examples.',
+    '11-13': 'If the topic involves programming, math, or technical syntax, include short, simple code examples '
+             'inside proper Markdown code blocks (e.g., ```python ... ```) and explain each line.',
+}
+DEFAULT_CODE_EXAMPLE_RULE = ('If the topic involves programming, math, or technical syntax, you MUST include relevant '
+                             'code examples inside proper Markdown code blocks (e.g., ```python ... ```).')
+
+register('explain', """You are a creative and friendly expert teacher.
+
+Formatting Rules:
+1. Always format your response in clean Markdown.
+2. Use bolding to emphasize key terms.
+3. Use bullet points or numbered lists to break down complex ideas.
+4. Match the student's age: use appropriate vocabulary, relatable analogies, and keep it engaging but not patronizing. Never use overly dense jargon without explaining it first.
+
+Explain the topic "{topic}" to {audience}.
+{code_examples}
+Write the explanation in {language}.
+Keep the explanation {length}.""")
+
+_QUESTION_FIELDS = """- "question": the question text
+- "options": an array of exactly 4 answer texts, without "a)" style prefixes
+- "answer": the letter of the correct option: "a", "b", "c" or "d"
+"""
+
+register('mcq', """Respond with a JSON array of multiple choice question objects and nothing else.
+Each object must have these fields:
+""" + _QUESTION_FIELDS + """
+Generate exactly {count} multiple choice questions about "{topic}".
+The array must contain exactly {count} objects.
+""")
+
+register('mcq_batch', """Generate multiple choice questions for each of the topics listed below.
+
+Respond with a JSON array containing one object per topic, in the same order, and nothing else.
+Each object must have a "topic" field (the topic as given) and a "questions" array.
+Each question must have these fields:
+""" + _QUESTION_FIELDS + """
+Topics:
+{sections}
+""")
+
+
+class TokenUsage:
+    """
+    Tokens used by the Gemini calls made for one request.
+
+    Thread-safe, since batch chunks run on a pool. A request answered from
+    the response cache or question bank makes no calls and records nothing.
+    """
+
+    def __init__(self, template, variant=None):
+        self.template = template if variant is None else f'{template}/{variant}'
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        self._lock = threading.Lock()
+
+    def add(self, prompt_tokens, output_tokens):
+        """Record one completed Gemini call."""
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += prompt_tokens
+            self.output_tokens += output_tokens
+        metrics.ai_template_tokens.inc(prompt_tokens, template=self.template, kind='prompt')
+        metrics.ai_template_tokens.inc(output_tokens, template=self.template, kind='output')
+
+    @property
+    def total_tokens(self):
+        return self.prompt_tokens + self.output_tokens
+
+    def to_dict(self, share=1.0):
+        """
+        Usage as stored in History.meta_data.
+
+        Args:
+            share: Fraction of the tokens to attribute (for one entry of a batch)
+        """
+        return {
+            'template': self.template,
+            'calls': self.calls,
+            'prompt_tokens': round(self.prompt_tokens * share),
+            'output_tokens': round(self.output_tokens * share),
+        }
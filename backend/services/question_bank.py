@@ -0,0 +1,121 @@
+"""
+Question bank — serves quizzes from previously generated MCQs.
+
+/api/mcq samples `count` questions from the bank for the normalized topic.
+Gemini is only called to top the bank up when it holds fewer than
+count * MCQ_BANK_VARIETY questions younger than MCQ_BANK_MAX_AGE_DAYS, so
+popular topics become a local DB read while still varying between quizzes.
+
+Provides:
+  - topic_key(topic) — normalized key questions are banked under
+  - add_questions(topic, questions) — store new questions, skipping duplicates
+  - get_quiz(topic, count) — sample a quiz, topping up from Gemini if needed
+"""
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from config import Config
+from extensions import db
+from models.question_bank import BankQuestion
+from services.cache import make_key
+from services.gemini import generate_mcq
+
+logger = logging.getLogger(__name__)
+
+
+def topic_key(topic):
+    """Key shared by every spelling/casing/spacing of the same topic."""
+    return make_key('topic', topic)
+
+
+def _fingerprint(question):
+    normalized = ' '.join(question['question'].split()).lower()
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+_UPSERT = {'sqlite': sqlite, 'postgresql': postgresql}
+
+
+def add_questions(topic, questions):
+    """
+    Store questions for topic, skipping ones already banked.
+
+    Returns:
+        int: Number of questions added
+    """
+    key = topic_key(topic)
+    new = {}
+    for q in questions:
+        new.setdefault(_fingerprint(q), q)
+
+    existing = {
+        fp for (fp,) in db.session.query(BankQuestion.fingerprint)
+        .filter(BankQuestion.topic_key == key, BankQuestion.fingerprint.in_(list(new)))
+    }
+    rows = [
+        dict(topic_key=key, topic=topic, question=q['question'],
+             options=q['options'], answer=q['answer'], fingerprint=fp)
+        for fp, q in new.items() if fp not in existing
+    ]
+    if not rows:
+        return 0
+
+    # Another worker may bank some of the same questions between the check
+    # above and the insert; only those rows are dropped, not the batch
+    dialect = db.session.get_bind().dialect.name
+    if dialect in _UPSERT:
+        stmt = _UPSERT[dialect].insert(BankQuestion.__table__).on_conflict_do_nothing(
+            index_elements=['topic_key', 'fingerprint'])
+        # One row per execute: executemany rowcount isn't reliable on every driver
+        added = sum(db.session.execute(stmt, row).rowcount for row in rows)
+    else:
+        added = 0
+        for row in rows:
+            try:
+                with db.session.begin_nested():
+                    db.session.add(BankQuestion(**row))
+                added += 1
+            except IntegrityError:
+                pass
+    db.session.commit()
+    if added < len(rows):
+        logger.info(f"Question bank top-up for '{topic}' raced another writer; "
+                    f"skipped {len(rows) - added} duplicates")
+    return added
+
+
+def _fresh(key):
+    cutoff = datetime.utcnow() - timedelta(days=Config.MCQ_BANK_MAX_AGE_DAYS)
+    return BankQuestion.query.filter(BankQuestion.topic_key == key, BankQuestion.created_at >= cutoff)
+
+
+def get_quiz(topic, count, usage=None):
+    """
+    Return `count` questions for topic.
+
+    Samples at random from the fresh part of the bank, first generating a new
+    set with Gemini (bypassing the response cache) when the bank is too small.
+    With the bank disabled this is just generate_mcq. Tokens of any Gemini
+    call made are added to usage (a services.prompts.TokenUsage) if given.
+
+    Raises:
+        Whatever generate_mcq raises when a top-up is needed
+    """
+    if not Config.MCQ_BANK_ENABLED:
+        return generate_mcq(topic, count, usage=usage)
+
+    key = topic_key(topic)
+    generated = None
+    if _fresh(key).count() < count * Config.MCQ_BANK_VARIETY:
+        generated = generate_mcq(topic, count, use_cache=False, usage=usage)
+        added = add_questions(topic, generated)
+        logger.info(f"Question bank topped up '{topic}' with {added} new questions")
+
+    rows = _fresh(key).order_by(func.random()).limit(count).all()
+    if len(rows) < count:
+        # Top-up produced only duplicates — serve a freshly generated set instead
+        return generated or generate_mcq(topic, count, usage=usage)
+    return [row.to_dict() for row in rows]
@@ -0,0 +1,162 @@
+"""
+AI quota — per-user daily budget of AI requests and tokens, tracked in the DB.
+
+Because usage lives in the database rather than in process memory, the budget
+holds no matter how many workers are running.
+
+Provides:
+  - QuotaExceededError — raised when a user has used up today's budget
+  - consume_requests(user_id, n) — reserve n AI requests, or raise
+  - record_tokens(user_id, tokens) — add tokens used by a completed request
+  - record_usage(user_id, usage) — add a request's TokenUsage to today's budget and the template totals
+  - get_usage(user_id) — today's usage row (or None)
+  - get_template_usage(user_id) — the user's all-time usage per prompt template
+  - template_totals() — usage per prompt template across all users
+"""
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import update, func
+from sqlalchemy.exc import IntegrityError
+from config import Config
+from extensions import db
+from models.ai_usage import AIUsage, AITemplateUsage
+
+logger = logging.getLogger(__name__)
+
+
+class QuotaExceededError(Exception):
+    """Raised when a user has exhausted their daily AI budget."""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _today():
+    return datetime.utcnow().date()
+
+
+def _seconds_until_reset():
+    now = datetime.utcnow()
+    tomorrow = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+    return int((tomorrow - now).total_seconds()) + 1
+
+
+def _ensure_row(user_id, day):
+    if db.session.get(AIUsage, (user_id, day)) is not None:
+        return
+    db.session.add(AIUsage(user_id=user_id, day=day, requests=0, tokens=0))
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another worker created today's row first
+        db.session.rollback()
+
+
+def consume_requests(user_id, n=1):
+    """
+    Reserve n AI requests from user_id's budget for today.
+
+    The check and the increment are one conditional UPDATE, so concurrent
+    requests can't overshoot the limit.
+
+    Raises:
+        QuotaExceededError: If the request or token budget is used up
+    """
+    request_limit = Config.AI_DAILY_REQUEST_LIMIT
+    token_limit = Config.AI_DAILY_TOKEN_LIMIT
+    if not request_limit and not token_limit:
+        return
+
+    day = _today()
+    _ensure_row(user_id, day)
+
+    stmt = update(AIUsage)\
+        .where(AIUsage.user_id == user_id, AIUsage.day == day)\
+        .values(requests=AIUsage.requests + n)
+    if request_limit:
+        stmt = stmt.where(AIUsage.requests + n <= request_limit)
+    if token_limit:
+        stmt = stmt.where(AIUsage.tokens < token_limit)
+
+    updated = db.session.execute(stmt).rowcount
+    db.session.commit()
+    if not updated:
+        raise QuotaExceededError(
+            "You've reached today's AI usage limit. Please come back tomorrow.",
+            _seconds_until_reset()
+        )
+
+
+def record_tokens(user_id, tokens):
+    """Add tokens to user_id's usage for today."""
+    if not tokens:
+        return
+    day = _today()
+    _ensure_row(user_id, day)
+    db.session.execute(
+        update(AIUsage)
+        .where(AIUsage.user_id == user_id, AIUsage.day == day)
+        .values(tokens=AIUsage.tokens + tokens)
+    )
+    db.session.commit()
+
+
+def get_usage(user_id):
+    """Today's AIUsage row for user_id, or None if they haven't used AI today."""
+    return db.session.get(AIUsage, (user_id, _today()))
+
+
+def _ensure_template_row(user_id, template):
+    if db.session.get(AITemplateUsage, (user_id, template)) is not None:
+        return
+    db.session.add(AITemplateUsage(user_id=user_id, template=template, calls=0, prompt_tokens=0, output_tokens=0))
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another worker created the row first
+        db.session.rollback()
+
+
+def record_usage(user_id, usage):
+    """
+    Charge a completed request's Gemini tokens to user_id: today's budget
+    and the per-template totals. Requests that made no Gemini call (cache
+    or question bank hits) cost nothing.
+
+    Args:
+        usage: services.prompts.TokenUsage filled in by the request's calls
+    """
+    if not usage.calls:
+        return
+    _ensure_template_row(user_id, usage.template)
+    db.session.execute(
+        update(AITemplateUsage)
+        .where(AITemplateUsage.user_id == user_id, AITemplateUsage.template == usage.template)
+        .values(calls=AITemplateUsage.calls + usage.calls,
+                prompt_tokens=AITemplateUsage.prompt_tokens + usage.prompt_tokens,
+                output_tokens=AITemplateUsage.output_tokens + usage.output_tokens)
+    )
+    record_tokens(user_id, usage.total_tokens)
+
+
+def get_template_usage(user_id):
+    """user_id's all-time AITemplateUsage rows, most tokens first."""
+    return AITemplateUsage.query.filter_by(user_id=user_id)\
+        .order_by((AITemplateUsage.prompt_tokens + AITemplateUsage.output_tokens).desc()).all()
+
+
+def template_totals():
+    """
+    Usage per prompt template across all users.
+
+    Returns:
+        list: (template, calls, prompt_tokens, output_tokens) tuples, most tokens first
+    """
+    total = func.sum(AITemplateUsage.prompt_tokens) + func.sum(AITemplateUsage.output_tokens)
+    return db.session.query(
+        AITemplateUsage.template,
+        func.sum(AITemplateUsage.calls),
+        func.sum(AITemplateUsage.prompt_tokens),
+        func.sum(AITemplateUsage.output_tokens),
+    ).group_by(AITemplateUsage.template).order_by(total.desc()).all()
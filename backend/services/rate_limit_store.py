@@ -0,0 +1,128 @@
+"""
+SQLite rate-limit storage — Flask-Limiter counters shared across workers.
+
+memory:// keeps a separate set of counters in every Gunicorn worker, so a
+limit of 50/hour really allows 50 per worker. This backend keeps the
+fixed-window counters in one SQLite file instead, so every process on the
+host sees the same count without running Redis. It registers the
+`sqlite` scheme with the limits library:
+
+    RATELIMIT_STORAGE_URI=sqlite:///instance/ratelimit.db      (relative)
+    RATELIMIT_STORAGE_URI=sqlite:////var/lib/app/ratelimit.db  (absolute)
+
+Config uses it by default when the database itself is SQLite. Only the
+fixed-window strategy (Flask-Limiter's default) is supported.
+
+Provides:
+  - SQLiteStorage — limits.storage.Storage backed by a SQLite file
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from limits.storage import Storage
+
+logger = logging.getLogger(__name__)
+
+_PRUNE_INTERVAL = 60  # seconds between sweeps of expired counters
+
+
+class SQLiteStorage(Storage):
+    """
+    Fixed-window counters in a SQLite file shared by every process that
+    points at it. Connections are per-thread (and per-process, so a storage
+    built before Gunicorn forks is safe); the file runs in WAL mode.
+    """
+
+    STORAGE_SCHEME = ['sqlite']
+
+    def __init__(self, uri, wrap_exceptions=False, **options):
+        self.path = uri[len('sqlite:///'):]
+        self.timeout = float(options.get('timeout', 5))
+        self._local = threading.local()
+        self._pruned_at = 0.0
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS rate_limit ('
+                ' key TEXT PRIMARY KEY,'
+                ' value INTEGER NOT NULL,'
+                ' expires_at REAL NOT NULL)'
+            )
+        finally:
+            conn.close()
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def _conn(self):
+        pid = os.getpid()
+        if getattr(self._local, 'pid', None) != pid:
+            self._local.conn = self._connect()
+            self._local.pid = pid
+        return self._local.conn
+
+    def incr(self, key, expiry, amount=1):
+        """Add amount to key's counter, starting a new window if the last one expired."""
+        now = time.time()
+        conn = self._conn()
+        # One write transaction so the value read back is the one this call produced
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute(
+                'INSERT INTO rate_limit (key, value, expires_at) VALUES (?, ?, ?) '
+                'ON CONFLICT(key) DO UPDATE SET '
+                ' value = CASE WHEN expires_at <= ? THEN excluded.value ELSE value + excluded.value END,'
+                ' expires_at = CASE WHEN expires_at <= ? THEN excluded.expires_at ELSE expires_at END',
+                (key, amount, now + expiry, now, now)
+            )
+            value = conn.execute('SELECT value FROM rate_limit WHERE key = ?', (key,)).fetchone()[0]
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        self._prune(conn, now)
+        return value
+
+    def _prune(self, conn, now):
+        if now - self._pruned_at < _PRUNE_INTERVAL:
+            return
+        self._pruned_at = now
+        conn.execute('DELETE FROM rate_limit WHERE expires_at <= ?', (now,))
+
+    def get(self, key):
+        row = self._conn().execute(
+            'SELECT value FROM rate_limit WHERE key = ? AND expires_at > ?', (key, time.time())
+        ).fetchone()
+        return row[0] if row else 0
+
+    def get_expiry(self, key):
+        row = self._conn().execute(
+            'SELECT expires_at FROM rate_limit WHERE key = ? AND expires_at > ?', (key, time.time())
+        ).fetchone()
+        return row[0] if row else time.time()
+
+    def check(self):
+        try:
+            self._conn().execute('SELECT 1 FROM rate_limit LIMIT 1')
+            return True
+        except sqlite3.Error as e:
+            logger.warning(f"Rate-limit storage check failed: {e}")
+            return False
+
+    def reset(self):
+        return self._conn().execute('DELETE FROM rate_limit').rowcount
+
+    def clear(self, key):
+        self._conn().execute('DELETE FROM rate_limit WHERE key = ?', (key,))
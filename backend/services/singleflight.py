@@ -0,0 +1,96 @@
+"""
+Single-flight request coalescing.
+
+When several threads ask for the same key at once, only the first (the
+"leader") runs the call; the others wait for it and receive the same result
+or exception. Keys are forgotten as soon as the call finishes, so this only
+deduplicates work that is genuinely in flight — caching is handled separately.
+
+Provides:
+  - SingleFlight — coalescing group with per-key dedup metrics
+"""
+import threading
+from collections import OrderedDict
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into a single execution."""
+
+    def __init__(self, max_tracked_keys=1000):
+        self._lock = threading.Lock()
+        self._calls = {}
+        # Per-key metrics for the most recently used keys; totals cover everything
+        self._metrics = OrderedDict()
+        self._totals = {'calls': 0, 'executions': 0, 'deduplicated': 0}
+        self.max_tracked_keys = max_tracked_keys
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Run fn(*args, **kwargs) once for all concurrent callers of key.
+
+        Returns:
+            The leader's return value (shared by every caller)
+
+        Raises:
+            Whatever the leader's call raised
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                call.waiters += 1
+            self._record(key, 'executions' if leader else 'deduplicated')
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def _record(self, key, outcome):
+        metrics = self._metrics.pop(key, None) or {'calls': 0, 'executions': 0, 'deduplicated': 0}
+        self._metrics[key] = metrics
+        if len(self._metrics) > self.max_tracked_keys:
+            self._metrics.popitem(last=False)
+        for counters in (metrics, self._totals):
+            counters['calls'] += 1
+            counters[outcome] += 1
+
+    def in_flight(self):
+        """Number of keys currently being executed."""
+        with self._lock:
+            return len(self._calls)
+
+    def metrics(self, key=None):
+        """Per-key counters: calls, executions (upstream calls) and deduplicated callers."""
+        with self._lock:
+            if key is not None:
+                return dict(self._metrics.get(key, {'calls': 0, 'executions': 0, 'deduplicated': 0}))
+            return {k: dict(v) for k, v in self._metrics.items()}
+
+    def totals(self):
+        """Counters summed across all keys."""
+        with self._lock:
+            return dict(self._totals)
@@ -0,0 +1,30 @@
+"""
+User cache — short-lived in-process cache of user profiles for /api/auth/me.
+
+Entries are refreshed whenever a User row is updated through the ORM in this
+process, and dropped when it is deleted (see the listeners in models/user.py). Other workers keep serving their
+cached entry for up to USER_CACHE_TTL seconds and then the token's claims,
+which are only refreshed when a new token is issued — callers that need the
+latest profile everywhere should use /api/auth/me?fresh=true.
+
+Provides:
+  - get(user_id) — cached profile dict or None
+  - put(profile) — cache a profile dict (as produced by User.to_dict)
+  - invalidate(user_id) — drop a cached profile
+"""
+from config import Config
+from services.cache import MemoryCache
+
+_profiles = MemoryCache(ttl=Config.USER_CACHE_TTL, max_entries=Config.USER_CACHE_MAX_ENTRIES)
+
+
+def get(user_id):
+    return _profiles.get(int(user_id))
+
+
+def put(profile):
+    _profiles.set(int(profile['id']), profile)
+
+
+def invalidate(user_id):
+    _profiles.delete(int(user_id))
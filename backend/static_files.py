@@ -0,0 +1,163 @@
+"""
+Static file serving for the built frontend (frontend/dist).
+
+The dist folder is read once at startup into an in-memory manifest (the
+built app is a few hundred KB), so requests never touch the filesystem.
+Each file is served as-is or as a precompressed variant chosen by the
+client's Accept-Encoding: `.br` / `.gz` files written next to it by
+'flask compress-assets', or a gzip copy made at load time when no `.gz`
+exists.
+
+Caching:
+  - Vite's content-hashed files under assets/ are immutable and cached
+    for a year
+  - index.html is revalidated on every load (no-cache + ETag, 304 when
+    unchanged) so new deploys are picked up immediately
+  - other files (favicon etc.) are cached for STATIC_MAX_AGE with an ETag
+
+Provides:
+  - StaticManifest — in-memory view of a dist folder
+  - compress_assets(root) — write .gz (and .br, if brotli is installed) variants
+"""
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+from flask import Response
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+INDEX = 'index.html'
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+# Vite output: assets/<name>-<8+ char hash>.<ext>
+_HASHED = re.compile(r'^assets/.+-[A-Za-z0-9_-]{8,}\.\w+$')
+_COMPRESSIBLE = ('.html', '.js', '.mjs', '.css', '.svg', '.json', '.txt', '.map', '.xml', '.wasm')
+_MIN_COMPRESS_BYTES = 512
+# Preference order when the client accepts several
+_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def _compressible(name):
+    return name.endswith(_COMPRESSIBLE)
+
+
+class _Asset:
+    __slots__ = ('body', 'variants', 'content_type', 'etag', 'cache_control')
+
+    def __init__(self, body, variants, content_type, etag, cache_control):
+        self.body = body
+        self.variants = variants  # encoding -> compressed bytes
+        self.content_type = content_type
+        self.etag = etag
+        self.cache_control = cache_control
+
+
+class StaticManifest:
+    """In-memory index of a built frontend folder."""
+
+    def __init__(self, root):
+        self.root = root
+        self.assets = {}
+        if os.path.isdir(root):
+            self._load()
+
+    def _load(self):
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if filename.endswith(('.gz', '.br')):
+                    continue
+                full = os.path.join(dirpath, filename)
+                name = os.path.relpath(full, self.root).replace(os.sep, '/')
+                self.assets[name] = self._load_asset(name, full)
+        logger.info(f"Loaded {len(self.assets)} static files from {self.root}")
+
+    def _load_asset(self, name, full):
+        with open(full, 'rb') as f:
+            body = f.read()
+        variants = {}
+        for encoding, suffix in _ENCODINGS:
+            if os.path.exists(full + suffix):
+                with open(full + suffix, 'rb') as f:
+                    variants[encoding] = f.read()
+        if 'gzip' not in variants and _compressible(name) and len(body) >= _MIN_COMPRESS_BYTES:
+            variants['gzip'] = gzip.compress(body, 9, mtime=0)
+
+        content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        if content_type.startswith('text/') or content_type in ('application/javascript', 'image/svg+xml'):
+            content_type += '; charset=utf-8'
+        if name == INDEX:
+            cache_control = 'no-cache'
+        elif _HASHED.match(name):
+            cache_control = IMMUTABLE
+        else:
+            cache_control = f'public, max-age={Config.STATIC_MAX_AGE}'
+        etag = hashlib.blake2b(body, digest_size=12).hexdigest()
+        return _Asset(body, variants, content_type, etag, cache_control)
+
+    def lookup(self, path):
+        """The asset for a URL path, falling back to index.html for client-side routes."""
+        return self.assets.get(path) or self.assets.get(INDEX)
+
+    def response(self, path, request):
+        """
+        Build the response for path.
+
+        Returns:
+            Response or None: None if the frontend isn't built
+        """
+        asset = self.lookup(path)
+        if asset is None:
+            return None
+
+        body, encoding = asset.body, None
+        for candidate, _ in _ENCODINGS:
+            if candidate in asset.variants and request.accept_encodings[candidate]:
+                body, encoding = asset.variants[candidate], candidate
+                break
+
+        response = Response(body, content_type=asset.content_type)
+        response.headers['Cache-Control'] = asset.cache_control
+        if asset.variants:
+            response.vary.add('Accept-Encoding')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        # Each encoding is a different representation, so it gets its own tag
+        response.set_etag(f'{asset.etag}-{encoding}' if encoding else asset.etag)
+        return response.make_conditional(request)
+
+
+def compress_assets(root, level=9):
+    """
+    Write .gz (and .br when the brotli package is installed) next to every
+    compressible file in root.
+
+    Returns:
+        tuple: (files compressed, whether brotli variants were written)
+    """
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+        logger.warning("brotli is not installed; writing gzip variants only")
+
+    count = 0
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            full = os.path.join(dirpath, filename)
+            if not _compressible(filename):
+                continue
+            with open(full, 'rb') as f:
+                body = f.read()
+            if len(body) < _MIN_COMPRESS_BYTES:
+                continue
+            with open(full + '.gz', 'wb') as f:
+                f.write(gzip.compress(body, level, mtime=0))
+            if brotli is not None:
+                with open(full + '.br', 'wb') as f:
+                    f.write(brotli.compress(body, quality=11))
+            count += 1
+    return count, brotli is not None
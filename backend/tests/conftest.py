@@ -0,0 +1,71 @@
+"""
+Shared pytest setup.
+
+Backend modules import each other from the backend directory
+(`from config import Config`), so it goes on sys.path. Config reads the
+environment at import, so test settings are applied before anything
+imports it: the fake Gemini model, synchronous history writes, and no
+HTTP rate limits.
+"""
+import logging
+import os
+import sys
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+
+os.environ.setdefault('GEMINI_FAKE', 'true')
+os.environ.setdefault('GEMINI_FAKE_LATENCY', '0')
+os.environ.setdefault('HISTORY_WRITE_MODE', 'sync')
+os.environ.setdefault('RATELIMIT_ENABLED', 'false')
+os.environ.setdefault('SECRET_KEY', 'test-secret-key-' + 'x' * 32)
+os.environ.setdefault('JWT_SECRET_KEY', 'test-jwt-secret-key-' + 'x' * 32)
+os.environ.pop('AUTO_INIT_DB', None)
+logging.getLogger('config').setLevel(logging.ERROR)
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture
+def db_url(tmp_path, monkeypatch):
+    """A fresh SQLite database file for one test."""
+    from config import Config
+    url = 'sqlite:///' + str(tmp_path / 'test.db')
+    monkeypatch.setattr(Config, 'SQLALCHEMY_DATABASE_URI', url)
+    monkeypatch.setenv('DATABASE_URL', url)
+    return url
+
+
+@pytest.fixture
+def app(db_url):
+    """App bound to a fresh database with the schema set up (as 'flask init-db' would)."""
+    from app import create_app
+    from migrations import init_db
+    app = create_app()
+    with app.app_context():
+        init_db()
+    yield app
+    from extensions import db
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def user_id(app):
+    """Id of a freshly registered user."""
+    from extensions import db
+    from models.user import User
+    with app.app_context():
+        user = User(username='student', password='x', age=14)
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+
+@pytest.fixture
+def auth_headers(app, user_id):
+    """Authorization header carrying a JWT for user_id."""
+    from flask_jwt_extended import create_access_token
+    with app.app_context():
+        return {'Authorization': f'Bearer {create_access_token(identity=str(user_id))}'}
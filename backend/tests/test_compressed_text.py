@@ -0,0 +1,56 @@
+"""CompressedText round trips through the history table."""
+import zlib
+import pytest
+from sqlalchemy import text
+from extensions import db
+from models.history import History
+from models.types import compress_text, decompress_text, RAW, ZLIB
+from services.history_store import save_entry
+
+LONG = 'Photosynthesis turns light into chemical energy. ' * 40
+
+
+def _stored(entry_id):
+    return db.session.execute(text('SELECT response FROM history WHERE id = :id'), {'id': entry_id}).scalar()
+
+
+def _reload(entry_id):
+    db.session.expire_all()
+    return db.session.get(History, entry_id).response
+
+
+@pytest.mark.parametrize('response, stored_as', [('Short answer', str), (LONG, bytes)])
+def test_round_trip(app, user_id, response, stored_as):
+    with app.app_context():
+        entry = save_entry(History(user_id=user_id, type='explain', topic='T', response=response))
+        raw = _stored(entry.id)
+        assert isinstance(raw, stored_as)
+        if stored_as is bytes:
+            assert raw[:1] == ZLIB
+            assert len(raw) < len(LONG)
+        assert _reload(entry.id) == response
+
+
+def test_legacy_and_raw_rows_read_back(app, user_id):
+    with app.app_context():
+        entry = save_entry(History(user_id=user_id, type='explain', topic='T', response='x'))
+        # Rows written before compression existed are plain TEXT, whatever their length
+        db.session.execute(text('UPDATE history SET response = :r WHERE id = :id'), {'r': LONG, 'id': entry.id})
+        db.session.commit()
+        assert _reload(entry.id) == LONG
+
+        db.session.execute(text('UPDATE history SET response = :r WHERE id = :id'),
+                           {'r': RAW + 'stored raw ✓'.encode('utf-8'), 'id': entry.id})
+        db.session.commit()
+        assert _reload(entry.id) == 'stored raw ✓'
+
+
+def test_format_header():
+    assert compress_text('short', 512) == 'short'
+    packed = compress_text(LONG, 512)
+    assert packed[:1] == ZLIB and zlib.decompress(packed[1:]).decode('utf-8') == LONG
+    # Text zlib can't shrink keeps the raw header rather than growing
+    assert compress_text('ab', 1) == RAW + b'ab'
+    assert decompress_text(RAW + b'ab') == 'ab'
+    with pytest.raises(ValueError):
+        decompress_text(b'\x07payload')
@@ -0,0 +1,36 @@
+"""ETags on history-derived responses follow the user's history version."""
+import pytest
+from models.history import History
+from services.history_store import save_entry
+
+
+@pytest.mark.parametrize('path', ['/api/history', '/api/stats'])
+def test_etag_revalidation(app, user_id, auth_headers, path):
+    client = app.test_client()
+
+    first = client.get(path, headers=auth_headers)
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    assert etag.startswith('W/')
+    assert 'Authorization' in first.headers['Vary']
+    assert first.headers['Cache-Control'] == 'private, no-cache'
+
+    unchanged = client.get(path, headers={**auth_headers, 'If-None-Match': etag})
+    assert unchanged.status_code == 304
+    assert unchanged.headers['ETag'] == etag
+    assert 'Authorization' in unchanged.headers['Vary']
+
+    with app.app_context():
+        save_entry(History(user_id=user_id, type='explain', topic='Gravity', response='r'))
+
+    changed = client.get(path, headers={**auth_headers, 'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+
+
+def test_history_etag_depends_on_query(app, auth_headers):
+    client = app.test_client()
+    page = client.get('/api/history?limit=5', headers=auth_headers).headers['ETag']
+    other = client.get('/api/history?limit=6', headers={**auth_headers, 'If-None-Match': page})
+    assert other.status_code == 200
+    assert other.headers['ETag'] != page
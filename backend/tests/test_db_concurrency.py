@@ -0,0 +1,80 @@
+"""
+Parallel History writers against one SQLite file (see bench/db_concurrency.py
+for the throughput version). Guards against "database is locked".
+"""
+import logging
+import multiprocessing
+import threading
+from sqlalchemy import text
+
+PROCESSES = 3
+THREADS = 4
+BATCHES = 10
+BATCH_SIZE = 3
+
+
+def _writer_process(index, user_ids, results):
+    logging.disable(logging.WARNING)
+    from app import create_app
+    from extensions import db
+    from models.history import History
+    from services.history_store import save_entries
+
+    app = create_app()
+    errors = []
+    written = [0]
+    lock = threading.Lock()
+
+    def writer(n):
+        user_id = user_ids[(index * THREADS + n) % len(user_ids)]
+        with app.app_context():
+            for i in range(BATCHES):
+                entries = [History(user_id=user_id, type='explain', topic=f'Topic {j}',
+                                   response=f'process {index} thread {n} batch {i}')
+                           for j in range(BATCH_SIZE)]
+                try:
+                    save_entries(entries)
+                    with lock:
+                        written[0] += len(entries)
+                except Exception as e:
+                    db.session.rollback()
+                    with lock:
+                        errors.append(f'{type(e).__name__}: {e}')
+
+    pool = [threading.Thread(target=writer, args=(n,)) for n in range(THREADS)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    results.put((written[0], errors))
+
+
+def test_parallel_writers_do_not_lock(app):
+    from extensions import db
+    from models.history import History
+    from models.user import User
+    from models.user_stats import UserStats
+
+    with app.app_context():
+        assert db.session.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+        users = [User(username=f'writer{n}', password='x', age=14) for n in range(4)]
+        db.session.add_all(users)
+        db.session.commit()
+        user_ids = [u.id for u in users]
+
+    ctx = multiprocessing.get_context('spawn')
+    results = ctx.Queue()
+    procs = [ctx.Process(target=_writer_process, args=(i, user_ids, results)) for i in range(PROCESSES)]
+    for p in procs:
+        p.start()
+    outcomes = [results.get(timeout=120) for _ in procs]
+    for p in procs:
+        p.join(30)
+
+    expected = PROCESSES * THREADS * BATCHES * BATCH_SIZE
+    assert [e for _, errors in outcomes for e in errors] == []
+    assert sum(written for written, _ in outcomes) == expected
+    with app.app_context():
+        assert History.query.count() == expected
+        # The rollup was updated in the same transactions
+        assert db.session.query(db.func.sum(UserStats.session_count)).scalar() == expected
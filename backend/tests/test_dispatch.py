@@ -0,0 +1,26 @@
+"""AIDispatcher admission and timeouts."""
+import threading
+import pytest
+from services.dispatch import AIDispatcher, ServiceBusyError
+
+
+def test_waiting_for_a_slot_is_bounded():
+    dispatcher = AIDispatcher(max_concurrency=2, max_queue=2, queue_timeout=0.1, call_timeout=5)
+    with dispatcher.slot():
+        with dispatcher.slot():
+            # Both slots are held on this thread, so the pooled call can't start
+            with pytest.raises(ServiceBusyError):
+                dispatcher.run(lambda: 'never')
+    assert dispatcher.run(lambda: 'ok') == 'ok'
+
+
+def test_call_abandoned_by_its_caller_is_skipped():
+    dispatcher = AIDispatcher(max_concurrency=1, max_queue=2, queue_timeout=5, call_timeout=0.1)
+    ran = threading.Event()
+    with dispatcher.slot():
+        with pytest.raises(ServiceBusyError):
+            dispatcher.run(ran.set)
+    # The slot frees up after the caller gave up; the call must not run late
+    assert dispatcher.run(lambda: 'ok') == 'ok'
+    assert not ran.is_set()
+    assert dispatcher.depth() == 0
@@ -0,0 +1,30 @@
+"""Explain prompts and cache keys agree on the age band."""
+import pytest
+from services import gemini
+
+
+@pytest.mark.parametrize('ages', [(11, 13), (14, 16), (30, 65)])
+def test_ages_sharing_a_cache_entry_share_the_prompt(ages, monkeypatch):
+    seen = {}
+    monkeypatch.setattr(gemini, '_cached', lambda key, produce: seen.setdefault(key, set()).add(produce.args[0]))
+    for age in ages:
+        gemini.explain_topic('Gravity', 'English', 'Short', age)
+    assert len(seen) == 1
+    assert len(next(iter(seen.values()))) == 1
+
+
+def test_prompt_names_the_band():
+    assert 'a student aged 11-13' in gemini._explain_prompt('Gravity', 'English', 'Short', '11-13')
+    assert 'an adult learner' in gemini._explain_prompt('Gravity', 'English', 'Short', 'adult')
+
+
+@pytest.mark.parametrize('band, code_rule', [
+    ('8-10', 'Do not use code blocks'),
+    ('11-13', 'include short, simple code examples'),
+    ('14-16', 'you MUST include relevant code examples'),
+    ('adult', 'you MUST include relevant code examples'),
+])
+def test_code_example_rule_follows_the_band(band, code_rule):
+    prompt = gemini._explain_prompt('Python loops', 'English', 'Short', band)
+    assert code_rule in prompt
+    assert 'over 12' not in prompt
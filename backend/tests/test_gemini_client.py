@@ -0,0 +1,78 @@
+"""GeminiClient retry behaviour."""
+import threading
+from services.gemini_client import GeminiClient, AdaptiveLimiter, CircuitBreaker
+from services.fake_gemini import ResourceExhausted
+
+
+class _Response:
+    text = 'ok'
+    usage_metadata = None
+
+
+class _ThrottleOnce:
+    def __init__(self):
+        self.calls = 0
+
+    def generate_content(self, prompt, **kwargs):
+        self.calls += 1
+        if self.calls == 1:
+            raise ResourceExhausted('429 Resource has been exhausted. Please retry in 1s.')
+        return _Response()
+
+
+def _client(model, sleep):
+    return GeminiClient(lambda: model, AdaptiveLimiter(min_limit=1, max_limit=1), CircuitBreaker(threshold=5),
+                        max_retries=2, backoff_base=0.01, backoff_max=0.01, acquire_timeout=1, sleep=sleep)
+
+
+def test_limiter_slot_is_free_during_backoff():
+    seen = {}
+
+    def sleep(delay):
+        # Another caller must be able to take the only slot while this one backs off
+        seen['in_flight'] = client.limiter._in_flight
+        seen['acquired'] = client.limiter.acquire(timeout=0)
+        if seen['acquired']:
+            client.limiter.release()
+
+    client = _client(_ThrottleOnce(), sleep)
+    assert client.generate('prompt') == 'ok'
+    assert seen == {'in_flight': 0, 'acquired': True}
+    assert client.limiter._in_flight == 0
+
+
+def test_stream_slot_is_free_during_backoff():
+    class _StreamThrottleOnce(_ThrottleOnce):
+        def generate_content(self, prompt, **kwargs):
+            self.calls += 1
+            if self.calls == 1:
+                raise ResourceExhausted('429 Resource has been exhausted. Please retry in 1s.')
+            return iter([_Response()])
+
+    seen = {}
+
+    def sleep(delay):
+        seen['in_flight'] = client.limiter._in_flight
+
+    client = _client(_StreamThrottleOnce(), sleep)
+    assert list(client.stream('prompt')) == ['ok']
+    assert seen == {'in_flight': 0}
+
+
+def test_concurrent_call_proceeds_while_other_backs_off():
+    backing_off = threading.Event()
+    release = threading.Event()
+    model = _ThrottleOnce()
+
+    def sleep(delay):
+        backing_off.set()
+        release.wait(5)
+
+    client = _client(model, sleep)
+    first = threading.Thread(target=client.generate, args=('first',))
+    first.start()
+    assert backing_off.wait(5)
+    # With limit 1, this only succeeds if the backing-off call gave up its slot
+    assert client.generate('second') == 'ok'
+    release.set()
+    first.join(5)
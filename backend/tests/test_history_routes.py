@@ -0,0 +1,140 @@
+"""History bulk delete, export and keyset pagination."""
+import csv
+import io
+import json
+from datetime import datetime
+import pytest
+from extensions import db
+from models.history import History
+from services.history_store import save_entries
+
+
+def _seed(app, user_id, rows):
+    """rows: (type, topic, created_at) tuples. Returns the ids in order."""
+    with app.app_context():
+        entries = [History(user_id=user_id, type=t, topic=topic, response=f'{t} {topic}', created_at=at,
+                           meta_data={'score': 1, 'total': 2} if t == 'mcq_score' else None)
+                   for t, topic, at in rows]
+        save_entries(entries)
+        return [e.id for e in entries]
+
+
+def _remaining(app, user_id):
+    with app.app_context():
+        return sorted((e.type, e.topic) for e in History.query.filter_by(user_id=user_id))
+
+
+ROWS = [
+    ('explain', 'Gravity', datetime(2026, 1, 1, 10)),
+    ('mcq', 'Gravity', datetime(2026, 1, 2, 10)),
+    ('mcq_score', 'Gravity', datetime(2026, 1, 3, 10)),
+    ('explain', 'Cells', datetime(2026, 1, 4, 10)),
+]
+
+
+@pytest.mark.parametrize('body, left', [
+    ({'type': 'mcq'}, [('explain', 'Cells'), ('explain', 'Gravity'), ('mcq_score', 'Gravity')]),
+    ({'topic': 'Gravity'}, [('explain', 'Cells')]),
+    ({'topic': 'Gravity', 'type': 'explain'}, [('explain', 'Cells'), ('mcq', 'Gravity'), ('mcq_score', 'Gravity')]),
+    ({'before': '2026-01-02T10:00:00'}, [('explain', 'Cells'), ('mcq', 'Gravity'), ('mcq_score', 'Gravity')]),
+    ({'after': '2026-01-03'}, [('explain', 'Gravity'), ('mcq', 'Gravity')]),
+    ({'after': '2026-01-02', 'before': '2026-01-04'}, [('explain', 'Cells'), ('explain', 'Gravity')]),
+    ({'all': True}, []),
+])
+def test_bulk_delete_filters(app, user_id, auth_headers, body, left):
+    _seed(app, user_id, ROWS)
+    response = app.test_client().delete('/api/history', json=body, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.get_json()['deleted'] == len(ROWS) - len(left)
+    assert _remaining(app, user_id) == left
+
+
+def test_bulk_delete_by_ids_only_touches_own_rows(app, user_id, auth_headers):
+    from models.user import User
+    with app.app_context():
+        other = User(username='other', password='x', age=14)
+        db.session.add(other)
+        db.session.commit()
+        other_id = other.id
+    mine = _seed(app, user_id, ROWS[:2])
+    theirs = _seed(app, other_id, ROWS[:1])
+    response = app.test_client().delete('/api/history', json={'ids': [mine[0], theirs[0]]}, headers=auth_headers)
+    assert response.get_json()['deleted'] == 1
+    assert _remaining(app, user_id) == [('mcq', 'Gravity')]
+    assert _remaining(app, other_id) == [('explain', 'Gravity')]
+
+
+@pytest.mark.parametrize('body', [{}, {'all': 'yes'}, {'type': 'bogus'}, {'before': 'yesterday'}, {'ids': ['1']}])
+def test_bulk_delete_rejects_unfiltered_or_invalid(app, user_id, auth_headers, body):
+    _seed(app, user_id, ROWS)
+    response = app.test_client().delete('/api/history', json=body, headers=auth_headers)
+    assert response.status_code == 400
+    assert len(_remaining(app, user_id)) == len(ROWS)
+
+
+def test_bulk_delete_dates_with_offsets_are_converted_to_utc(app, user_id, auth_headers):
+    _seed(app, user_id, ROWS)
+    # 2026-01-02T12:00+05:00 is 07:00 UTC, before the mcq row at 10:00 UTC
+    response = app.test_client().delete('/api/history', json={'before': '2026-01-02T12:00:00+05:00'},
+                                        headers=auth_headers)
+    assert response.get_json()['deleted'] == 1
+    response = app.test_client().delete('/api/history', json={'before': '2026-01-02T12:00:00-05:00'},
+                                        headers=auth_headers)
+    assert response.get_json()['deleted'] == 1
+    assert ('mcq', 'Gravity') not in _remaining(app, user_id)
+
+
+def test_export_ndjson_and_csv(app, user_id, auth_headers):
+    _seed(app, user_id, ROWS)
+    client = app.test_client()
+
+    response = client.get('/api/history/export', headers=auth_headers)
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [(r['type'], r['topic']) for r in records] == [(t, topic) for t, topic, _ in ROWS]
+    assert records[2]['meta_data'] == {'score': 1, 'total': 2}
+
+    response = client.get('/api/history/export?format=csv', headers=auth_headers)
+    assert response.mimetype == 'text/csv'
+    assert 'attachment' in response.headers['Content-Disposition']
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert [r['topic'] for r in rows] == [topic for _, topic, _ in ROWS]
+    assert json.loads(rows[2]['meta_data']) == {'score': 1, 'total': 2}
+
+    assert client.get('/api/history/export?format=xml', headers=auth_headers).status_code == 400
+
+
+def test_pagination_breaks_created_at_ties_by_id(app, user_id, auth_headers):
+    same = datetime(2026, 2, 1, 9)
+    ids = _seed(app, user_id, [('explain', f'Topic {n}', same) for n in range(5)]
+                + [('explain', 'Older', datetime(2026, 1, 1))])
+    client = app.test_client()
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        url = '/api/history?limit=2' + (f'&cursor={cursor}' if cursor else '')
+        body = client.get(url, headers=auth_headers).get_json()
+        seen.extend(e['id'] for e in body['history'])
+        pages += 1
+        cursor = body['next_cursor']
+        if cursor is None:
+            break
+
+    # Newest first, ties on created_at by descending id, nothing skipped or repeated
+    assert seen == sorted(ids[:5], reverse=True) + [ids[5]]
+    assert pages == 3
+
+
+def test_last_page_has_no_cursor(app, user_id, auth_headers):
+    _seed(app, user_id, ROWS)
+    body = app.test_client().get('/api/history?limit=4', headers=auth_headers).get_json()
+    assert len(body['history']) == 4
+    assert body['next_cursor'] is None
+
+
+@pytest.mark.parametrize('cursor', ['not-base64!', 'bm8tc2VwYXJhdG9y', 'MjAyNi0wMS0wMXxub3QtYW4taWQ='])
+def test_malformed_cursor_is_rejected(app, auth_headers, cursor):
+    response = app.test_client().get(f'/api/history?cursor={cursor}', headers=auth_headers)
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Invalid cursor'
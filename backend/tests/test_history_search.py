@@ -0,0 +1,59 @@
+"""History search index readiness."""
+from sqlalchemy import text
+from extensions import db
+from services import history_search
+
+
+def test_missing_index_is_rechecked(app, monkeypatch, caplog):
+    monkeypatch.setattr(history_search, '_RECHECK_SECONDS', 0)
+    with app.app_context():
+        with db.engine.begin() as conn:
+            conn.execute(text(f'DROP TABLE {history_search.SEARCH_TABLE}'))
+        history_search._ready.clear()
+        assert not history_search._sqlite_index_ready()
+        assert 'not indexed for search' in caplog.text
+
+        # Created later (e.g. by a migration run against the live database)
+        with db.engine.begin() as conn:
+            conn.execute(text(
+                f"CREATE VIRTUAL TABLE {history_search.SEARCH_TABLE} USING fts5(topic, body, owner)"
+            ))
+        assert history_search._sqlite_index_ready()
+
+
+def test_missing_index_is_not_rechecked_within_ttl(app, monkeypatch):
+    monkeypatch.setattr(history_search, '_RECHECK_SECONDS', 3600)
+    with app.app_context():
+        with db.engine.begin() as conn:
+            conn.execute(text(f'DROP TABLE {history_search.SEARCH_TABLE}'))
+        history_search._ready.clear()
+        history_search._missing.clear()
+        assert not history_search._sqlite_index_ready()
+        with db.engine.begin() as conn:
+            conn.execute(text(
+                f"CREATE VIRTUAL TABLE {history_search.SEARCH_TABLE} USING fts5(topic, body, owner)"
+            ))
+        assert not history_search._sqlite_index_ready()
+
+
+def test_entries_saved_while_index_missing_are_caught_up(app, user_id, monkeypatch):
+    from models.history import History
+    from services.history_store import save_entry
+    monkeypatch.setattr(history_search, '_RECHECK_SECONDS', 0)
+    with app.app_context():
+        with db.engine.begin() as conn:
+            conn.execute(text(f'DROP TABLE {history_search.SEARCH_TABLE}'))
+        history_search._ready.clear()
+        save_entry(History(user_id=user_id, type='explain', topic='Volcanoes', response='Magma rises'))
+
+        with db.engine.begin() as conn:
+            history_search.create_search_index(conn)
+        # Another worker noticed the table was missing and now sees it again
+        history_search._missing[str(db.engine.url)] = 0
+        save_entry(History(user_id=user_id, type='explain', topic='Glaciers', response='Ice flows'))
+
+        assert [r['topic'] for r in history_search.search_history(user_id, 'magma')[0]] == ['Volcanoes']
+        assert [r['topic'] for r in history_search.search_history(user_id, 'ice')[0]] == ['Glaciers']
+        # Caught up once; later writes index normally
+        save_entry(History(user_id=user_id, type='explain', topic='Rivers', response='Water flows'))
+        assert len(history_search.search_history(user_id, 'flows')[0]) == 2
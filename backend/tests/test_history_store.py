@@ -0,0 +1,68 @@
+"""The incrementally maintained UserStats rollup must match a full recompute."""
+from extensions import db
+from models.history import History
+from models.user import User
+from models.user_stats import UserStats
+from services import history_store
+
+FIELDS = ('session_count', 'mcq_count', 'correct_answers', 'total_answers', 'topics_learned')
+
+
+def _entry(user_id, type_, topic, score=None):
+    meta = {'score': score[0], 'total': score[1]} if score else None
+    return History(user_id=user_id, type=type_, topic=topic, response='r', meta_data=meta)
+
+
+def _assert_rollup_matches(user_id):
+    db.session.expire_all()
+    stats = db.session.get(UserStats, user_id)
+    incremental = {name: getattr(stats, name) for name in FIELDS}
+    assert incremental == history_store._compute_stats(user_id)
+    version = stats.history_version
+    rebuilt = history_store.rebuild_user_stats(user_id)
+    assert {name: getattr(rebuilt, name) for name in FIELDS} == incremental
+    db.session.rollback()
+    return version
+
+
+def test_rollup_tracks_saves_and_deletes(app):
+    with app.app_context():
+        user = User(username='ada', password='x', age=14)
+        db.session.add(user)
+        db.session.commit()
+        uid = user.id
+        versions = []
+
+        history_store.save_entries([
+            _entry(uid, 'explain', 'Gravity'), _entry(uid, 'mcq', 'Gravity'),
+            _entry(uid, 'explain', 'Cells'), _entry(uid, 'mcq_score', 'Gravity', (3, 5)),
+        ])
+        versions.append(_assert_rollup_matches(uid))
+
+        only_mcq = history_store.save_entry(_entry(uid, 'mcq', 'Atoms'))
+        history_store.save_entry(_entry(uid, 'mcq_score', 'Atoms', (4, 4)))
+        history_store.save_entry(_entry(uid, 'explain', 'Cells'))  # repeat topic
+        versions.append(_assert_rollup_matches(uid))
+
+        # Deleting a topic's last entry removes it from topics_learned
+        history_store.delete_entry(db.session.get(History, only_mcq.id))
+        versions.append(_assert_rollup_matches(uid))
+
+        # Deleting one of two entries for a topic keeps it
+        cells = History.query.filter_by(user_id=uid, topic='Cells').first()
+        history_store.delete_entry(cells)
+        versions.append(_assert_rollup_matches(uid))
+
+        # Bulk deletes: all scores, then a topic's remaining rows
+        assert history_store.delete_entries(uid, type_='mcq_score') == 2
+        versions.append(_assert_rollup_matches(uid))
+        ids = [e.id for e in History.query.filter_by(user_id=uid, topic='Gravity')]
+        assert history_store.delete_entries(uid, ids=ids) == 2
+        versions.append(_assert_rollup_matches(uid))
+
+        assert history_store.delete_entries(uid) == 1
+        versions.append(_assert_rollup_matches(uid))
+        assert db.session.get(UserStats, uid).topics_learned == 0
+
+        # Every write bumped the version
+        assert versions == sorted(set(versions))
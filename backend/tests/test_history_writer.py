@@ -0,0 +1,62 @@
+"""Write-behind history: queued rows, flush_pending, and the full-queue fallback."""
+import pytest
+from config import Config
+from models.history import History
+from services import history_writer
+from services.history_writer import HistoryWriter, log_entry, flush_pending
+
+
+@pytest.fixture
+def writer(app, monkeypatch):
+    """A fresh writer bound to app, in 'async' mode."""
+    writer = HistoryWriter(max_queue=1, batch_size=10, flush_interval=0.05)
+    writer.app = app
+    monkeypatch.setattr(Config, 'HISTORY_WRITE_MODE', 'async')
+    monkeypatch.setattr(history_writer, '_writer', writer)
+    yield writer
+    writer.close()
+
+
+def _entry(user_id, topic):
+    return History(user_id=user_id, type='explain', topic=topic, response=f'About {topic}')
+
+
+def _topics(app, user_id):
+    with app.app_context():
+        return sorted(e.topic for e in History.query.filter_by(user_id=user_id))
+
+
+def test_flush_pending_writes_queued_rows(app, user_id, writer):
+    with app.app_context():
+        entry = log_entry(_entry(user_id, 'Tides'))
+        assert entry.id is None  # queued, not saved yet
+        flush_pending()
+    assert writer.depth() == 0
+    assert writer.written == 1
+    assert _topics(app, user_id) == ['Tides']
+
+
+def test_full_queue_writes_inline(app, user_id, writer, monkeypatch):
+    # Keep the flusher from draining the queue so the second entry finds it full
+    monkeypatch.setattr(writer, '_ensure_thread', lambda: None)
+    with app.app_context():
+        queued = log_entry(_entry(user_id, 'Tides'))
+        inline = log_entry(_entry(user_id, 'Atoms'))
+        assert queued.id is None
+        assert inline.id is not None
+    assert writer.overflowed == 1
+    assert _topics(app, user_id) == ['Atoms']
+
+    # Once the flusher runs, the queued entry is written too
+    monkeypatch.delattr(writer, '_ensure_thread')
+    writer._ensure_thread()
+    flush_pending()
+    assert _topics(app, user_id) == ['Atoms', 'Tides']
+
+
+def test_sync_mode_bypasses_queue(app, user_id, writer, monkeypatch):
+    monkeypatch.setattr(Config, 'HISTORY_WRITE_MODE', 'sync')
+    with app.app_context():
+        entry = log_entry(_entry(user_id, 'Cells'))
+        assert entry.id is not None
+    assert writer.depth() == 0 and writer.written == 0
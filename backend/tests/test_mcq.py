@@ -0,0 +1,126 @@
+"""MCQ output parsing (the frontend no longer parses questions itself)."""
+import json
+import re
+import pytest
+from services import gemini
+from services.mcq import parse_mcq, parse_mcq_sections, MalformedOutputError
+
+
+def _q(n, answer='b'):
+    return {'question': f'Question {n}?', 'options': ['one', 'two', 'three', 'four'], 'answer': answer}
+
+
+def test_json_array_and_object():
+    expected = [{'question': 'Question 1?', 'options': ['one', 'two', 'three', 'four'], 'answer': 'b'}]
+    assert parse_mcq(json.dumps([_q(1)]), 1) == expected
+    assert parse_mcq(json.dumps({'questions': [_q(1)]}), 1) == expected
+    assert parse_mcq('```json\n' + json.dumps([_q(1)]) + '\n```', 1) == expected
+
+
+def test_json_is_normalized_and_invalid_items_dropped():
+    messy = {'question': '  Question 2?  ', 'options': ['a) one', 'B. two', 'c: three', 'four'], 'answer': 'C) three'}
+    broken = {'question': 'No options?', 'options': ['one'], 'answer': 'a'}
+    questions = parse_mcq(json.dumps([broken, messy, _q(3), _q(4)]), 2)
+    assert questions[0] == {'question': 'Question 2?', 'options': ['one', 'two', 'three', 'four'], 'answer': 'c'}
+    assert len(questions) == 2  # trimmed to the requested count
+
+
+def test_legacy_text_format():
+    raw = """Q1. What is H2O?
+a) Water
+b) Salt
+c) Sugar
+d) Sand
+Answer: a
+
+Q2. Which planet is red?
+a) Venus
+b) Mars
+c) Earth
+d) Jupiter
+Answer: B"""
+    assert parse_mcq(raw, 2) == [
+        {'question': 'What is H2O?', 'options': ['Water', 'Salt', 'Sugar', 'Sand'], 'answer': 'a'},
+        {'question': 'Which planet is red?', 'options': ['Venus', 'Mars', 'Earth', 'Jupiter'], 'answer': 'b'},
+    ]
+
+
+@pytest.mark.parametrize('raw, count', [
+    ('', 1),
+    ('Sorry, I cannot help with that.', 1),
+    (json.dumps({'answer': 'a'}), 1),
+    (json.dumps([_q(1)]), 2),
+    (json.dumps([{**_q(1), 'answer': 'e'}]), 1),
+])
+def test_malformed_output_raises(raw, count):
+    with pytest.raises(MalformedOutputError):
+        parse_mcq(raw, count)
+
+
+def test_sections():
+    raw = json.dumps([{'topic': 'A', 'questions': [_q(1), _q(2)]}, {'topic': 'B', 'questions': [_q(3)]}])
+    sections = parse_mcq_sections(raw, [2, 1])
+    assert [len(s) for s in sections] == [2, 1]
+    assert sections[1][0]['question'] == 'Question 3?'
+
+
+@pytest.mark.parametrize('raw', [
+    'not json',
+    json.dumps([{'topic': 'A', 'questions': [_q(1)]}]),  # one section missing
+    json.dumps([{'topic': 'A', 'questions': [_q(1)]}, {'topic': 'B', 'questions': []}]),  # one short
+    json.dumps([{'topic': 'A', 'questions': [_q(1)]}, 'B']),
+])
+def test_malformed_sections_raise(raw):
+    with pytest.raises(MalformedOutputError):
+        parse_mcq_sections(raw, [1, 1])
+
+
+def test_mcq_route_maps_malformed_output_to_502(app, auth_headers, monkeypatch):
+    monkeypatch.setattr(gemini, '_upstream', lambda *args, **kwargs: 'Here are some questions!')
+    response = app.test_client().post('/api/mcq', json={'topic': 'Volcanoes', 'count': 5}, headers=auth_headers)
+    assert response.status_code == 502
+    assert 'error' in response.get_json()
+
+
+def test_pack_batch_fits_small_requests_in_one_prompt():
+    assert gemini._pack_batch([('A', 5), ('B', 10), ('C', 3)], 50) == [[(0, 5), (1, 10), (2, 3)]]
+
+
+def test_pack_batch_splits_large_requests():
+    chunks = gemini._pack_batch([('A', 30), ('B', 30), ('C', 5)], 25)
+    assert chunks == [[(0, 25)], [(0, 5), (1, 20)], [(1, 10), (2, 5)]]
+    for chunk in chunks:
+        assert sum(count for _, count in chunk) <= 25
+    # Every request's parts add up to what it asked for
+    totals = {}
+    for chunk in chunks:
+        for index, count in chunk:
+            totals[index] = totals.get(index, 0) + count
+    assert totals == {0: 30, 1: 30, 2: 5}
+
+
+def test_pack_batch_edge_cases():
+    assert gemini._pack_batch([], 10) == []
+    assert gemini._pack_batch([('A', 0), ('B', 2)], 10) == [[(1, 2)]]
+    assert gemini._pack_batch([('A', 3)], 1) == [[(0, 1)], [(0, 1)], [(0, 1)]]
+
+
+def test_generate_mcq_batch_respects_token_budget(monkeypatch):
+    from config import Config
+    monkeypatch.setattr(Config, 'MCQ_BATCH_MAX_OUTPUT_TOKENS', 1200)
+    monkeypatch.setattr(Config, 'MCQ_TOKENS_PER_QUESTION', 120)  # 10 questions per prompt
+    prompts = []
+
+    def fake_upstream(prompt, **kwargs):
+        prompts.append(prompt)
+        sections = re.findall(r'^\d+\. "(.+)": exactly (\d+) questions$', prompt, re.MULTILINE)
+        return json.dumps([{'topic': topic, 'questions': [_q(f'{topic}-{n}') for n in range(int(count))]}
+                           for topic, count in sections])
+
+    monkeypatch.setattr(gemini, '_upstream', fake_upstream)
+    results = gemini.generate_mcq_batch([('Tides', 12), ('Atoms', 4), ('Cells', 2)])
+
+    assert len(prompts) == 2
+    assert [len(r) for r in results] == [12, 4, 2]
+    assert all(q['question'].startswith('Question Tides-') for q in results[0])
+    assert all(q['question'].startswith('Question Atoms-') for q in results[1])
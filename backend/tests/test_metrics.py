@@ -0,0 +1,23 @@
+"""/metrics is only served with a scrape token (or in debug mode)."""
+from config import Config
+
+
+def test_metrics_hidden_without_token(app, monkeypatch):
+    monkeypatch.setattr(Config, 'METRICS_TOKEN', '')
+    assert app.test_client().get('/metrics').status_code == 404
+
+
+def test_metrics_open_in_debug_without_token(app, monkeypatch):
+    monkeypatch.setattr(Config, 'METRICS_TOKEN', '')
+    app.debug = True
+    assert app.test_client().get('/metrics').status_code == 200
+
+
+def test_metrics_require_the_token(app, monkeypatch):
+    monkeypatch.setattr(Config, 'METRICS_TOKEN', 'scrape-token')
+    client = app.test_client()
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    response = client.get('/metrics', headers={'Authorization': 'Bearer scrape-token'})
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
@@ -0,0 +1,43 @@
+"""Login verifies and upgrades password hashes, inline and through the pool."""
+import pytest
+from config import Config
+from extensions import db
+from models.user import User
+from services import passwords
+
+
+@pytest.fixture(params=[0, 1], ids=['inline', 'pool'])
+def hash_workers(request, monkeypatch):
+    monkeypatch.setattr(Config, 'PASSWORD_HASH_WORKERS', request.param)
+    monkeypatch.setattr(Config, 'BCRYPT_ROUNDS', 4)
+    yield request.param
+    if passwords._pool is not None:
+        passwords._pool.shutdown()
+        passwords._pool = None
+
+
+def test_login_verifies_and_rehashes(app, hash_workers):
+    with app.app_context():
+        user = User(username='ada', age=14, password=passwords.hash_password('secret1', rounds=5))
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+
+    client = app.test_client()
+    assert client.post('/api/auth/login', json={'username': 'ada', 'password': 'wrong!'}).status_code == 401
+    assert client.post('/api/auth/login', json={'username': 'ada', 'password': 'secret1'}).status_code == 200
+
+    with app.app_context():
+        stored = db.session.get(User, user_id).password
+    assert stored.startswith('$2b$04$')
+    assert client.post('/api/auth/login', json={'username': 'ada', 'password': 'secret1'}).status_code == 200
+    assert (passwords._pool is not None) == (hash_workers > 0)
+
+
+def test_auto_pool_shares_cores_between_web_workers(monkeypatch):
+    monkeypatch.setattr(Config, 'PASSWORD_HASH_WORKERS', None)
+    monkeypatch.setattr(passwords.os, 'cpu_count', lambda: 8)
+    monkeypatch.setenv('WEB_CONCURRENCY', '4')
+    assert passwords._worker_count() == 2
+    monkeypatch.setenv('WEB_CONCURRENCY', '16')
+    assert passwords._worker_count() == 1
@@ -0,0 +1,12 @@
+"""Hot History queries must be answered from indexes (SQLite)."""
+from commands import check_query_plans
+
+
+def test_hot_queries_use_indexes(app):
+    with app.app_context():
+        results = check_query_plans()
+    assert results
+    for name, plan, problems in results:
+        assert not any(line.startswith('SCAN history') for line in plan), (name, plan)
+        assert not any('USE TEMP B-TREE' in line for line in plan), (name, plan)
+        assert not problems, (name, plan)
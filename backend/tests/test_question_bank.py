@@ -0,0 +1,46 @@
+"""Question bank de-duplication."""
+from sqlalchemy import event
+from extensions import db
+from models.question_bank import BankQuestion
+from services import question_bank
+
+
+def _question(text):
+    return {'question': text, 'options': ['a', 'b', 'c', 'd'], 'answer': 'a'}
+
+
+def test_race_drops_only_the_duplicate(app):
+    with app.app_context():
+        engine = db.engine
+        racer = _question('What is g?')
+        raced = []
+
+        def bank_first(conn, cursor, statement, parameters, context, executemany):
+            # Another worker banks one of the questions after add_questions has
+            # checked for duplicates but before it inserts
+            if raced or not statement.startswith('INSERT INTO bank_question'):
+                return
+            raced.append(True)
+            with engine.connect() as other:
+                other.execute(BankQuestion.__table__.insert().values(
+                    topic_key=question_bank.topic_key('gravity'), topic='gravity', question=racer['question'],
+                    options=racer['options'], answer='a', fingerprint=question_bank._fingerprint(racer)))
+                other.commit()
+
+        event.listen(engine, 'before_cursor_execute', bank_first)
+        try:
+            added = question_bank.add_questions('Gravity', [
+                racer, _question('Who was Newton?'), _question('What is mass?'),
+            ])
+        finally:
+            event.remove(engine, 'before_cursor_execute', bank_first)
+
+        assert raced
+        assert added == 2
+        assert sorted(q.question for q in BankQuestion.query) == ['What is g?', 'What is mass?', 'Who was Newton?']
+
+
+def test_duplicates_within_a_batch_are_stored_once(app):
+    with app.app_context():
+        assert question_bank.add_questions('Gravity', [_question('What is g?'), _question('what  is G?')]) == 1
+        assert question_bank.add_questions('gravity', [_question('What is g?')]) == 0
@@ -0,0 +1,46 @@
+"""SQLite rate-limit storage."""
+import multiprocessing
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import FixedWindowRateLimiter
+from services.rate_limit_store import SQLiteStorage
+
+
+def _hit(uri, n):
+    storage = storage_from_string(uri)
+    for _ in range(n):
+        storage.incr('user:1', 60)
+
+
+def test_scheme_is_registered(tmp_path):
+    assert isinstance(storage_from_string(f'sqlite:///{tmp_path}/rl.db'), SQLiteStorage)
+
+
+def test_counters_are_shared_between_processes(tmp_path):
+    uri = f'sqlite:///{tmp_path}/rl.db'
+    ctx = multiprocessing.get_context('spawn')
+    procs = [ctx.Process(target=_hit, args=(uri, 25)) for _ in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(30)
+        assert p.exitcode == 0
+    assert storage_from_string(uri).get('user:1') == 100
+
+
+def test_fixed_window(tmp_path, monkeypatch):
+    storage = storage_from_string(f'sqlite:///{tmp_path}/rl.db')
+    limiter = FixedWindowRateLimiter(storage)
+    limit = parse('2/minute')
+    now = [1000.0]
+    monkeypatch.setattr('services.rate_limit_store.time.time', lambda: now[0])
+
+    assert limiter.hit(limit, 'user:1') and limiter.hit(limit, 'user:1')
+    assert not limiter.hit(limit, 'user:1')
+    assert limiter.hit(limit, 'user:2')
+    assert storage.get_expiry(limit.key_for('user:1')) == 1060.0
+
+    now[0] += 61  # next window
+    assert storage.get(limit.key_for('user:1')) == 0
+    assert limiter.hit(limit, 'user:1')
+    assert storage.get(limit.key_for('user:1')) == 1
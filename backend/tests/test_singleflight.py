@@ -0,0 +1,106 @@
+"""SingleFlight coalesces concurrent identical calls."""
+import threading
+import time
+from services.singleflight import SingleFlight
+
+CALLERS = 8
+
+
+def _run_concurrently(group, key, fn):
+    """Call group.do(key, fn) from CALLERS threads; returns (results, errors)."""
+    results, errors = [], []
+    lock = threading.Lock()
+
+    def caller():
+        try:
+            value = group.do(key, fn)
+            with lock:
+                results.append(value)
+        except Exception as e:
+            with lock:
+                errors.append(e)
+
+    threads = [threading.Thread(target=caller) for _ in range(CALLERS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+    return results, errors
+
+
+def _leader(release, upstream_calls, outcome):
+    def fn():
+        upstream_calls.append(1)
+        release.wait(5)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    return fn
+
+
+def _release_when_all_waiting(group, key, release):
+    def watch():
+        deadline = time.monotonic() + 5
+        while group.metrics(key)['calls'] < CALLERS and time.monotonic() < deadline:
+            time.sleep(0.005)
+        release.set()
+    threading.Thread(target=watch).start()
+
+
+def test_concurrent_calls_share_one_execution():
+    group, release, upstream = SingleFlight(), threading.Event(), []
+    _release_when_all_waiting(group, 'k', release)
+    results, errors = _run_concurrently(group, 'k', _leader(release, upstream, 'answer'))
+
+    assert upstream == [1]
+    assert errors == []
+    assert results == ['answer'] * CALLERS
+    assert group.metrics('k') == {'calls': CALLERS, 'executions': 1, 'deduplicated': CALLERS - 1}
+    assert group.in_flight() == 0
+
+
+def test_error_reaches_every_waiter():
+    group, release, upstream = SingleFlight(), threading.Event(), []
+    _release_when_all_waiting(group, 'k', release)
+    failure = RuntimeError('upstream failed')
+    results, errors = _run_concurrently(group, 'k', _leader(release, upstream, failure))
+
+    assert upstream == [1]
+    assert results == []
+    assert errors == [failure] * CALLERS
+    assert group.in_flight() == 0
+
+
+def test_finished_keys_are_not_cached():
+    group = SingleFlight()
+    calls = []
+    assert group.do('k', lambda: calls.append(1) or len(calls)) == 1
+    assert group.do('k', lambda: calls.append(1) or len(calls)) == 2
+
+
+def test_explain_requests_coalesce(app, monkeypatch):
+    from services import cache, gemini
+    release, upstream = threading.Event(), []
+
+    def slow_upstream(prompt, **kwargs):
+        upstream.append(prompt)
+        release.wait(5)
+        return 'explanation'
+
+    monkeypatch.setattr(gemini, '_upstream', slow_upstream)
+    monkeypatch.setattr(gemini, 'inflight', SingleFlight())
+    monkeypatch.setattr(cache, '_cache', cache.MemoryCache())
+    key = gemini.make_key('explain', 'Tides', 'English', 'Short', gemini.age_band(12))
+    _release_when_all_waiting(gemini.inflight, key, release)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(gemini.explain_topic('Tides', 'English', 'Short', 12)))
+               for _ in range(CALLERS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+
+    assert len(upstream) == 1
+    assert results == ['explanation'] * CALLERS
+    assert gemini.inflight.metrics(key)['deduplicated'] == CALLERS - 1
@@ -0,0 +1,46 @@
+"""The app factory stays cheap: no Gemini SDK import and no schema work."""
+import os
+import subprocess
+import sys
+from sqlalchemy import event, inspect
+from sqlalchemy.engine import Engine
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = '''
+import sys
+import app
+app.create_app()
+print(sorted(m for m in sys.modules if m.startswith('google.generativeai')))
+'''
+
+
+def test_factory_does_not_import_gemini_sdk(db_url):
+    # A fresh interpreter: other tests in this process may have loaded anything
+    env = {**os.environ, 'GEMINI_FAKE': 'false', 'GEMINI_API_KEY': 'test-key', 'DATABASE_URL': db_url}
+    out = subprocess.run([sys.executable, '-c', CHILD], cwd=BACKEND, env=env,
+                         check=True, capture_output=True, text=True)
+    assert out.stdout.strip().splitlines()[-1] == '[]'
+
+
+def test_factory_runs_no_ddl(db_url, monkeypatch):
+    from app import create_app
+    from config import Config
+    from extensions import db
+    monkeypatch.setattr(Config, 'AUTO_INIT_DB', False)
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(Engine, 'before_cursor_execute', record)
+    try:
+        app = create_app()
+    finally:
+        event.remove(Engine, 'before_cursor_execute', record)
+
+    ddl = [s for s in statements if s.lstrip().upper().startswith(('CREATE', 'ALTER', 'DROP'))]
+    assert ddl == []
+    with app.app_context():
+        assert inspect(db.engine).get_table_names() == []
+        db.engine.dispose()
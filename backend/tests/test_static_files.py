@@ -0,0 +1,100 @@
+"""Built frontend serving: encoding negotiation, cache headers and ETags."""
+import gzip
+import pytest
+from flask import Flask
+from static_files import StaticManifest, compress_assets, IMMUTABLE
+
+SCRIPT = b'console.log("hello");\n' * 100
+BUNDLE = 'assets/index-Ab12Cd34.js'
+
+
+@pytest.fixture
+def dist(tmp_path):
+    (tmp_path / 'assets').mkdir()
+    (tmp_path / 'index.html').write_bytes(b'<!doctype html><div id="root"></div>' * 20)
+    (tmp_path / BUNDLE).write_bytes(SCRIPT)
+    (tmp_path / (BUNDLE + '.br')).write_bytes(b'brotli-bytes')
+    (tmp_path / 'favicon.ico').write_bytes(b'\x00' * 64)
+    return tmp_path
+
+
+@pytest.fixture
+def serve(dist):
+    manifest = StaticManifest(str(dist))
+    flask_app = Flask(__name__)
+
+    def serve(path, **headers):
+        with flask_app.test_request_context('/' + path, headers=headers) as ctx:
+            return manifest.response(path, ctx.request)
+    return serve
+
+
+@pytest.mark.parametrize('accept, encoding', [
+    ('gzip, deflate, br', 'br'),
+    ('br;q=0.5, gzip', 'br'),
+    ('gzip', 'gzip'),
+    ('identity', None),
+    (None, None),
+])
+def test_encoding_negotiation(serve, accept, encoding):
+    response = serve(BUNDLE, **({'Accept-Encoding': accept} if accept else {}))
+    assert response.status_code == 200
+    assert response.headers.get('Content-Encoding') == encoding
+    assert 'Accept-Encoding' in response.vary
+    body = response.get_data()
+    if encoding == 'br':
+        assert body == b'brotli-bytes'
+    elif encoding == 'gzip':
+        assert gzip.decompress(body) == SCRIPT  # made at load time, no .gz on disk
+    else:
+        assert body == SCRIPT
+
+
+def test_each_encoding_has_its_own_etag(serve):
+    tags = {serve(BUNDLE, **{'Accept-Encoding': accept}).headers['ETag']
+            for accept in ('br', 'gzip', 'identity')}
+    assert len(tags) == 3
+
+
+@pytest.mark.parametrize('accept', ['br', 'gzip', 'identity'])
+def test_matching_etag_is_not_modified(serve, accept):
+    etag = serve(BUNDLE, **{'Accept-Encoding': accept}).headers['ETag']
+    response = serve(BUNDLE, **{'Accept-Encoding': accept, 'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+    assert 'Accept-Encoding' in response.vary
+
+
+def test_etag_of_another_encoding_does_not_match(serve):
+    etag = serve(BUNDLE, **{'Accept-Encoding': 'br'}).headers['ETag']
+    response = serve(BUNDLE, **{'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+
+
+def test_cache_control(serve):
+    assert serve(BUNDLE).headers['Cache-Control'] == IMMUTABLE
+    assert serve('index.html').headers['Cache-Control'] == 'no-cache'
+    assert serve('favicon.ico').headers['Cache-Control'].startswith('public, max-age=')
+    # Small or binary files have no variants, so nothing varies
+    assert 'Accept-Encoding' not in serve('favicon.ico').vary
+
+
+def test_client_routes_fall_back_to_index(serve):
+    response = serve('history/42')
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'no-cache'
+    assert b'id="root"' in response.get_data()
+
+
+def test_unbuilt_frontend(tmp_path):
+    manifest = StaticManifest(str(tmp_path / 'missing'))
+    with Flask(__name__).test_request_context('/') as ctx:
+        assert manifest.response('', ctx.request) is None
+
+
+def test_compress_assets_writes_gzip_variants(dist):
+    count, _ = compress_assets(str(dist))
+    assert count == 2  # index.html and the bundle; favicon.ico isn't compressible
+    assert gzip.decompress((dist / (BUNDLE + '.gz')).read_bytes()) == SCRIPT
+    assert not (dist / 'favicon.ico.gz').exists()
@@ -0,0 +1,82 @@
+"""Per-template token accounting: TokenUsage, the usage rollup and /api/stats/usage."""
+import threading
+from extensions import db
+from models.user import User
+from services import cache, metrics
+from services.prompts import TokenUsage
+from services.quota import record_usage, get_usage, get_template_usage, template_totals
+
+
+def _metric(template, kind):
+    labels = f'{{template="{template}",kind="{kind}"}}'
+    return next((value for _, l, value in metrics.ai_template_tokens.samples() if l == labels), 0)
+
+
+def test_add_sums_calls_and_tokens():
+    before = _metric('explain/Short', 'prompt')
+    usage = TokenUsage('explain', 'Short')
+    usage.add(100, 40)
+    usage.add(50, 10)
+    assert usage.template == 'explain/Short'
+    assert (usage.calls, usage.prompt_tokens, usage.output_tokens, usage.total_tokens) == (2, 150, 50, 200)
+    assert _metric('explain/Short', 'prompt') - before == 150
+
+
+def test_to_dict_share():
+    usage = TokenUsage('mcq_batch')
+    usage.add(301, 99)
+    assert usage.to_dict() == {'template': 'mcq_batch', 'calls': 1, 'prompt_tokens': 301, 'output_tokens': 99}
+    assert usage.to_dict(1 / 3) == {'template': 'mcq_batch', 'calls': 1, 'prompt_tokens': 100, 'output_tokens': 33}
+
+
+def test_add_is_thread_safe():
+    usage = TokenUsage('mcq')
+    threads = [threading.Thread(target=lambda: [usage.add(3, 2) for _ in range(500)]) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert (usage.calls, usage.prompt_tokens, usage.output_tokens) == (4000, 12000, 8000)
+
+
+def _usage(template, variant, *calls):
+    usage = TokenUsage(template, variant)
+    for prompt_tokens, output_tokens in calls:
+        usage.add(prompt_tokens, output_tokens)
+    return usage
+
+
+def test_record_usage_totals_per_template(app, user_id):
+    with app.app_context():
+        other = User(username='other', password='x', age=30)
+        db.session.add(other)
+        db.session.commit()
+
+        record_usage(user_id, _usage('explain', 'Short', (100, 50)))
+        record_usage(user_id, _usage('explain', 'Short', (100, 30), (20, 10)))
+        record_usage(user_id, _usage('mcq', None, (10, 500)))
+        record_usage(other.id, _usage('explain', 'Short', (1000, 0)))
+        record_usage(other.id, TokenUsage('explain', 'Long'))  # cache hit: no calls, nothing recorded
+
+        assert [row.to_dict() for row in get_template_usage(user_id)] == [
+            {'template': 'mcq', 'calls': 1, 'prompt_tokens': 10, 'output_tokens': 500},
+            {'template': 'explain/Short', 'calls': 3, 'prompt_tokens': 220, 'output_tokens': 90},
+        ]
+        assert get_usage(user_id).tokens == 820
+        assert [tuple(row) for row in template_totals()] == [
+            ('explain/Short', 4, 1220, 90),
+            ('mcq', 1, 10, 500),
+        ]
+
+
+def test_explain_request_records_its_template(app, auth_headers, monkeypatch):
+    monkeypatch.setattr(cache, '_cache', cache.MemoryCache())  # so the request really calls Gemini
+    client = app.test_client()
+    response = client.post('/api/explain', json={'topic': 'Tides', 'language': 'English', 'size': 'Short', 'age': 12},
+                           headers=auth_headers)
+    assert response.status_code == 200
+
+    templates = client.get('/api/stats/usage', headers=auth_headers).get_json()['templates']
+    assert [t['template'] for t in templates] == ['explain/Short']
+    assert templates[0]['calls'] == 1
+    assert templates[0]['prompt_tokens'] > 0 and templates[0]['output_tokens'] > 0
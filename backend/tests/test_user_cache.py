@@ -0,0 +1,20 @@
+"""Profile cache listeners on User."""
+from extensions import db
+from models.user import User
+from services import user_cache
+
+
+def test_cache_follows_updates_and_deletes(app):
+    with app.app_context():
+        user = User(username='ada', password='x', age=14)
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+
+        user.age = 15
+        db.session.commit()
+        assert user_cache.get(user_id)['age'] == 15
+
+        db.session.delete(user)
+        db.session.commit()
+        assert user_cache.get(user_id) is None
@@ -3,7 +3,13 @@
  *
  * Request interceptor: attaches Bearer token from localStorage.
  * Response interceptor: on 401, clears auth data and redirects to /login.
+ * ETag cache: GET responses that carry an ETag (history, stats) are kept in
+ * memory; repeat requests send If-None-Match and a 304 is answered from the
+ * cache, so callers always see a normal 200 with data.
  * Base URL: /api (proxied by Vite to http://localhost:5000 in development).
+ *
+ * streamEvents(): POSTs via fetch and reads a Server-Sent Events response
+ * incrementally (axios buffers the whole body in the browser).
  */
 import axios from 'axios'
 
@@ -14,20 +20,53 @@ const api = axios.create({
   },
 })
 
+// Last ETag'd response per user + URL; small, as only a few endpoints send ETags
+const etagCache = new Map()
+const ETAG_CACHE_SIZE = 50
+
+const cacheKey = (config) => `${localStorage.getItem('token')}|${api.getUri(config)}`
+
 // Automatically attach JWT token to every request if it exists
 api.interceptors.request.use((config) => {
   const token = localStorage.getItem('token')
   if (token) {
     config.headers.Authorization = `Bearer ${token}`
   }
+  if (config.method === 'get') {
+    const cached = etagCache.get(cacheKey(config))
+    if (cached) {
+      config.headers['If-None-Match'] = cached.etag
+      config.validateStatus = (status) => (status >= 200 && status < 300) || status === 304
+    }
+  }
   return config
 })
 
+function applyEtagCache(response) {
+  if (response.config.method !== 'get') return response
+  const key = cacheKey(response.config)
+  if (response.status === 304) {
+    const cached = etagCache.get(key)
+    if (cached) return { ...response, status: 200, data: cached.data }
+    return response
+  }
+  const etag = response.headers.etag
+  if (etag) {
+    etagCache.delete(key)
+    etagCache.set(key, { etag, data: response.data })
+    if (etagCache.size > ETAG_CACHE_SIZE) {
+      etagCache.delete(etagCache.keys().next().value)
+    }
+  }
+  return response
+}
+
 // Handle 401 globally — token expired or invalid
 api.interceptors.response.use(
-  (response) => response,
+  applyEtagCache,
   (error) => {
     if (error.response?.status === 401) {
+      etagCache.clear()
       localStorage.removeItem('token')
       localStorage.removeItem('user')
       window.location.href = '/login'
@@ -36,4 +75,56 @@ api.interceptors.response.use(
   }
 )
 
+/**
+ * POST `body` to `path` and call `onEvent(event, data)` for every SSE event
+ * as it arrives. Non-2xx responses are rejected with an axios-shaped error
+ * ({ response: { status, data } }) so callers can share error handling.
+ */
+export async function streamEvents(path, body, onEvent) {
+  const token = localStorage.getItem('token')
+  const res = await fetch(`/api${path}`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      ...(token ? { Authorization: `Bearer ${token}` } : {}),
+    },
+    body: JSON.stringify(body),
+  })
+
+  if (!res.ok) {
+    if (res.status === 401) {
+      localStorage.removeItem('token')
+      localStorage.removeItem('user')
+      window.location.href = '/login'
+    }
+    const data = await res.json().catch(() => ({}))
+    throw { response: { status: res.status, data } }
+  }
+
+  const reader = res.body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ''
+
+  while (true) {
+    const { value, done } = await reader.read()
+    if (done) break
+    buffer += decoder.decode(value, { stream: true })
+
+    // Events are separated by a blank line
+    let boundary
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const raw = buffer.slice(0, boundary)
+      buffer = buffer.slice(boundary + 2)
+
+      let event = 'message'
+      let data = ''
+      for (const line of raw.split('\n')) {
+        if (line.startsWith('event:')) event = line.slice(6).trim()
+        else if (line.startsWith('data:')) data += line.slice(5).trim()
+      }
+      if (data) onEvent(event, JSON.parse(data))
+    }
+  }
+}
+
 export default api
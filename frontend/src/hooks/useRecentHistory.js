@@ -11,14 +11,10 @@ export function useRecentHistory() {
 
         const fetchHistory = async () => {
             try {
-                const res = await api.get('/history');
+                // Newest 5 summaries only — the dashboard never shows responses
+                const res = await api.get('/history', { params: { limit: 5 } });
                 if (mounted) {
-                    // API returns sorted by newest first already
-                    // We limit to 5 here for dashboard purposes? 
-                    // Actually, let's return all and let component decide, 
-                    // or just slice here if this hook is strictly for "Recent".
-                    // 'useRecentHistory' implies a limit. Let's slice 5.
-                    setHistory(res.data.history.slice(0, 5));
+                    setHistory(res.data.history);
                     setError(null);
                 }
             } catch (err) {
@@ -3,7 +3,7 @@ import { useLocation } from 'react-router-dom'
 import ReactMarkdown from 'react-markdown'
 import { CheckCircle, Loader2 } from 'lucide-react'
 import { useAuth } from '../context/AuthContext.jsx'
-import api from '../api/client.js'
+import { streamEvents } from '../api/client.js'
 import styles from '../styles/Explainer.module.css'
 
 function Explainer() {
@@ -19,6 +19,7 @@ function Explainer() {
   const [result, setResult] = useState('')
   const [error, setError] = useState('')
   const [loading, setLoading] = useState(false)
+  const [streaming, setStreaming] = useState(false)
 
   // Pre-fill topic if passed from Home
   useEffect(() => {
@@ -36,16 +37,26 @@ function Explainer() {
   const handleSubmit = async (e) => {
     e.preventDefault()
     setLoading(true)
+    setStreaming(true)
     setResult('')
     setError('')
     try {
-      const res = await api.post('/explain', {
+      // Render the explanation incrementally as chunks arrive
+      await streamEvents('/explain/stream', {
         ...form,
         age: parseInt(form.age)
+      }, (event, data) => {
+        if (event === 'chunk') {
+          setLoading(false)
+          setResult(prev => prev + data.text)
+        } else if (event === 'error') {
+          throw { response: { status: data.status, data } }
+        }
       })
-      setResult(res.data.explanation)
     } catch (err) {
-      if (err.response?.status === 429) {
+      if (err.response?.data?.code === 'quota_exceeded') {
+        setError(err.response.data.error)
+      } else if (err.response?.status === 429 || err.response?.status === 503) {
         setError('System is busy, please try again in a moment.')
       } else if (!err.response) {
         setError('Network error — check your connection.')
@@ -54,6 +65,7 @@ function Explainer() {
       }
     } finally {
       setLoading(false)
+      setStreaming(false)
     }
   }
 
@@ -123,8 +135,8 @@ function Explainer() {
 
           {error && <div className={styles.error}>{error}</div>}
 
-          <button className={styles.submitBtn} disabled={loading}>
-            {loading ? 'Generating explanation...' : 'Explain this topic'}
+          <button className={styles.submitBtn} disabled={loading || streaming}>
+            {loading || streaming ? 'Generating explanation...' : 'Explain this topic'}
           </button>
         </form>
 
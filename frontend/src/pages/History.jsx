@@ -1,27 +1,133 @@
-import { useState, useEffect } from 'react'
+import { useState, useEffect, Fragment } from 'react'
 import ReactMarkdown from 'react-markdown'
-import { Loader2, BookOpen, Lightbulb, ListChecks, ChevronUp, ChevronDown, Trash2 } from 'lucide-react'
+import { Loader2, BookOpen, Lightbulb, ListChecks, ChevronUp, ChevronDown, Trash2, Search, Download } from 'lucide-react'
 import api from '../api/client.js'
 import styles from '../styles/History.module.css'
 
+const PAGE_SIZE = 20
+const SEARCH_DELAY_MS = 300
+
+/**
+ * Render a search snippet, highlighting the terms the server wrapped in <mark>.
+ * Built from text nodes, so the snippet itself is never interpreted as HTML.
+ */
+function Snippet({ text }) {
+    const parts = text.split(/<mark>(.*?)<\/mark>/g)
+    return (
+        <p className={styles.snippet}>
+            {parts.map((part, i) => i % 2 ? <mark key={i}>{part}</mark> : <Fragment key={i}>{part}</Fragment>)}
+        </p>
+    )
+}
+
+/**
+ * Render a saved quiz. New entries store structured JSON questions
+ * (metadata.format === 'json'); older ones hold the raw generated text.
+ */
+function McqResponse({ entry }) {
+    if (entry.metadata?.format !== 'json') {
+        return <pre>{entry.response}</pre>
+    }
+    const questions = JSON.parse(entry.response)
+    return (
+        <ol>
+            {questions.map((q, i) => (
+                <li key={i}>
+                    <p>{q.question}</p>
+                    <ul>
+                        {q.options.map((option, j) => {
+                            const letter = 'abcd'[j]
+                            return (
+                                <li key={letter}>
+                                    {letter === q.answer ? <strong>{letter}) {option}</strong> : <>{letter}) {option}</>}
+                                </li>
+                            )
+                        })}
+                    </ul>
+                </li>
+            ))}
+        </ol>
+    )
+}
+
 function History() {
     const [entries, setEntries] = useState([])
     const [loading, setLoading] = useState(true)
     const [error, setError] = useState('')
     const [expandedId, setExpandedId] = useState(null)
+    const [nextCursor, setNextCursor] = useState(null)
+    const [loadingMore, setLoadingMore] = useState(false)
+    // Full entries (with response) fetched on first expand, keyed by id
+    const [details, setDetails] = useState({})
+    // Server-side search; results is null while no query is entered
+    const [query, setQuery] = useState('')
+    const [results, setResults] = useState(null)
+    const [searchCursor, setSearchCursor] = useState(null)
+    const [searching, setSearching] = useState(false)
 
     useEffect(() => {
         fetchHistory()
     }, [])
 
-    const fetchHistory = async () => {
+    useEffect(() => {
+        if (!query.trim()) {
+            setResults(null)
+            setSearchCursor(null)
+            return
+        }
+        const timer = setTimeout(() => runSearch(query.trim()), SEARCH_DELAY_MS)
+        return () => clearTimeout(timer)
+    }, [query])
+
+    const runSearch = async (q, cursor = null) => {
+        setSearching(true)
+        try {
+            const res = await api.get('/history/search', { params: { q, limit: PAGE_SIZE, ...(cursor ? { cursor } : {}) } })
+            setResults(prev => cursor ? [...prev, ...res.data.results] : res.data.results)
+            setSearchCursor(res.data.next_cursor)
+            setError('')
+        } catch (err) {
+            if (err.response?.status === 400) {
+                setResults([])
+                setSearchCursor(null)
+            } else {
+                setError('Search failed. Please try again.')
+            }
+        } finally {
+            setSearching(false)
+            setLoadingMore(false)
+        }
+    }
+
+    const fetchHistory = async (cursor = null) => {
         try {
-            const res = await api.get('/history')
-            setEntries(res.data.history)
+            const res = await api.get('/history', { params: { limit: PAGE_SIZE, ...(cursor ? { cursor } : {}) } })
+            setEntries(prev => cursor ? [...prev, ...res.data.history] : res.data.history)
+            setNextCursor(res.data.next_cursor)
         } catch (err) {
             setError('Failed to load history.')
         } finally {
             setLoading(false)
+            setLoadingMore(false)
+        }
+    }
+
+    const handleLoadMore = () => {
+        setLoadingMore(true)
+        if (results) {
+            runSearch(query.trim(), searchCursor)
+        } else {
+            fetchHistory(nextCursor)
+        }
+    }
+
+    const fetchDetail = async (id) => {
+        if (details[id]) return
+        try {
+            const res = await api.get(`/history/${id}`)
+            setDetails(prev => ({ ...prev, [id]: res.data }))
+        } catch (err) {
+            setError('Failed to load entry.')
         }
     }
 
@@ -29,12 +135,41 @@ function History() {
         try {
             await api.delete(`/history/${id}`)
             setEntries(entries.filter(e => e.id !== id))
+            setResults(prev => prev && prev.filter(e => e.id !== id))
         } catch (err) {
             setError('Failed to delete entry.')
         }
     }
 
+    const handleClearAll = async () => {
+        if (!window.confirm('Delete your entire history? This cannot be undone.')) return
+        try {
+            await api.delete('/history', { data: { all: true } })
+            setEntries([])
+            setResults(prev => prev && [])
+            setNextCursor(null)
+            setSearchCursor(null)
+        } catch (err) {
+            setError('Failed to clear history.')
+        }
+    }
+
+    const handleExport = async (format) => {
+        try {
+            const res = await api.get('/history/export', { params: { format }, responseType: 'blob' })
+            const url = URL.createObjectURL(res.data)
+            const link = document.createElement('a')
+            link.href = url
+            link.download = `history.${format}`
+            link.click()
+            URL.revokeObjectURL(url)
+        } catch (err) {
+            setError('Failed to export history.')
+        }
+    }
+
     const toggleExpand = (id) => {
+        if (expandedId !== id) fetchDetail(id)
         setExpandedId(expandedId === id ? null : id)
     }
 
@@ -69,7 +204,39 @@ function History() {
 
                 {error && <div className={styles.error}>{error}</div>}
 
-                {entries.length === 0 && !error && (
+                <div className={styles.searchBox}>
+                    <Search size={16} color="var(--text-disabled)" />
+                    <input
+                        type="search"
+                        value={query}
+                        onChange={(e) => setQuery(e.target.value)}
+                        placeholder="Search your history..."
+                        aria-label="Search history"
+                    />
+                    {searching && <Loader2 className="spinner" size={16} color="var(--accent)" />}
+                </div>
+
+                {entries.length > 0 && (
+                    <div className={styles.toolbar}>
+                        <button className={styles.toolbarBtn} onClick={() => handleExport('ndjson')}>
+                            <Download size={14} /> Export JSON
+                        </button>
+                        <button className={styles.toolbarBtn} onClick={() => handleExport('csv')}>
+                            <Download size={14} /> Export CSV
+                        </button>
+                        <button className={styles.deleteBtn} onClick={handleClearAll}>
+                            <Trash2 size={14} /> Clear all
+                        </button>
+                    </div>
+                )}
+
+                {results && results.length === 0 && !searching && (
+                    <div className={styles.empty}>
+                        <p>No history matches "{query.trim()}".</p>
+                    </div>
+                )}
+
+                {!results && entries.length === 0 && !error && (
                     <div className={styles.empty}>
                         <BookOpen size={48} color="var(--text-disabled)" style={{ marginBottom: '16px' }} />
                         <p>No history yet. Start exploring topics or generating quizzes!</p>
@@ -77,7 +244,7 @@ function History() {
                 )}
 
                 <div className={styles.list}>
-                    {entries.map(entry => (
+                    {(results || entries).map(entry => (
                         <div key={entry.id} className={styles.card}>
                             <div className={styles.cardHeader} onClick={() => toggleExpand(entry.id)}>
                                 <div className={styles.cardMeta}>
@@ -87,6 +254,7 @@ function History() {
                                     <span className={styles.date}>{formatDate(entry.created_at)}</span>
                                 </div>
                                 <h3 className={styles.cardTopic}>{entry.topic}</h3>
+                                {entry.snippet && <Snippet text={entry.snippet} />}
                                 <span className={styles.expandIcon}>
                                     {expandedId === entry.id ? <ChevronUp size={20} /> : <ChevronDown size={20} />}
                                 </span>
@@ -95,10 +263,14 @@ function History() {
                             {expandedId === entry.id && (
                                 <div className={styles.cardBody}>
                                     <div className={styles.responseText}>
-                                        {entry.type === 'explain' ? (
-                                            <ReactMarkdown>{entry.response}</ReactMarkdown>
+                                        {!details[entry.id] ? (
+                                            <Loader2 className="spinner" size={20} color="var(--accent)" />
+                                        ) : entry.type === 'explain' ? (
+                                            <ReactMarkdown>{details[entry.id].response}</ReactMarkdown>
+                                        ) : entry.type === 'mcq' ? (
+                                            <McqResponse entry={details[entry.id]} />
                                         ) : (
-                                            <pre>{entry.response}</pre>
+                                            <pre>{details[entry.id].response}</pre>
                                         )}
                                     </div>
                                     <button
@@ -112,6 +284,12 @@ function History() {
                         </div>
                     ))}
                 </div>
+
+                {(results ? searchCursor : nextCursor) && (
+                    <button className={styles.loadMoreBtn} onClick={handleLoadMore} disabled={loadingMore}>
+                        {loadingMore ? 'Loading...' : 'Load more'}
+                    </button>
+                )}
             </div>
         </div>
     )
@@ -4,35 +4,8 @@ import { Check, X, Loader2, Save } from 'lucide-react';
 import api from '../api/client.js';
 import styles from '../styles/McqGenerator.module.css';
 
-/**
- * Parse raw MCQ text from Gemini AI into structured question objects.
- */
-function parseMcq(raw) {
-  const questions = [];
-  const blocks = raw.split(/\n(?=Q\d+\.)/).filter(Boolean);
-
-  for (const block of blocks) {
-    const lines = block.trim().split('\n').filter(Boolean);
-    if (lines.length < 2) continue;
-
-    const question = lines[0].replace(/^Q\d+\.\s*/, '').trim();
-    const options = [];
-    let answer = '';
-
-    for (const line of lines.slice(1)) {
-      if (/^[a-d]\)/i.test(line)) {
-        options.push(line.trim());
-      } else if (/^Answer:/i.test(line)) {
-        answer = line.replace(/^Answer:\s*/i, '').trim().toLowerCase();
-      }
-    }
-
-    if (question && options.length > 0) {
-      questions.push({ question, options, answer });
-    }
-  }
-  return questions;
-}
+// Questions arrive structured from the API: { question, options: [4 texts], answer: 'a'-'d' }
+const OPTION_LETTERS = ['a', 'b', 'c', 'd'];
 
 function McqGenerator() {
   const navigate = useNavigate();
@@ -51,7 +24,6 @@ function McqGenerator() {
   const [saved, setSaved] = useState(false);
   const [saving, setSaving] = useState(false);
 
-  const [rawResult, setRawResult] = useState('');
   const [error, setError] = useState('');
   const [loading, setLoading] = useState(false);
 
@@ -68,9 +40,9 @@ function McqGenerator() {
     }
   }, [location.state]);
 
-  const handleSelect = (index, option) => {
+  const handleSelect = (index, letter) => {
     if (revealedAnswers[index]) return;
-    setSelectedAnswers(prev => ({ ...prev, [index]: option }));
+    setSelectedAnswers(prev => ({ ...prev, [index]: letter }));
   };
 
   const handleReveal = (index) => {
@@ -79,9 +51,7 @@ function McqGenerator() {
     setRevealedAnswers(prev => ({ ...prev, [index]: true }));
     setAnsweredCount(prev => prev + 1);
 
-    // Check answer correctness properly (matching format "a) text" -> "a")
-    const selectedLetter = selectedAnswers[index][0].toLowerCase();
-    if (selectedLetter === questions[index].answer) {
+    if (selectedAnswers[index] === questions[index].answer) {
       setScore(prev => prev + 1);
     }
   };
@@ -114,7 +84,6 @@ function McqGenerator() {
     setScore(0);
     setAnsweredCount(0);
     setSaved(false);
-    setRawResult('');
     setError('');
     setSelectedAnswers({});
     setRevealedAnswers({});
@@ -124,14 +93,11 @@ function McqGenerator() {
         topic: topic.trim(),
         count: parseInt(count)
       });
-      const parsed = parseMcq(res.data.mcq);
-      if (parsed.length > 0) {
-        setQuestions(parsed);
-      } else {
-        setRawResult(res.data.mcq);
-      }
+      setQuestions(res.data.questions);
     } catch (err) {
-      if (err.response?.status === 429) {
+      if (err.response?.data?.code === 'quota_exceeded') {
+        setError(err.response.data.error);
+      } else if (err.response?.status === 429 || err.response?.status === 503) {
         setError('System is busy, please try again in a moment.');
       } else if (!err.response) {
         setError('Network error — check your connection.');
@@ -225,27 +191,27 @@ function McqGenerator() {
                 </div>
 
                 <div className={styles.options}>
-                  {question.options.map((option) => {
-                    const optionLetter = option[0].toLowerCase();
+                  {question.options.map((option, optionIndex) => {
+                    const optionLetter = OPTION_LETTERS[optionIndex];
                     return (
                       <button
-                        key={option}
+                        key={optionLetter}
                         className={`
                           ${styles.option}
-                          ${selectedAnswers[index] === option ? styles.optionSelected : ''}
+                          ${selectedAnswers[index] === optionLetter ? styles.optionSelected : ''}
                           ${revealedAnswers[index] && optionLetter === question.answer ? styles.optionCorrect : ''}
-                          ${revealedAnswers[index] && selectedAnswers[index] === option && optionLetter !== question.answer ? styles.optionWrong : ''}
+                          ${revealedAnswers[index] && selectedAnswers[index] === optionLetter && optionLetter !== question.answer ? styles.optionWrong : ''}
                         `}
-                        onClick={() => !revealedAnswers[index] && handleSelect(index, option)}
+                        onClick={() => !revealedAnswers[index] && handleSelect(index, optionLetter)}
                         disabled={!!revealedAnswers[index]}
                       >
                         {revealedAnswers[index] && optionLetter === question.answer && (
                           <Check size={14} aria-hidden="true" />
                         )}
-                        {revealedAnswers[index] && selectedAnswers[index] === option && optionLetter !== question.answer && (
+                        {revealedAnswers[index] && selectedAnswers[index] === optionLetter && optionLetter !== question.answer && (
                           <X size={14} aria-hidden="true" />
                         )}
-                        {option}
+                        {optionLetter}) {option}
                       </button>
                     )
                   })}
@@ -261,7 +227,7 @@ function McqGenerator() {
                 {/* Answer reveal */}
                 {revealedAnswers[index] && (
                   <div className={styles.answerReveal}>
-                    {selectedAnswers[index][0].toLowerCase() === question.answer
+                    {selectedAnswers[index] === question.answer
                       ? <span className={styles.correctText}>Correct! Well done.</span>
                       : <span className={styles.wrongText}>The correct answer is: <strong>{question.answer.toUpperCase()}</strong></span>
                     }
@@ -271,20 +237,6 @@ function McqGenerator() {
             ))}
           </div>
         )}
-
-        {rawResult && !loading && (
-          <div style={{
-            background: 'var(--bg-card)',
-            border: '1px solid var(--border)',
-            borderRadius: 'var(--radius-lg)',
-            padding: '28px',
-            whiteSpace: 'pre-wrap',
-            color: 'var(--text-primary)',
-            lineHeight: '1.8'
-          }}>
-            {rawResult}
-          </div>
-        )}
       </div>
     </div>
   );